@@ -0,0 +1,159 @@
+"""
+Lean Chrome profile for the Selenium scrapers
+
+The Selenium firms only mine listing pages for text and links, so the
+browsers started by driver_pool.py use a "lean rendering" profile driven by
+SELENIUM_CONFIG (see config_template.py):
+
+- headless by default, fixed window size
+- eager page-load strategy: driver.get() returns at DOMContentLoaded instead
+  of waiting for every image and tracker
+- images disabled through content settings; fonts and video blocked with
+  Network.setBlockedURLs
+- analytics / ad hosts from SELENIUM_CONFIG['blocked_hosts'] blocked the same way
+
+page_metrics() reports what a page cost (bytes transferred, time to
+DOMContentLoaded, Chrome RSS) so the saving is visible in the logs.
+"""
+
+import logging
+
+from selenium.webdriver.chrome.options import Options
+
+from network_capture import enable_capture
+from settings import get_setting
+
+try:
+    import psutil
+except ImportError:  # memory reporting is skipped without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# Hides navigator.webdriver on every document the browser loads
+HIDE_WEBDRIVER_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+FONT_PATTERNS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+MEDIA_PATTERNS = ['*.mp4', '*.webm', '*.ogg', '*.mp3', '*.m3u8', '*.mov']
+# Background images set from CSS bypass the content setting
+IMAGE_PATTERNS = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg', '*.ico']
+
+# Transfer size and DOMContentLoaded time of the current document, from the
+# Resource Timing API (cross-origin assets without Timing-Allow-Origin report 0 bytes)
+PAGE_METRICS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const r of resources) bytes += r.transferSize || 0;
+return {
+    bytes: bytes,
+    resources: resources.length,
+    dom_ready_ms: nav ? Math.round(nav.domContentLoadedEventEnd - nav.startTime) : null
+};
+"""
+
+
+def lean_options(headless=None):
+    """Chrome options for the lean rendering profile"""
+    settings = get_setting('SELENIUM_CONFIG')
+    if headless is None:
+        headless = settings['headless']
+
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument(f"--window-size={settings['window_size']}")
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--mute-audio')
+    options.add_argument(f'user-agent={USER_AGENT}')
+    options.page_load_strategy = settings['page_load_strategy']
+    if settings['block_images']:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    return enable_capture(options)
+
+
+def blocked_url_patterns():
+    """URL patterns passed to Network.setBlockedURLs"""
+    settings = get_setting('SELENIUM_CONFIG')
+    patterns = []
+    if settings['block_images']:
+        patterns += IMAGE_PATTERNS
+    if settings['block_fonts']:
+        patterns += FONT_PATTERNS
+    if settings['block_media']:
+        patterns += MEDIA_PATTERNS
+    patterns += [f'*{host}*' for host in settings['blocked_hosts']]
+    return patterns
+
+
+def apply_profile(driver):
+    """Per-session settings that can only be applied once Chrome is running"""
+    settings = get_setting('SELENIUM_CONFIG')
+    driver.set_page_load_timeout(settings['page_load_timeout'])
+    if settings['implicit_wait']:
+        driver.implicitly_wait(settings['implicit_wait'])
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': HIDE_WEBDRIVER_SCRIPT})
+        patterns = blocked_url_patterns()
+        if patterns:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as e:
+        logger.warning(f"Could not apply lean profile CDP settings: {e}")
+    return driver
+
+
+def chrome_rss_mb(driver):
+    """Resident memory of chromedriver and all its Chrome children in MB, or None"""
+    if psutil is None:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        processes = [process] + process.children(recursive=True)
+    except Exception:
+        return None
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+def page_metrics(driver):
+    """
+    Cost of the page currently loaded in driver
+
+    Returns:
+        dict: bytes, resources, dom_ready_ms and rss_mb (None when unknown)
+    """
+    try:
+        metrics = driver.execute_script(PAGE_METRICS_SCRIPT) or {}
+    except Exception as e:
+        logger.debug(f"Could not read page metrics: {e}")
+        metrics = {}
+    return {
+        'bytes': metrics.get('bytes', 0),
+        'resources': metrics.get('resources', 0),
+        'dom_ready_ms': metrics.get('dom_ready_ms'),
+        'rss_mb': chrome_rss_mb(driver)
+    }
+
+
+def log_page_metrics(driver):
+    """Log page_metrics() for the current page when SELENIUM_CONFIG['report_usage'] is on"""
+    if not get_setting('SELENIUM_CONFIG')['report_usage']:
+        return None
+    metrics = page_metrics(driver)
+    rss = f"{metrics['rss_mb']:.0f} MB" if metrics['rss_mb'] is not None else "n/a"
+    logger.info(f"{driver.current_url}: {metrics['bytes'] / 1024:.0f} KB in {metrics['resources']} resources, "
+                f"DOM ready {metrics['dom_ready_ms']} ms, Chrome RSS {rss}")
+    return metrics
@@ -0,0 +1,228 @@
+"""
+Batched upserts for the publications tables
+
+Rows are buffered and written with a single executemany()
+INSERT ... ON DUPLICATE KEY UPDATE per batch, in one transaction, instead of
+one execute + commit (and often one connection) per row. Each flush
+borrows a connection from db_pool for the length of the transaction.
+
+Usage:
+    writer = BulkWriter(
+        db_config, 'azb_partners_publications',
+        columns=['company_name', 'publication_type', 'publication_date',
+                 'practice_area', 'article_heading', 'article_link'],
+        key_columns=['article_link'],
+        update_columns=['publication_type', 'publication_date', 'practice_area', 'article_heading']
+    )
+    for publication in publications:
+        writer.add(publication)
+    counts = writer.flush()   # {'inserted': .., 'updated': .., 'unchanged': ..}
+    writer.close()
+
+Counts follow MySQL's affected-rows semantics for ON DUPLICATE KEY UPDATE
+(1 per inserted row, 2 per updated row, 0 per unchanged row); the number of
+keys that already existed is read in the same transaction to split them.
+An extra_updates assignment that doesn't depend on the incoming row (e.g. a
+scraped_at refresh) touches every existing row, so rows whose update columns
+already hold the incoming values are counted before the write and reported
+as unchanged. Assignments on VALUES(...) keep the affected-rows counts.
+With update_columns=[] existing rows are left untouched (like INSERT IGNORE).
+
+Concurrent writers to the same table (e.g. Firm_7's parallel listing crawls)
+can deadlock each other in InnoDB. A batch that fails with a deadlock or lock
+wait timeout is rolled back and retried; rows stay buffered until their
+transaction commits, so a batch that still fails is written by the next flush.
+"""
+
+import logging
+import random
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from db_pool import connection
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the whole transaction can simply be run again
+RETRYABLE_ERRORS = {errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT}
+MAX_ATTEMPTS = 4
+
+
+class BulkWriter:
+    """Buffers rows for one table and flushes them in batches"""
+
+    def __init__(self, db_config, table, columns, key_columns, update_columns=None,
+                 extra_updates=None, batch_size=100):
+        """
+        Args:
+            db_config (dict): MySQL connection settings
+            table (str): Target table
+            columns (list): Columns to insert; rows are dicts with these keys
+            key_columns (list): Columns of the table's unique key
+            update_columns (list, optional): Columns refreshed on duplicate key
+                (default: every non-key column, [] to keep existing rows as they are)
+            extra_updates (dict, optional): Raw SQL assignments applied on duplicate
+                key, e.g. {'scraped_at': 'CURRENT_TIMESTAMP'}
+            batch_size (int): add() flushes automatically at this many rows
+        """
+        self.db_config = db_config
+        self.table = table
+        self.columns = list(columns)
+        self.key_columns = list(key_columns)
+        if update_columns is None:
+            update_columns = [c for c in self.columns if c not in self.key_columns]
+        self.update_columns = list(update_columns)
+        self.extra_updates = dict(extra_updates or {})
+        # Assignments that change every existing row, whatever the batch holds
+        self.refresh_columns = [c for c, expr in self.extra_updates.items()
+                                if 'VALUES(' not in expr.upper()]
+        self.batch_size = batch_size
+        self.insert_query = self._build_insert(self.update_columns, self.extra_updates)
+
+        self.rows = []
+        self.lock = threading.RLock()
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    def _build_insert(self, update_columns, extra_updates):
+        assignments = [f"`{c}` = VALUES(`{c}`)" for c in update_columns]
+        assignments += [f"`{c}` = {expr}" for c, expr in extra_updates.items()]
+        if not assignments:
+            # No-op update so duplicates are reported as unchanged
+            key = self.key_columns[0]
+            assignments = [f"`{key}` = `{key}`"]
+        return (
+            f"INSERT INTO `{self.table}` ({', '.join(f'`{c}`' for c in self.columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(self.columns))}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+        )
+
+    def _key(self, row):
+        return tuple(row[c] for c in self.key_columns)
+
+    def _count_existing(self, cursor, keys):
+        """How many of the batch's keys are already in the table"""
+        if len(self.key_columns) == 1:
+            placeholders = ', '.join(['%s'] * len(keys))
+            query = f"SELECT COUNT(*) FROM `{self.table}` WHERE `{self.key_columns[0]}` IN ({placeholders})"
+            params = [key[0] for key in keys]
+        else:
+            row_placeholder = f"({', '.join(['%s'] * len(self.key_columns))})"
+            placeholders = ', '.join([row_placeholder] * len(keys))
+            key_list = ', '.join(f'`{c}`' for c in self.key_columns)
+            query = f"SELECT COUNT(*) FROM `{self.table}` WHERE ({key_list}) IN ({placeholders})"
+            params = [value for key in keys for value in key]
+        cursor.execute(query, params)
+        return min(len(keys), cursor.fetchone()[0])
+
+    def _count_unchanged(self, cursor, batch):
+        """
+        How many of the batch's rows are already stored with the same values
+
+        Only needed with refresh assignments in extra_updates, which make MySQL
+        report every existing row as updated. Must run before the upsert.
+
+        Returns:
+            int: Unchanged rows, or None when affected rows tell them apart
+        """
+        if not self.refresh_columns:
+            return None
+        columns = self.key_columns + self.update_columns
+        # <=> so NULLs compare equal; MySQL coerces e.g. date strings to DATE
+        condition = '(' + ' AND '.join(f"`{c}` <=> %s" for c in columns) + ')'
+        query = f"SELECT COUNT(*) FROM `{self.table}` WHERE {' OR '.join([condition] * len(batch))}"
+        cursor.execute(query, [row.get(c) for row in batch for c in columns])
+        return cursor.fetchone()[0]
+
+    def _write_batch(self, cursor, batch):
+        """
+        Upsert one deduplicated batch inside the flush transaction
+
+        Subclasses can extend this to keep derived tables in step with the
+        batch (see publications.PublicationWriter).
+
+        Returns:
+            tuple: (keys that already existed, affected rows, unchanged rows or None)
+        """
+        existing = self._count_existing(cursor, [self._key(row) for row in batch])
+        unchanged = self._count_unchanged(cursor, batch)
+        cursor.executemany(self.insert_query,
+                           [tuple(row.get(c) for c in self.columns) for row in batch])
+        return existing, cursor.rowcount, unchanged
+
+    def add(self, row):
+        """Buffer a row; flushes automatically when the batch is full"""
+        with self.lock:
+            self.rows.append(row)
+            if len(self.rows) >= self.batch_size:
+                return self.flush()
+        return None
+
+    def flush(self):
+        """
+        Write buffered rows in one transaction
+
+        Returns:
+            dict: inserted / updated / unchanged counts for this batch
+        """
+        with self.lock:
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+            if not self.rows:
+                return counts
+
+            # Last occurrence of a key wins, as it would with row-by-row upserts
+            batch = list({self._key(row): row for row in self.rows}.values())
+
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                with connection(self.db_config) as conn:
+                    cursor = conn.cursor()
+                    try:
+                        existing, affected, unchanged = self._write_batch(cursor, batch)
+                        conn.commit()
+                        break
+                    except mysql.connector.Error as err:
+                        conn.rollback()
+                        if err.errno in RETRYABLE_ERRORS and attempt < MAX_ATTEMPTS:
+                            logger.warning(f"Batch write to {self.table} hit {err.msg}, "
+                                           f"retrying ({attempt}/{MAX_ATTEMPTS})")
+                        else:
+                            logger.error(f"Batch write to {self.table} failed ({len(batch)} rows): {err}")
+                            raise
+                    finally:
+                        cursor.close()
+                time.sleep(random.uniform(0.05, 0.2) * attempt)
+
+            # Only committed rows leave the buffer
+            self.rows = []
+
+            counts['inserted'] = len(batch) - existing
+            if unchanged is None:
+                counts['updated'] = max(0, (affected - counts['inserted']) // 2)
+                counts['unchanged'] = existing - counts['updated']
+            else:
+                counts['unchanged'] = min(existing, unchanged)
+                counts['updated'] = existing - counts['unchanged']
+
+            self.inserted += counts['inserted']
+            self.updated += counts['updated']
+            self.unchanged += counts['unchanged']
+            logger.debug(f"{self.table}: {counts}")
+            return counts
+
+    def totals(self):
+        """Counts accumulated over every flush so far"""
+        return {'inserted': self.inserted, 'updated': self.updated, 'unchanged': self.unchanged}
+
+    def close(self):
+        """Flush whatever is still buffered"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -89,7 +89,95 @@ RATE_LIMIT = {
     'requests_per_minute': 30,
     'delay_between_pages': 2,  # seconds
     'retry_attempts': 3,
-    'timeout': 30  # seconds
+    'timeout': 30,  # seconds
+    'backoff_factor': 1,  # retry waits: 1s, 2s, 4s, ... unless Retry-After says otherwise
+    
+    # Requests that may be sent back-to-back before the limit kicks in
+    'burst': 1,
+    
+    # Requests to one host that may be in flight at the same time
+    # (matters for concurrent detail-page fetchers such as Firm_5)
+    'max_concurrent_per_host': 4,
+    
+    # Per-host overrides (requests per minute). A key starting with '.'
+    # matches the domain and all of its subdomains.
+    'per_host': {
+        '.cyrilamarchandblogs.com': 60,
+        'www.khaitanco.com': 120,
+        'www.lakshmisri.com': 60,
+        'trilegal.com': 20
+    }
+}
+
+# Conditional GET cache for listing pages (see http_cache.py)
+HTTP_CACHE = {
+    'enabled': True,
+    'path': 'http_cache.sqlite3'  # SQLite file, relative to the working directory
+}
+
+# Per-article enrichment cache, e.g. Firm_5 practice areas (see enrichment_cache.py)
+ENRICHMENT_CACHE = {
+    'enabled': True,
+    'path': 'enrichment_cache.sqlite3',  # SQLite file, relative to the working directory
+    'ttl_days': 180  # re-fetch a detail page once its entry is older than this
+}
+
+# Staged fetch -> parse -> write pipeline for the paginated listings of
+# Firm_2 blogs, Firm_6 articles and Firm_7 practices (see pipeline.py)
+PIPELINE = {
+    'fetch_workers': 3,  # threads fetching pages ahead (still rate limited per host)
+    'parse_workers': 2,
+    'window': 6  # most pages in flight; pages past the end of a listing are dropped
+}
+
+# Pagination lookahead for the Firm_1 and Firm_8 listings (see pipeline.Lookahead):
+# the next page is fetched and parsed while the current one is saved
+LOOKAHEAD = {
+    'pages': 1  # pages fetched ahead of the one being saved, 0 to crawl strictly page by page
+}
+
+# Shared index of stored article URLs (see seen_index.py): known articles are
+# skipped before their detail fetch and database write
+SEEN_INDEX = {
+    'enabled': True,
+    'path': 'seen_urls.idx',  # memory-mapped file, relative to the working directory
+    'max_age_minutes': 60  # a scraper run on its own rebuilds an older index
+}
+
+# Network-capture mode for the Selenium listings (see network_capture.py):
+# endpoints recorded during a Selenium run are replayed with plain HTTP later
+NETWORK_CAPTURE = {
+    'enabled': True,
+    'path': 'network_endpoints.json',  # relative to the working directory
+    'max_pages': 50  # safety cap on replayed pages per listing
+}
+
+# MySQL connection pool (see db_pool.py). One pool per database config and
+# per process, so a concurrent run opens at most pool_size connections each.
+DB_POOL = {
+    'pool_size': 5,  # 1-32
+    'acquire_timeout': 30,  # seconds to wait for a free connection
+    'reconnect_attempts': 3  # when a borrowed connection was dropped by the server
+}
+
+# Shared Chrome instances for the Selenium scrapers (see driver_pool.py)
+DRIVER_POOL = {
+    'size': 3,  # browsers kept alive per process
+    'max_pages': 100,  # recycle a browser after this many page loads
+    'max_rss_mb': 1500,  # ... or once its process tree uses more memory (needs psutil)
+    'lease_timeout': 600  # seconds to wait for a free browser
+}
+
+# Local replay server for offline end-to-end benchmarks (see replay_server.py).
+# SCRAPER_BASE_URL / SCRAPER_RECORD_SNAPSHOTS in .env override base_url / record.
+REPLAY = {
+    'base_url': None,  # e.g. 'http://127.0.0.1:8765' to crawl the replay server
+    'snapshot_dir': 'replay_snapshots',  # relative to the working directory
+    'record': False,  # save every fetched / rendered page while crawling live
+    'latency_ms': 0,  # server-side defaults, overridable on its command line
+    'jitter_ms': 0,
+    'error_rate': 0.0,
+    'error_status': 503
 }
 
 # Date range for scraping (can be overridden in individual scrapers)
@@ -98,12 +186,34 @@ DATE_RANGE = {
     'end_date': '2025-12-31'
 }
 
-# Selenium settings
+# HTML parsing (see html_parser.py)
+HTML_PARSER = {
+    'backend': 'lxml',  # 'lxml', 'html.parser', 'html5lib' or 'selectolax'
+    'scoped': True  # only build the listing containers each scraper declares
+}
+
+# Selenium settings (lean rendering profile, see browser_profile.py)
 SELENIUM_CONFIG = {
     'headless': True,  # Run browser in headless mode
     'window_size': '1920,1080',
     'page_load_timeout': 30,  # seconds
-    'implicit_wait': 10  # seconds
+    'implicit_wait': 0,  # seconds; the scrapers use explicit WebDriverWaits
+    'page_load_strategy': 'eager',  # 'eager' returns at DOMContentLoaded, 'normal' waits for every asset
+    'block_images': True,
+    'block_fonts': True,
+    'block_media': True,  # video and audio
+    'blocked_hosts': [  # analytics and ad hosts, matched anywhere in the URL
+        'google-analytics.com',
+        'googletagmanager.com',
+        'doubleclick.net',
+        'googlesyndication.com',
+        'connect.facebook.net',
+        'hotjar.com',
+        'clarity.ms',
+        'snap.licdn.com',
+        'ads.linkedin.com'
+    ],
+    'report_usage': True  # log bytes, DOM-ready time and Chrome RSS per page
 }
 
 # Logging configuration
@@ -129,8 +239,9 @@ CREATE DATABASE IF NOT EXISTS publications_db;
 -- 2. Create a dedicated user for the scraper
 CREATE USER 'scraper_user'@'localhost' IDENTIFIED BY 'strong_password_here';
 
--- 3. Grant necessary privileges
-GRANT SELECT, INSERT, UPDATE, CREATE, ALTER, INDEX ON publications_db.* 
+-- 3. Grant necessary privileges (ALTER + DROP let publications.py rename
+--    Firm_4's pre-migration `publications` table)
+GRANT SELECT, INSERT, UPDATE, CREATE, ALTER, DROP, INDEX ON publications_db.* 
 TO 'scraper_user'@'localhost';
 
 -- 4. Apply changes
@@ -0,0 +1,130 @@
+"""
+Process-wide MySQL connection pools
+
+Every save path, table setup and statistics query borrows its connection
+from here instead of calling mysql.connector.connect() directly, so a run
+opens at most DB_POOL['pool_size'] connections per database config and per
+process, instead of one (or two) per saved row.
+
+Usage:
+    from db_pool import connect, connection
+
+    conn = connect(db_config)       # drop-in for mysql.connector.connect()
+    ...
+    conn.close()                    # returns it to the pool
+
+    with connection(db_config) as conn:
+        ...                         # returned to the pool on exit
+
+Borrowed connections are pinged (and reconnected if the server dropped
+them) before they are handed out. When every connection is in use,
+connect() waits up to DB_POOL['acquire_timeout'] seconds for one to be
+returned, then raises mysql.connector.errors.PoolError.
+
+Pools are per process. A forked child (run_all_scrapers.py's Selenium
+worker) never reuses the pools it inherited, whose sockets the parent is
+still talking on; it opens its own on first use.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import errors, pooling
+
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# mysql.connector refuses larger pools
+MAX_POOL_SIZE = pooling.CNX_POOL_MAXSIZE
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+# Pools inherited across a fork, kept referenced so their connections are
+# never closed (or garbage collected) from the child
+_inherited_pools = []
+
+
+def _reset_after_fork():
+    global _pools_lock
+    # Another thread may have held the lock at the moment of the fork
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _pool_key(db_config):
+    return tuple(sorted((key, str(value)) for key, value in db_config.items()))
+
+
+def get_pool(db_config):
+    """Return this process's pool for a database config, creating it on first use"""
+    global _pools_pid
+    key = _pool_key(db_config)
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _inherited_pools.extend(_pools.values())
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            settings = get_setting('DB_POOL')
+            size = max(1, min(settings['pool_size'], MAX_POOL_SIZE))
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"scrapers_{os.getpid()}_{len(_pools) + 1}",
+                pool_size=size,
+                pool_reset_session=True,
+                **db_config
+            )
+            _pools[key] = pool
+            logger.info(f"Opened MySQL pool {pool.pool_name} ({size} connections) "
+                        f"for {db_config.get('host')}/{db_config.get('database')}")
+        return pool
+
+
+def connect(db_config):
+    """
+    Borrow a healthy connection from the pool for db_config
+
+    The returned connection behaves like a normal one; close() hands it back
+    to the pool instead of closing the socket.
+    """
+    pool = get_pool(db_config)
+    settings = get_setting('DB_POOL')
+    deadline = time.monotonic() + settings['acquire_timeout']
+
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise errors.PoolError(
+                    f"No free connection in pool {pool.pool_name} after {settings['acquire_timeout']}s"
+                )
+            time.sleep(0.05)
+
+    try:
+        conn.ping(reconnect=True, attempts=settings['reconnect_attempts'], delay=1)
+    except mysql.connector.Error:
+        conn.close()
+        raise
+    return conn
+
+
+@contextmanager
+def connection(db_config):
+    """Context manager around connect(); the connection is always returned"""
+    conn = connect(db_config)
+    try:
+        yield conn
+    finally:
+        conn.close()
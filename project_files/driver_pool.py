@@ -0,0 +1,206 @@
+"""
+Process-wide pool of reusable Chrome WebDrivers for the Selenium scrapers
+
+Starting Chrome costs seconds and a few hundred MB, and ELP, Khaitan (twice,
+once per section) and Trilegal used to start their own browser every run.
+Instead, scrapers lease a browser from this pool and hand it back when done:
+
+    from driver_pool import lease_driver, record_page
+
+    with lease_driver() as driver:
+        driver.get(url)
+        record_page(driver)
+        ...
+
+Browsers use the lean profile from browser_profile.py. Up to
+DRIVER_POOL['size'] of them are started on first use and kept alive
+for the rest of the process, so the Selenium firms can run back to back or
+concurrently (see run_all_scrapers.py) without repeated startup cost.
+
+Between leases the browser's cookies, web storage, extra windows and pending
+network log are cleared. A browser is quit and replaced once it has served
+DRIVER_POOL['max_pages'] pages or its process tree uses more than
+DRIVER_POOL['max_rss_mb'] MB (memory checks need the optional psutil package).
+"""
+
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+
+from browser_profile import apply_profile, chrome_rss_mb, lean_options, log_page_metrics
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+def start_driver(headless=None):
+    """Start one Chrome instance with the lean profile (see browser_profile.py)"""
+    return apply_profile(webdriver.Chrome(options=lean_options(headless)))
+
+
+class DriverPool:
+    """A bounded set of browsers handed out one lease at a time"""
+
+    def __init__(self, size=2, max_pages=100, max_rss_mb=1500, lease_timeout=600, headless=None):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.lease_timeout = lease_timeout
+        self.headless = headless
+        self.idle = []
+        self.pages = {}     # id(driver) -> pages served since start
+        self.started = 0    # live browsers, idle or leased
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.lease_timeout
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("Driver pool is shut down")
+                if self.idle:
+                    return self.idle.pop()
+                if self.started < self.size:
+                    self.started += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No browser free after {self.lease_timeout}s")
+                self.condition.wait(remaining)
+
+        # Start outside the lock so other leases aren't blocked on Chrome startup
+        try:
+            driver = start_driver(self.headless)
+        except Exception:
+            with self.condition:
+                self.started -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.pages[id(driver)] = 0
+        logger.info(f"Started pooled browser ({self.started}/{self.size})")
+        return driver
+
+    def _needs_recycle(self, driver):
+        pages = self.pages.get(id(driver), 0)
+        if self.max_pages and pages >= self.max_pages:
+            return f"served {pages} pages"
+        rss = chrome_rss_mb(driver)
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            return f"using {rss:.0f} MB"
+        return None
+
+    def _reset(self, driver):
+        """Clear per-lease state; returns False if the browser is unusable"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.delete_all_cookies()
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            driver.get('about:blank')
+            # Drain the performance log so the next lease only sees its own requests
+            driver.get_log('performance')
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled browser failed to reset ({e}); replacing it")
+            return False
+
+    def _discard(self, driver, reason):
+        logger.info(f"Recycling pooled browser: {reason}")
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self.condition:
+            self.pages.pop(id(driver), None)
+            self.started -= 1
+            self.condition.notify()
+
+    def _release(self, driver):
+        reason = self._needs_recycle(driver)
+        if reason is None and not self._reset(driver):
+            reason = "reset failed"
+        if reason or self.closed:
+            self._discard(driver, reason or "pool shut down")
+            return
+        with self.condition:
+            self.idle.append(driver)
+            self.condition.notify()
+
+    @contextmanager
+    def lease(self):
+        """Borrow a browser for the duration of a with-block"""
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            self._release(driver)
+
+    def record_page(self, driver, count=1):
+        """Count pages loaded by a leased browser towards its recycle limit"""
+        with self.condition:
+            if id(driver) in self.pages:
+                self.pages[id(driver)] += count
+
+    def shutdown(self):
+        """Quit every idle browser; leased ones are quit when returned"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        for driver in idle:
+            self._discard(driver, "pool shut down")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_driver_pool(headless=None):
+    """Return the process-wide pool, creating it on first use"""
+    if headless is None:
+        headless = get_setting('SELENIUM_CONFIG')['headless']
+    with _pools_lock:
+        pool = _pools.get(headless)
+        if pool is None:
+            settings = get_setting('DRIVER_POOL')
+            pool = DriverPool(
+                size=settings['size'],
+                max_pages=settings['max_pages'],
+                max_rss_mb=settings['max_rss_mb'],
+                lease_timeout=settings['lease_timeout'],
+                headless=headless
+            )
+            _pools[headless] = pool
+        return pool
+
+
+def lease_driver(headless=None):
+    """Lease a browser from the process-wide pool (use as a context manager)"""
+    return get_driver_pool(headless).lease()
+
+
+def record_page(driver, count=1):
+    """Count a page load against the browser's recycle limit and log what it cost"""
+    log_page_metrics(driver)
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.record_page(driver, count)
+
+
+def shutdown_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_all)
@@ -0,0 +1,93 @@
+"""
+Persistent cache of per-article enrichment (e.g. Khaitan practice areas)
+
+An article's practice area practically never changes after publication, so
+the value extracted from its detail page is stored in a small SQLite file
+together with the extraction method that matched and when it was fetched.
+Later runs only fetch detail pages for URLs they have never seen, or whose
+entry is older than ENRICHMENT_CACHE['ttl_days'].
+
+Usage:
+    from enrichment_cache import get_enrichment_cache
+
+    cache = get_enrichment_cache()
+    cached = cache.get(url) if cache else None
+    if cached:
+        practice_area, method = cached
+    else:
+        ...  # fetch and parse the detail page
+        cache.put(url, practice_area, method)
+"""
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentCache:
+    """SQLite-backed practice area store, keyed by article URL"""
+
+    def __init__(self, path, ttl_days):
+        self.path = path
+        self.ttl = timedelta(days=ttl_days)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_enrichment (
+                url TEXT PRIMARY KEY,
+                practice_area TEXT NOT NULL,
+                extraction_method TEXT,
+                fetched_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url):
+        """Return (practice_area, extraction_method) if fresh, else None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT practice_area, extraction_method, fetched_at FROM article_enrichment WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if not row:
+            return None
+        practice_area, method, fetched_at = row
+        if datetime.now() - datetime.fromisoformat(fetched_at) > self.ttl:
+            return None
+        return practice_area, method
+
+    def put(self, url, practice_area, method):
+        """Store the practice area a detail page yielded"""
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO article_enrichment
+                (url, practice_area, extraction_method, fetched_at)
+                VALUES (?, ?, ?, ?)
+            """, (url, practice_area, method, datetime.now().isoformat(timespec='seconds')))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_enrichment_cache():
+    """Return the process-wide cache, or None when ENRICHMENT_CACHE is disabled"""
+    global _cache
+    settings = get_setting('ENRICHMENT_CACHE')
+    if not settings.get('enabled'):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EnrichmentCache(settings['path'], settings['ttl_days'])
+            logger.info(f"Using enrichment cache at {settings['path']}")
+        return _cache
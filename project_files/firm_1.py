@@ -1,12 +1,23 @@
 import requests
-from bs4 import BeautifulSoup
 import mysql.connector
 from datetime import datetime
-import time
 import logging
 import os
 from dotenv import load_dotenv 
 
+from db_pool import connect
+from html_parser import listing_scope, make_soup
+from http_client import fetch
+from pipeline import Lookahead
+from publications import ensure_publications_table, publication_writer, rollup_counts
+from watermarks import load_watermark, save_watermark
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_1'
+
+# Containers read from each listing page (see html_parser.py)
+LISTING_SCOPE = listing_scope('div.resource-blk')
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -16,7 +27,7 @@ logger = logging.getLogger(__name__)
 
 
 class AZBResourceScraper:
-    def __init__(self, db_config):
+    def __init__(self, db_config, incremental=False):
         """
         Initialize the scraper with database configuration
         
@@ -28,44 +39,32 @@ class AZBResourceScraper:
                     'password': os.getenv('DB_PASSWORD'),
                     'database': os.getenv('DB_NAME')
                 }
+            incremental (bool): Stop at the first page with only already-seen publications
         """
         self.base_url = "https://www.azbpartners.com/resource/"
         self.db_config = db_config
         self.connection = None
         self.cursor = None
         self.company_name = "AZB Partners"
+        self.incremental = incremental
+        self.pages_scraped = 0
+        self.total_saved = 0
         
     def connect_db(self):
         """Establish database connection"""
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
+            self.connection = connect(self.db_config)
             self.cursor = self.connection.cursor()
-            logger.info("Database connection established")
+            logger.debug("Database connection borrowed from pool")
         except mysql.connector.Error as err:
             logger.error(f"Database connection error: {err}")
             raise
     
     def create_table(self):
-        """Create azb_partners_publications table if it doesn't exist"""
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS azb_partners_publications (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            company_name VARCHAR(255) NOT NULL,
-            publication_type VARCHAR(255) NOT NULL,
-            publication_date DATE NOT NULL,
-            practice_area VARCHAR(255),
-            article_heading VARCHAR(1000) NOT NULL,
-            article_link VARCHAR(500) UNIQUE NOT NULL,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            INDEX idx_date (publication_date),
-            INDEX idx_type (publication_type),
-            INDEX idx_practice (practice_area)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-        """
+        """Create the shared publications table if it doesn't exist"""
         try:
-            self.cursor.execute(create_table_query)
-            self.connection.commit()
-            logger.info("Table 'azb_partners_publications' ready")
+            ensure_publications_table(self.db_config)
+            logger.info("Table 'publications' ready")
         except mysql.connector.Error as err:
             logger.error(f"Error creating table: {err}")
             raise
@@ -89,6 +88,92 @@ class AZBResourceScraper:
             logger.warning(f"Error parsing date '{date_str}': {e}")
             return None
     
+    def parse_listing(self, content, page_num=1):
+        """
+        Extract publications from one listing page's HTML
+        
+        Args:
+            content (bytes | str): Listing page markup
+            page_num (int): Page number, for logging
+            
+        Returns:
+            list: List of publication dictionaries
+        """
+        soup = make_soup(content, LISTING_SCOPE)
+        publications = []
+        
+        # Find all resource blocks
+        resource_blocks = soup.find_all('div', class_='resource-blk')
+        
+        logger.info(f"Found {len(resource_blocks)} resource blocks on page {page_num}")
+        
+        for block in resource_blocks:
+            try:
+                # Extract publication type
+                label_span = block.find('span', class_='label-span')
+                if not label_span:
+                    continue
+                
+                publication_type = label_span.get_text(strip=True)
+                
+                # Skip if it's a deal
+                if publication_type.lower() == 'deals':
+                    logger.info(f"Skipping deal: {publication_type}")
+                    continue
+                
+                # Extract article heading and link
+                h3_tag = block.find('h3')
+                if not h3_tag:
+                    continue
+                
+                article_heading = h3_tag.get_text(strip=True)
+                
+                # Get the link from the parent anchor tag
+                link_tag = block.find('a', href=True)
+                if not link_tag:
+                    continue
+                
+                article_link = link_tag['href']
+                if not article_link.startswith('http'):
+                    article_link = f"https://www.azbpartners.com{article_link}"
+                
+                # Extract date and practice area from resource-tags
+                resource_tags = block.find('div', class_='resource-tags')
+                publication_date = None
+                practice_area = None
+                
+                if resource_tags:
+                    # Get the date (first span)
+                    date_span = resource_tags.find('span')
+                    if date_span:
+                        date_str = date_span.get_text(strip=True)
+                        publication_date = self.parse_date(date_str)
+                    
+                    # Get practice area (anchor tag)
+                    practice_link = resource_tags.find('a')
+                    if practice_link:
+                        practice_area = practice_link.get_text(strip=True)
+                
+                # Create publication dictionary
+                publication = {
+                    'company_name': self.company_name,
+                    'publication_type': publication_type,
+                    'publication_date': publication_date,
+                    'practice_area': practice_area,
+                    'article_heading': article_heading,
+                    'article_link': article_link
+                }
+                
+                publications.append(publication)
+                logger.debug(f"Extracted: {article_heading}")
+                
+            except Exception as e:
+                logger.error(f"Error parsing resource block: {e}")
+                continue
+        
+        logger.info(f"Successfully extracted {len(publications)} publications from page {page_num}")
+        return publications
+    
     def scrape_page(self, page_num=1):
         """
         Scrape a single page
@@ -97,7 +182,8 @@ class AZBResourceScraper:
             page_num (int): Page number to scrape
             
         Returns:
-            list: List of publication dictionaries
+            list: List of publication dictionaries (empty past the last page),
+                or None if the page couldn't be fetched
         """
         if page_num == 1:
             url = self.base_url
@@ -110,126 +196,35 @@ class AZBResourceScraper:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=30)
+            response = fetch(url, headers=headers, timeout=30)
+            if response.status_code == 404:
+                # Past the last page of the listing
+                return []
             response.raise_for_status()
+            self.pages_scraped += 1
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            publications = []
-            
-            # Find all resource blocks
-            resource_blocks = soup.find_all('div', class_='resource-blk')
-            
-            logger.info(f"Found {len(resource_blocks)} resource blocks on page {page_num}")
-            
-            for block in resource_blocks:
-                try:
-                    # Extract publication type
-                    label_span = block.find('span', class_='label-span')
-                    if not label_span:
-                        continue
-                    
-                    publication_type = label_span.get_text(strip=True)
-                    
-                    # Skip if it's a deal
-                    if publication_type.lower() == 'deals':
-                        logger.info(f"Skipping deal: {publication_type}")
-                        continue
-                    
-                    # Extract article heading and link
-                    h3_tag = block.find('h3')
-                    if not h3_tag:
-                        continue
-                    
-                    article_heading = h3_tag.get_text(strip=True)
-                    
-                    # Get the link from the parent anchor tag
-                    link_tag = block.find('a', href=True)
-                    if not link_tag:
-                        continue
-                    
-                    article_link = link_tag['href']
-                    if not article_link.startswith('http'):
-                        article_link = f"https://www.azbpartners.com{article_link}"
-                    
-                    # Extract date and practice area from resource-tags
-                    resource_tags = block.find('div', class_='resource-tags')
-                    publication_date = None
-                    practice_area = None
-                    
-                    if resource_tags:
-                        # Get the date (first span)
-                        date_span = resource_tags.find('span')
-                        if date_span:
-                            date_str = date_span.get_text(strip=True)
-                            publication_date = self.parse_date(date_str)
-                        
-                        # Get practice area (anchor tag)
-                        practice_link = resource_tags.find('a')
-                        if practice_link:
-                            practice_area = practice_link.get_text(strip=True)
-                    
-                    # Create publication dictionary
-                    publication = {
-                        'company_name': self.company_name,
-                        'publication_type': publication_type,
-                        'publication_date': publication_date,
-                        'practice_area': practice_area,
-                        'article_heading': article_heading,
-                        'article_link': article_link
-                    }
-                    
-                    publications.append(publication)
-                    logger.debug(f"Extracted: {article_heading}")
-                    
-                except Exception as e:
-                    logger.error(f"Error parsing resource block: {e}")
-                    continue
-            
-            logger.info(f"Successfully extracted {len(publications)} publications from page {page_num}")
-            return publications
+            return self.parse_listing(response.content, page_num)
             
         except requests.RequestException as e:
             logger.error(f"Error fetching page {page_num}: {e}")
-            return []
+            return None
     
-    def save_publication(self, publication):
-        """
-        Save a single publication to database
-        
-        Args:
-            publication (dict): Publication data
-            
-        Returns:
-            bool: True if saved successfully, False otherwise
-        """
-        insert_query = """
-        INSERT INTO azb_partners_publications 
-        (company_name, publication_type, publication_date, practice_area, article_heading, article_link)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            company_name = VALUES(company_name),
-            publication_type = VALUES(publication_type),
-            publication_date = VALUES(publication_date),
-            practice_area = VALUES(practice_area),
-            article_heading = VALUES(article_heading),
-            scraped_at = CURRENT_TIMESTAMP
-        """
-        
-        try:
-            self.cursor.execute(insert_query, (
-                publication['company_name'],
-                publication['publication_type'],
-                publication['publication_date'],
-                publication['practice_area'],
-                publication['article_heading'],
-                publication['article_link']
-            ))
-            self.connection.commit()
-            logger.debug(f"Saved: {publication['article_heading']}")
-            return True
-        except mysql.connector.Error as err:
-            logger.error(f"Error saving publication '{publication['article_heading']}': {err}")
-            return False
+    def listing_pages(self, max_pages=None):
+        """Yield (page_num, publications) for each listing page in order"""
+        page_num = 1
+        while not max_pages or page_num <= max_pages:
+            yield page_num, self.scrape_page(page_num)
+            page_num += 1
+        logger.info(f"Reached maximum page limit: {max_pages}")
+    
+    def make_writer(self):
+        """Batched upsert writer for this firm's rows in the publications table"""
+        return publication_writer(
+            self.db_config, FIRM,
+            update_columns=['company_name', 'publication_type', 'publication_date',
+                            'practice_area', 'article_heading'],
+            extra_updates={'scraped_at': 'CURRENT_TIMESTAMP'}
+        )
     
     def scrape_all(self, max_pages=None):
         """
@@ -240,71 +235,92 @@ class AZBResourceScraper:
         """
         self.connect_db()
         self.create_table()
+        # Pages are written through the batched writer, don't hold a pool slot meanwhile
+        self.close_db()
         
-        page_num = 1
         total_saved = 0
         consecutive_empty = 0
+        watermark = load_watermark(self.db_config, self.base_url) if self.incremental else None
+        writer = self.make_writer()
+        crawl_ok = True
         
-        while True:
-            if max_pages and page_num > max_pages:
-                logger.info(f"Reached maximum page limit: {max_pages}")
-                break
-            
-            publications = self.scrape_page(page_num)
-            
-            if not publications:
-                consecutive_empty += 1
-                logger.info(f"No publications found on page {page_num}")
-                if consecutive_empty >= 2:
-                    logger.info("No more publications found on consecutive pages. Stopping.")
-                    break
-            else:
+        # The next page is fetched and parsed while this one is saved
+        with Lookahead(self.listing_pages(max_pages)) as pages:
+            for page_num, publications in pages:
+                if publications is None:
+                    # Not the end of the listing; keep the watermark where it was
+                    crawl_ok = False
+                
+                if not publications:
+                    consecutive_empty += 1
+                    logger.info(f"No publications found on page {page_num}")
+                    if consecutive_empty >= 2:
+                        logger.info("No more publications found on consecutive pages. Stopping.")
+                        break
+                    continue
+                
                 consecutive_empty = 0
+                links = [pub['article_link'] for pub in publications]
+                dates = [pub['publication_date'] for pub in publications]
+                page_known = False
+                if watermark:
+                    page_known = watermark.page_is_known(links, dates)
+                    watermark.observe_page(page_num, links, dates)
+                
                 for pub in publications:
-                    if self.save_publication(pub):
-                        total_saved += 1
-            
-            page_num += 1
-            time.sleep(2)  # Be polite, wait 2 seconds between requests
+                    if watermark and watermark.is_known(pub['article_link'], pub['publication_date']):
+                        continue
+                    writer.add(pub)
+                
+                # One transaction per page
+                try:
+                    counts = writer.flush()
+                    total_saved += counts['inserted'] + counts['updated']
+                    logger.info(f"Page {page_num}: {counts['inserted']} new, {counts['updated']} updated, "
+                                f"{counts['unchanged']} unchanged")
+                except mysql.connector.Error as err:
+                    logger.error(f"Error saving page {page_num}: {err}")
+                    crawl_ok = False
+                
+                if page_known:
+                    logger.info(f"Page {page_num} only has already-seen publications. Stopping.")
+                    break
+        
+        writer.close()
+        if watermark and crawl_ok:
+            save_watermark(self.db_config, watermark)
         
+        self.total_saved = total_saved
         logger.info(f"Scraping complete. Total publications saved: {total_saved}")
-        self.close_db()
     
     def get_statistics(self):
-        """Get statistics about scraped publications"""
+        """Get statistics about scraped publications (counts come from the publication_stats rollup)"""
         self.connect_db()
         
-        queries = {
-            'total': "SELECT COUNT(*) FROM azb_partners_publications",
-            'by_type': "SELECT publication_type, COUNT(*) as count FROM azb_partners_publications GROUP BY publication_type",
-            'by_practice': "SELECT practice_area, COUNT(*) as count FROM azb_partners_publications GROUP BY practice_area ORDER BY count DESC LIMIT 10",
-            'recent': "SELECT article_heading, publication_date FROM azb_partners_publications ORDER BY publication_date DESC LIMIT 5"
-        }
-        
         print("\n" + "="*80)
         print("SCRAPING STATISTICS")
         print("="*80)
         
         # Total count
-        self.cursor.execute(queries['total'])
-        total = self.cursor.fetchone()[0]
+        total = rollup_counts(self.db_config, firm=FIRM)
         print(f"\nTotal Publications: {total}")
         
         # By type
         print("\nPublications by Type:")
-        self.cursor.execute(queries['by_type'])
-        for row in self.cursor.fetchall():
-            print(f"  - {row[0]}: {row[1]}")
+        for publication_type, count in rollup_counts(self.db_config, 'publication_type', firm=FIRM):
+            print(f"  - {publication_type}: {count}")
         
         # By practice area
         print("\nTop 10 Practice Areas:")
-        self.cursor.execute(queries['by_practice'])
-        for row in self.cursor.fetchall():
-            print(f"  - {row[0]}: {row[1]}")
+        for practice_area, count in rollup_counts(self.db_config, 'practice_area', firm=FIRM, limit=10):
+            print(f"  - {practice_area}: {count}")
         
-        # Recent publications
+        # Recent publications (a short range scan on idx_firm_date)
         print("\nMost Recent Publications:")
-        self.cursor.execute(queries['recent'])
+        self.cursor.execute(
+            "SELECT article_heading, publication_date FROM publications "
+            "WHERE firm = %s ORDER BY publication_date DESC LIMIT 5", (FIRM,)
+        )
         for row in self.cursor.fetchall():
             print(f"  - {row[1]}: {row[0]}")
         
@@ -318,7 +334,9 @@ class AZBResourceScraper:
             self.cursor.close()
         if self.connection:
             self.connection.close()
-        logger.info("Database connection closed")
+        self.cursor = None
+        self.connection = None
+        logger.debug("Database connection returned to pool")
 
 load_dotenv()
 
@@ -1,20 +1,33 @@
-import requests
-from bs4 import BeautifulSoup
-import mysql.connector
 from datetime import datetime
-import time
 from urllib.parse import urljoin
 import re
 import os
 from dotenv import load_dotenv
 
+from db_pool import connect
+from html_parser import listing_scope, make_soup
+from http_client import fetch
+from pipeline import PageError, run_pipeline
+from publications import ensure_publications_table, publication_writer
+from watermarks import load_watermark, save_watermark
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_2'
+
+# Containers read from the publication, newsletter and podcast pages
+BLOCK_SCOPE = listing_scope('div.block-content')
+
+# Post headers read from each blog listing page
+BLOG_SCOPE = listing_scope('header.lxb_af-post_header')
+
 class CAMScraper:
-    def __init__(self, db_config, start_date="2024-01-01", end_date="2025-12-31"):
+    def __init__(self, db_config, start_date="2024-01-01", end_date="2025-12-31", incremental=False):
         """
         Initialize the scraper with database configuration
         db_config: dict with keys: host, user, password, database
         start_date: Start date for filtering (YYYY-MM-DD format)
         end_date: End date for filtering (YYYY-MM-DD format)
+        incremental: Stop each blog at the first page with only already-seen posts
         """
         self.db_config = db_config
         self.company_name = "CAM"
@@ -23,60 +36,38 @@ class CAMScraper:
         }
         self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
         self.end_date = datetime.strptime(end_date, "%Y-%m-%d")
+        self.incremental = incremental
         self.articles_scraped = 0
         self.articles_filtered = 0
+        self.pages_scraped = 0
+        self._writer = None
+    
+    @property
+    def writer(self):
+        """Batched writer for this firm's rows, created on the first save so constructing the scraper touches no database"""
+        if self._writer is None:
+            # Existing rows are kept as they are, like the old INSERT IGNORE
+            self._writer = publication_writer(self.db_config, FIRM, update_columns=[])
+        return self._writer
         
     def connect_db(self):
-        """Connect to MySQL database"""
-        return mysql.connector.connect(**self.db_config)
+        """Borrow a pooled MySQL connection (close() returns it)"""
+        return connect(self.db_config)
     
     def create_table(self):
-        """Create the publications table if it doesn't exist"""
-        conn = self.connect_db()
-        cursor = conn.cursor()
-        
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS `cam_publications` (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            company_name VARCHAR(255),
-            publication_type VARCHAR(255),
-            publication_date DATE,
-            practice_area VARCHAR(255),
-            article_name TEXT,
-            article_link TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE KEY unique_article (article_link(500))
-        )
-        """
-        cursor.execute(create_table_query)
-        conn.commit()
-        cursor.close()
-        conn.close()
+        """Create the shared publications table if it doesn't exist"""
+        ensure_publications_table(self.db_config)
         print("Table created successfully")
     
     def insert_data(self, data):
-        """Insert data into database"""
-        conn = self.connect_db()
-        cursor = conn.cursor()
-        
-        insert_query = """
-        INSERT IGNORE INTO cam_publications 
-        (company_name, publication_type, publication_date, practice_area, article_name, article_link)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(insert_query, (
-            data['company_name'],
-            data['publication_type'],
-            data['publication_date'],
-            data['practice_area'],
-            data['article_name'],
-            data['article_link']
-        ))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        """Buffer a row for the next batched insert (see flush_data)"""
+        self.writer.add(data)
+    
+    def flush_data(self, label):
+        """Write buffered rows in one transaction and report the counts"""
+        counts = self.writer.flush()
+        print(f"{label}: {counts['inserted']} new, {counts['unchanged']} already in database")
+        return counts
     
     def is_date_in_range(self, date_obj):
         """Check if a date is within the specified range"""
@@ -107,8 +98,9 @@ class CAMScraper:
         print(f"\nScraping Publications from: {url}")
         
         try:
-            response = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            response = fetch(url, headers=self.headers)
+            self.pages_scraped += 1
+            soup = make_soup(response.content, BLOCK_SCOPE)
             
             blocks = soup.find_all('div', class_='block-content')
             
@@ -150,10 +142,12 @@ class CAMScraper:
                         }
                         self.insert_data(data)
                         self.articles_scraped += 1
-                        print(f"Inserted: {article_name} ({publication_date})")
+                        print(f"Found: {article_name} ({publication_date})")
                 except Exception as e:
                     print(f"Error processing publication: {e}")
                     continue
+            
+            self.flush_data("Saved publications")
                     
         except Exception as e:
             print(f"Error scraping publications: {e}")
@@ -164,8 +158,9 @@ class CAMScraper:
         print(f"\nScraping Newsletters from: {url}")
         
         try:
-            response = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            response = fetch(url, headers=self.headers)
+            self.pages_scraped += 1
+            soup = make_soup(response.content, BLOCK_SCOPE)
             
             blocks = soup.find_all('div', class_='block-content')
             
@@ -208,10 +203,12 @@ class CAMScraper:
                         }
                         self.insert_data(data)
                         self.articles_scraped += 1
-                        print(f"Inserted: {article_name} ({publication_date})")
+                        print(f"Found: {article_name} ({publication_date})")
                 except Exception as e:
                     print(f"Error processing newsletter: {e}")
                     continue
+            
+            self.flush_data("Saved newsletters")
                     
         except Exception as e:
             print(f"Error scraping newsletters: {e}")
@@ -222,8 +219,9 @@ class CAMScraper:
         print(f"\nScraping Podcasts from: {url}")
         
         try:
-            response = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            response = fetch(url, headers=self.headers)
+            self.pages_scraped += 1
+            soup = make_soup(response.content, BLOCK_SCOPE)
             
             blocks = soup.find_all('div', class_='block-content')
             
@@ -265,112 +263,174 @@ class CAMScraper:
                         }
                         self.insert_data(data)
                         self.articles_scraped += 1
-                        print(f"Inserted: {article_name} ({publication_date})")
+                        print(f"Found: {article_name} ({publication_date})")
                 except Exception as e:
                     print(f"Error processing podcast: {e}")
                     continue
+            
+            self.flush_data("Saved podcasts")
                     
         except Exception as e:
             print(f"Error scraping podcasts: {e}")
     
-    def scrape_blog_page(self, url, practice_area, max_pages=50):
-        """Scrape a blog category with pagination"""
-        print(f"\nScraping Blog: {practice_area} from: {url}")
+    def parse_blog_headers(self, content, practice_area):
+        """
+        Extract the posts of one blog listing page, in page order
         
-        page = 1
-        continue_scraping = True
+        Returns:
+            list: dicts with article_name, article_link, publication_date,
+            date_obj and practice_area (falls back to the category's name)
+        """
+        soup = make_soup(content, BLOG_SCOPE)
+        posts = []
         
-        while page <= max_pages and continue_scraping:
+        # Find all post headers
+        for header in soup.find_all('header', class_='lxb_af-post_header'):
             try:
-                if page == 1:
-                    page_url = url
-                else:
-                    page_url = f"{url.rstrip('/')}/page/{page}/"
+                # Get article name and link
+                h1 = header.find('h1', class_='lxb_af-template_tags-get_linked_post_title')
+                if not h1:
+                    continue
                 
-                print(f"  Scraping page {page}: {page_url}")
-                response = requests.get(page_url, headers=self.headers)
+                link_tag = h1.find('a')
+                if not link_tag:
+                    continue
                 
-                # Check if page exists
-                if response.status_code == 404:
-                    print(f"  Page {page} not found, stopping pagination")
-                    break
+                # Get date
+                time_tag = header.find('time', class_='lxb_af-template_tags-get_post_date')
+                date_text = time_tag.get_text(strip=True) if time_tag else None
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
+                # Parse date (format: "April 7, 2020")
+                publication_date, date_obj = None, None
+                if date_text:
+                    try:
+                        date_obj = datetime.strptime(date_text, "%B %d, %Y")
+                        publication_date = date_obj.strftime("%Y-%m-%d")
+                    except:
+                        pass
                 
-                # Find all post headers
-                headers = soup.find_all('header', class_='lxb_af-post_header')
+                # Get practice area from categories
+                cat_div = header.find('div', class_='lxb_af-template_tags-get_post_categories')
+                extracted_practice_area = practice_area  # Default to passed parameter
+                if cat_div:
+                    cat_link = cat_div.find('a')
+                    if cat_link:
+                        extracted_practice_area = cat_link.get_text(strip=True)
                 
-                if not headers:
-                    print(f"  No posts found on page {page}, stopping pagination")
-                    break
+                posts.append({
+                    'article_name': link_tag.get_text(strip=True),
+                    'article_link': link_tag['href'],
+                    'publication_date': publication_date,
+                    'date_obj': date_obj,
+                    'practice_area': extracted_practice_area
+                })
+            except Exception as e:
+                print(f"  Error processing blog post: {e}")
+                continue
+        
+        return posts
+    
+    def scrape_blog_page(self, url, practice_area, max_pages=50):
+        """
+        Scrape a blog category with pagination
+        
+        Later pages are fetched and parsed while the current one is saved (see
+        pipeline.py); pagination still stops in page order.
+        """
+        print(f"\nScraping Blog: {practice_area} from: {url}")
+        
+        crawl_ok = True
+        watermark = load_watermark(self.db_config, url) if self.incremental else None
+        state = {'page': 1}
+        
+        def pages():
+            for page in range(1, max_pages + 1):
+                if page == 1:
+                    yield page, url
+                else:
+                    yield page, f"{url.rstrip('/')}/page/{page}/"
+        
+        def fetch_page(item):
+            page, page_url = item
+            print(f"  Scraping page {page}: {page_url}")
+            return fetch(page_url, headers=self.headers)
+        
+        def parse_page(item, response):
+            if response.status_code == 404:
+                return response, []
+            return response, self.parse_blog_headers(response.content, practice_area)
+        
+        def save_parsed_page(item, parsed):
+            """Save one page's posts in order; True stops pagination"""
+            page, page_url = item
+            response, posts = parsed
+            state['page'] = page
+            self.pages_scraped += 1
+            
+            # Check if page exists
+            if response.status_code == 404:
+                print(f"  Page {page} not found, stopping pagination")
+                return True
+            
+            if not posts:
+                print(f"  No posts found on page {page}, stopping pagination")
+                return True
+            
+            continue_scraping = True
+            page_links = []
+            page_dates = []
+            
+            for post in posts:
+                date_obj = post['date_obj']
+                page_links.append(post['article_link'])
+                page_dates.append(date_obj)
                 
-                for header in headers:
-                    try:
-                        # Get article name and link
-                        h1 = header.find('h1', class_='lxb_af-template_tags-get_linked_post_title')
-                        if not h1:
-                            continue
-                        
-                        link_tag = h1.find('a')
-                        if not link_tag:
-                            continue
-                        
-                        article_name = link_tag.get_text(strip=True)
-                        article_link = link_tag['href']
-                        
-                        # Get date
-                        time_tag = header.find('time', class_='lxb_af-template_tags-get_post_date')
-                        date_text = time_tag.get_text(strip=True) if time_tag else None
-                        
-                        # Parse date (format: "April 7, 2020")
-                        publication_date, date_obj = None, None
-                        if date_text:
-                            try:
-                                date_obj = datetime.strptime(date_text, "%B %d, %Y")
-                                publication_date = date_obj.strftime("%Y-%m-%d")
-                            except:
-                                pass
-                        
-                        # Check if date is in range - if date is before range, stop pagination
-                        if date_obj:
-                            if date_obj < self.start_date:
-                                print(f"  Reached articles before {self.start_date.strftime('%Y-%m-%d')}, stopping pagination")
-                                continue_scraping = False
-                                break
-                            elif not self.is_date_in_range(date_obj):
-                                self.articles_filtered += 1
-                                continue
-                        
-                        # Get practice area from categories
-                        cat_div = header.find('div', class_='lxb_af-template_tags-get_post_categories')
-                        extracted_practice_area = practice_area  # Default to passed parameter
-                        if cat_div:
-                            cat_link = cat_div.find('a')
-                            if cat_link:
-                                extracted_practice_area = cat_link.get_text(strip=True)
-                        
-                        if article_name and article_link:
-                            data = {
-                                'company_name': self.company_name,
-                                'publication_type': 'Blogs',
-                                'publication_date': publication_date,
-                                'practice_area': extracted_practice_area,
-                                'article_name': article_name,
-                                'article_link': article_link
-                            }
-                            self.insert_data(data)
-                            self.articles_scraped += 1
-                            print(f"  Inserted: {article_name} ({publication_date})")
-                    except Exception as e:
-                        print(f"  Error processing blog post: {e}")
+                # Check if date is in range - if date is before range, stop pagination
+                if date_obj:
+                    if date_obj < self.start_date:
+                        print(f"  Reached articles before {self.start_date.strftime('%Y-%m-%d')}, stopping pagination")
+                        continue_scraping = False
+                        break
+                    elif not self.is_date_in_range(date_obj):
+                        self.articles_filtered += 1
                         continue
                 
-                page += 1
-                time.sleep(1)  # Be polite to the server
+                if watermark and watermark.is_known(post['article_link'], date_obj):
+                    continue
                 
-            except Exception as e:
-                print(f"  Error scraping blog page {page}: {e}")
-                break
+                if post['article_name'] and post['article_link']:
+                    data = {
+                        'company_name': self.company_name,
+                        'publication_type': 'Blogs',
+                        'publication_date': post['publication_date'],
+                        'practice_area': post['practice_area'],
+                        'article_name': post['article_name'],
+                        'article_link': post['article_link']
+                    }
+                    self.insert_data(data)
+                    self.articles_scraped += 1
+                    print(f"  Found: {post['article_name']} ({post['publication_date']})")
+            
+            self.flush_data(f"  Page {page}")
+            
+            if watermark:
+                page_known = watermark.page_is_known(page_links, page_dates)
+                watermark.observe_page(page, page_links, page_dates)
+                if page_known:
+                    print(f"  Page {page} only has already-seen posts, stopping pagination")
+                    return True
+            
+            return not continue_scraping
+        
+        try:
+            run_pipeline(pages(), fetch_page, parse_page, save_parsed_page)
+        except Exception as e:
+            page = e.item[0] if isinstance(e, PageError) else state['page']
+            print(f"  Error scraping blog page {page}: {e}")
+            crawl_ok = False
+        
+        if watermark and crawl_ok:
+            save_watermark(self.db_config, watermark)
     
     def scrape_all_blogs(self):
         """Scrape all blog categories"""
@@ -399,7 +459,6 @@ class CAMScraper:
         
         for category in blog_categories:
             self.scrape_blog_page(category['url'], category['practice_area'])
-            time.sleep(2)  # Be polite between categories
     
     def run_full_scrape(self):
         """Run complete scraping process"""
@@ -410,21 +469,19 @@ class CAMScraper:
         # Reset counters
         self.articles_scraped = 0
         self.articles_filtered = 0
+        self.pages_scraped = 0
         
         # Create table
         self.create_table()
         
         # Scrape all sections
         self.scrape_publications()
-        time.sleep(2)
-        
         self.scrape_newsletters()
-        time.sleep(2)
-        
         self.scrape_podcasts()
-        time.sleep(2)
         
         self.scrape_all_blogs()
+        if self._writer:
+            self._writer.close()
         
         print("\n" + "=" * 50)
         print("Scraping completed!")
@@ -1,16 +1,34 @@
-import time
 import mysql.connector
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from datetime import datetime
-from bs4 import BeautifulSoup
 import re
 import os
 from dotenv import load_dotenv
 
+from driver_pool import lease_driver, record_page
+from html_parser import listing_scope, make_soup
+from network_capture import ReplayError, ReplayIncomplete, forget_endpoint, load_endpoint, remember_endpoint, replay_pages
+from publications import ensure_publications_table, publication_writer
+from rate_limiter import wait_for_token
+from replay_server import save_snapshot, site_url
+from scrolling import count_selector, last_match_text, scroll_until_stable
+from url_key import url_key
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_3'
+
+# Article cards read from the listing (see html_parser.py)
+LISTING_SCOPE = listing_scope('figcaption')
+
+# Listing date of an article card, e.g. "4th Nov 2025"
+DATE_SELECTOR = 'figcaption p:first-of-type span:nth-of-type(2)'
+
+# Key of the recorded listing endpoint in network_endpoints.json
+ENDPOINT_NAME = 'elp_thought_leadership'
+
 class ELPScraper:
     def __init__(self, db_config):
     
@@ -18,43 +36,16 @@ class ELPScraper:
         self.company_name = "ELP"
         self.url = "https://elplaw.in/thought-leadership/"
         self.driver = None
-        self.connection = None
-        self.cursor = None
-        
-    def setup_driver(self):
-        """Setup Chrome driver with options"""
-        options = webdriver.ChromeOptions()
-        options.add_argument('--start-maximized')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        self.pages_scraped = 0
+        self.articles_saved = 0
         
     def connect_database(self):
-        """Connect to MySQL database and create table if not exists"""
+        """Create the shared publications table if not exists"""
+        # Rows are saved through the publication writer, which borrows its own
+        # pooled connection; nothing is held open during the Selenium scroll
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
-            self.cursor = self.connection.cursor()
-            
-            # Create table if not exists
-            create_table_query = """
-            CREATE TABLE IF NOT EXISTS elp_publications (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                company_name VARCHAR(255),
-                publication_type VARCHAR(255),
-                publication_date DATE,
-                practice_area TEXT,
-                article_name TEXT,
-                article_link TEXT,
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE KEY unique_article (article_link(500))
-            )
-            """
-            self.cursor.execute(create_table_query)
-            self.connection.commit()
-            print("✓ Database connected and table ready")
+            ensure_publications_table(self.db_config)
+            print("✓ Publications table ready")
             
         except mysql.connector.Error as err:
             print(f"✗ Database error: {err}")
@@ -83,27 +74,42 @@ class ELPScraper:
         except:
             return False
             
-    def scroll_and_load(self, num_scrolls=50, delay=10):
-        """Scroll the page to load more articles"""
-        print(f"\n📜 Starting scroll sequence ({num_scrolls} scrolls with {delay}s delay)...")
+    def is_before_cutoff(self, date_text):
+        """True if a listing date string is older than Jan 2024"""
+        pub_date = self.parse_date(date_text) if date_text else None
+        return bool(pub_date) and pub_date < '2024-01-01'
         
-        for i in range(num_scrolls):
-            # Scroll to bottom
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            print(f"Scroll {i+1}/{num_scrolls} completed", end='\r')
-            
-            # Wait for content to load
-            time.sleep(delay)
-            
-        print(f"\n✓ Scrolling completed - loaded dynamic content")
+    def oldest_loaded_before_cutoff(self, driver):
+        """True once the last loaded article is older than Jan 2024"""
+        return self.is_before_cutoff(driver.execute_script(last_match_text(DATE_SELECTOR)))
         
-    def extract_articles(self):
-        """Extract all articles from the page"""
+    def markup_reached_cutoff(self, markup):
+        """True if the last article in a replayed listing page is older than Jan 2024"""
+        dates = make_soup(markup, LISTING_SCOPE).select(DATE_SELECTOR)
+        return bool(dates) and self.is_before_cutoff(dates[-1].get_text(strip=True))
+        
+    def scroll_and_load(self, max_scrolls=50, idle_timeout=6):
+        """Scroll the page until no more articles load or the date cutoff is reached"""
+        print(f"\n📜 Scrolling until content stops growing (idle timeout {idle_timeout}s)...")
+        
+        result = scroll_until_stable(
+            self.driver,
+            count_script=count_selector('figcaption'),
+            should_stop=self.oldest_loaded_before_cutoff,
+            idle_timeout=idle_timeout,
+            max_scrolls=max_scrolls
+        )
+        
+        print(f"✓ Scrolling completed - {result['count']} articles loaded after "
+              f"{result['scrolls']} scrolls in {result['seconds']:.0f}s ({result['reason']})")
+        
+    def extract_articles(self, html=None):
+        """Extract all articles from the rendered page, or from replayed listing markup"""
         articles = []
         
         try:
-            # Get page source and parse with BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            # Get page source and parse only the article cards
+            soup = make_soup(html if html is not None else self.driver.page_source, LISTING_SCOPE)
             
             # Find all figcaption elements
             figcaptions = soup.find_all('figcaption')
@@ -169,47 +175,94 @@ class ELPScraper:
         return articles
         
     def save_to_database(self, articles):
-        """Save articles to MySQL database with rate limiting"""
-        saved_count = 0
-        duplicate_count = 0
+        """Save articles to MySQL database in one batched transaction"""
+        print(f"\n💾 Saving {len(articles)} articles to database...")
         
-        insert_query = """
-        INSERT INTO elp_publications 
-        (company_name, publication_type, publication_date, practice_area, article_name, article_link)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        # Duplicates are skipped, existing rows are left untouched
+        writer = publication_writer(
+            self.db_config, FIRM,
+            update_columns=[],
+            batch_size=len(articles) or 1
+        )
+        
+        try:
+            with writer:
+                for article in articles:
+                    writer.add(dict(article, practice_area=article.get('practice_area', '')))
+        except mysql.connector.Error as e:
+            print(f"✗ Error saving articles: {e}")
+        
+        counts = writer.totals()
+        saved_count = counts['inserted']
+        duplicate_count = counts['updated'] + counts['unchanged']
+        print(f"\n✅ Saved: {saved_count} | ⊘ Duplicates: {duplicate_count}")
+        self.articles_saved += saved_count
+        return saved_count
+        
+    def scrape_via_endpoint(self):
         """
+        Page through the listing endpoint recorded by an earlier Selenium run
         
-        print(f"\n💾 Saving {len(articles)} articles to database...")
+        Returns:
+            list: Articles, or None if no endpoint is recorded or the replay failed
+        """
+        template = load_endpoint(ENDPOINT_NAME)
+        if not template:
+            return None
+        
+        print(f"⚡ Replaying recorded listing endpoint {template['url']}")
+        articles = []
+        seen_links = set()
+        try:
+            for markup in replay_pages(template, marker='figcaption'):
+                self.pages_scraped += 1
+                for article in self.extract_articles(markup):
+                    key = url_key(article['article_link'])
+                    if key not in seen_links:
+                        seen_links.add(key)
+                        articles.append(article)
+                if self.markup_reached_cutoff(markup):
+                    break
+        except ReplayIncomplete as e:
+            print(f"⚠️  Endpoint replay stopped early ({e}), keeping {len(articles)} articles")
+        except ReplayError as e:
+            print(f"⚠️  Endpoint replay failed ({e}), falling back to Selenium")
+            forget_endpoint(ENDPOINT_NAME)
+            return None
+        
+        return articles
         
-        for idx, article in enumerate(articles, 1):
+    def scrape_via_selenium(self):
+        """Render and scroll the listing in Chrome, recording its endpoint for next time"""
+        print("\n🔧 Leasing Chrome driver from the pool...")
+        with lease_driver() as driver:
+            self.driver = driver
             try:
-                values = (
-                    article['company_name'],
-                    article['publication_type'],
-                    article['publication_date'],
-                    article.get('practice_area', ''),
-                    article['article_name'],
-                    article['article_link']
-                )
-                
-                self.cursor.execute(insert_query, values)
-                self.connection.commit()
-                saved_count += 1
-                print(f"✓ Saved: {article['article_name'][:60]}... ({idx}/{len(articles)})")
-                
-                # Rate limiting: 20 second break after every 20 articles
-                if saved_count % 20 == 0 and saved_count < len(articles):
-                    print(f"\n⏸️  Taking 20 second break after {saved_count} articles...")
-                    time.sleep(20)
-                    print("▶️  Resuming...")
+                # Navigate to page
+                print(f"🌐 Navigating to {self.url}")
+                wait_for_token(self.url)
+                self.driver.get(site_url(self.url))
+                record_page(self.driver)
+                self.pages_scraped += 1
+                try:
+                    WebDriverWait(self.driver, 15).until(
+                        EC.presence_of_element_located((By.TAG_NAME, 'figcaption'))
+                    )
+                except TimeoutException:
+                    print("⚠️  No articles rendered after 15s")
                 
-            except mysql.connector.IntegrityError:
-                duplicate_count += 1
-                print(f"⊘ Duplicate skipped: {article['article_name'][:60]}...")
-            except Exception as e:
-                print(f"✗ Error saving article: {e}")
+                # Scroll to load all articles
+                self.scroll_and_load()
                 
-        print(f"\n✅ Saved: {saved_count} | ⊘ Duplicates: {duplicate_count}")
+                # Extract articles
+                html = self.driver.page_source
+                save_snapshot(self.url, html)
+                articles = self.extract_articles(html)
+                remember_endpoint(self.driver, ENDPOINT_NAME, marker='figcaption')
+                return articles
+            finally:
+                # The browser goes back to the pool for the next scraper
+                self.driver = None
         
     def run(self):
         """Main execution method"""
@@ -218,23 +271,13 @@ class ELPScraper:
             print("ELP Thought Leadership Scraper")
             print("="*70)
             
-            # Setup
-            print("\n🔧 Setting up Chrome driver...")
-            self.setup_driver()
-            
-            print("🔗 Connecting to database...")
+            print("\n🔗 Connecting to database...")
             self.connect_database()
             
-            # Navigate to page
-            print(f"🌐 Navigating to {self.url}")
-            self.driver.get(self.url)
-            time.sleep(5)  # Initial page load
-            
-            # Scroll to load all articles
-            self.scroll_and_load(num_scrolls=50, delay=10)
-            
-            # Extract articles
-            articles = self.extract_articles()
+            # Plain HTTP when an endpoint is known, Chrome otherwise
+            articles = self.scrape_via_endpoint()
+            if articles is None:
+                articles = self.scrape_via_selenium()
             
             if articles:
                 # Save to database
@@ -249,16 +292,6 @@ class ELPScraper:
         except Exception as e:
             print(f"\n❌ Fatal error: {e}")
             raise
-            
-        finally:
-            # Cleanup
-            if self.cursor:
-                self.cursor.close()
-            if self.connection:
-                self.connection.close()
-            if self.driver:
-                self.driver.quit()
-            print("\n🧹 Cleanup completed")
 
 load_dotenv()
 
@@ -1,13 +1,20 @@
 import requests
-from bs4 import BeautifulSoup
 import mysql.connector
 from mysql.connector import Error
-import time
 from datetime import datetime
 from urllib.parse import urljoin
 
+from db_pool import connect
+from html_parser import make_soup
+from http_client import fetch
+from publications import ensure_publications_table, publication_writer, rollup_counts
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_4'
+
 class PublicationScraper:
-    def __init__(self, host='localhost', user='root', password='1234', database='publications_db', cutoff_date='2024-01-01'):
+    def __init__(self, host='localhost', user='root', password='1234', database='publications_db', cutoff_date='2024-01-01',
+                 setup_db=True):
         self.host = host
         self.user = user
         self.password = password
@@ -17,20 +24,22 @@ class PublicationScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        self.db_config = {
+            'host': host,
+            'user': user,
+            'password': password,
+            'database': database
+        }
         self.connection = None
-        self.setup_database()
+        self.pages_scraped = 0
+        if setup_db:
+            self.setup_database()
         print(f"📅 Scraping articles published on or after: {cutoff_date}")
     
     def get_connection(self):
-        """Create database connection"""
+        """Borrow a pooled database connection (close() returns it)"""
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
-            return connection
+            return connect(self.db_config)
         except Error as e:
             print(f"Error connecting to MySQL: {e}")
             return None
@@ -53,29 +62,10 @@ class PublicationScraper:
             cursor.close()
             connection.close()
             
-            # Now connect to the database and create table
-            connection = self.get_connection()
-            if connection:
-                cursor = connection.cursor()
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS publications (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        company_name VARCHAR(255) NOT NULL,
-                        published_date DATE,
-                        practice_area VARCHAR(255),
-                        heading TEXT NOT NULL,
-                        link TEXT NOT NULL,
-                        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE KEY unique_publication (company_name(100), link(255))
-                    )
-                ''')
-                
-                connection.commit()
-                cursor.close()
-                connection.close()
-                print("✓ Table 'publications' ready")
-        except Error as e:
+            # Now create the shared table (moving this scraper's old one aside)
+            ensure_publications_table(self.db_config)
+            print("✓ Table 'publications' ready")
+        except (Error, RuntimeError) as e:
             print(f"Error setting up database: {e}")
     
     def parse_date(self, date_str):
@@ -92,6 +82,95 @@ class PublicationScraper:
             return True  # Include if date parsing failed
         return date_obj >= self.cutoff_date
     
+    def parse_publications(self, content, company_name):
+        """
+        Walk the mediatitle links of the publication listing
+        
+        Returns:
+            tuple: (publications on or after the cutoff, links processed, links skipped)
+        """
+        soup = make_soup(content)
+        
+        # Find all publication items
+        publications = []
+        article_count = 0
+        skipped_count = 0
+        processed_count = 0
+        
+        # Find all title links
+        title_links = soup.find_all('a', class_='mediatitle', target='_blank')
+        
+        print(f"Found {len(title_links)} publications on page\n")
+        
+        for idx, title_link in enumerate(title_links, 1):
+            try:
+                processed_count += 1
+                
+                # Extract heading and link
+                heading = title_link.get_text(strip=True)
+                link = urljoin(self.base_url, title_link.get('href', ''))
+                
+                # Find the parent container to get practice area and date
+                parent = title_link.find_parent()
+                while parent and parent.name != 'div':
+                    parent = parent.find_parent()
+                
+                practice_area = "N/A"
+                published_date = "N/A"
+                date_obj = None
+                
+                if parent:
+                    # Find practice area
+                    practice_area_elem = parent.find('strong', string='Practice Area :')
+                    if practice_area_elem and practice_area_elem.parent:
+                        practice_span = practice_area_elem.find_next('span')
+                        if practice_span:
+                            practice_link = practice_span.find('a')
+                            if practice_link:
+                                practice_area = practice_link.get_text(strip=True)
+                    
+                    # Find published date
+                    date_elem = parent.find('strong', string='Published on  :')
+                    if date_elem and date_elem.parent:
+                        date_text = date_elem.parent.get_text(strip=True)
+                        date_str = date_text.replace('Published on  :', '').strip()
+                        published_date, date_obj = self.parse_date(date_str)
+                
+                # Check if date is within range
+                if not self.is_date_valid(date_obj):
+                    skipped_count += 1
+                    print(f"⏭ Skipped Article #{processed_count} (published before cutoff date)")
+                    print(f"  Published Date: {published_date}")
+                    print(f"  Heading: {heading[:60]}...")
+                    print("-" * 60)
+                    continue
+                
+                publication = {
+                    'company_name': company_name,
+                    'heading': heading,
+                    'link': link,
+                    'practice_area': practice_area,
+                    # A missing or unparseable date is stored as NULL, not as text
+                    'published_date': published_date if date_obj else None
+                }
+                
+                publications.append(publication)
+                article_count += 1
+                
+                # Print to terminal
+                print(f"✓ Article #{article_count} (Processed #{processed_count})")
+                print(f"  Heading: {heading}")
+                print(f"  Practice Area: {practice_area}")
+                print(f"  Published Date: {published_date}")
+                print(f"  Link: {link}")
+                print("-" * 60)
+                
+            except Exception as e:
+                print(f"✗ Error processing article {processed_count}: {str(e)}")
+                continue
+        
+        return publications, processed_count, skipped_count
+    
     def scrape_induslaw(self):
         """Scrape publications from IndusLaw website"""
         url = "https://induslaw.com/publication"
@@ -103,95 +182,16 @@ class PublicationScraper:
         print(f"{'='*60}\n")
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = fetch(url, headers=self.headers, timeout=30)
             response.raise_for_status()
+            self.pages_scraped += 1
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all publication items
-            publications = []
-            article_count = 0
-            skipped_count = 0
-            processed_count = 0
+            publications, processed_count, skipped_count = self.parse_publications(
+                response.content, company_name)
+            article_count = len(publications)
             
-            # Find all title links
-            title_links = soup.find_all('a', class_='mediatitle', target='_blank')
-            
-            print(f"Found {len(title_links)} publications on page\n")
-            
-            for idx, title_link in enumerate(title_links, 1):
-                try:
-                    processed_count += 1
-                    
-                    # Extract heading and link
-                    heading = title_link.get_text(strip=True)
-                    link = urljoin(self.base_url, title_link.get('href', ''))
-                    
-                    # Find the parent container to get practice area and date
-                    parent = title_link.find_parent()
-                    while parent and parent.name != 'div':
-                        parent = parent.find_parent()
-                    
-                    practice_area = "N/A"
-                    published_date = "N/A"
-                    date_obj = None
-                    
-                    if parent:
-                        # Find practice area
-                        practice_area_elem = parent.find('strong', string='Practice Area :')
-                        if practice_area_elem and practice_area_elem.parent:
-                            practice_span = practice_area_elem.find_next('span')
-                            if practice_span:
-                                practice_link = practice_span.find('a')
-                                if practice_link:
-                                    practice_area = practice_link.get_text(strip=True)
-                        
-                        # Find published date
-                        date_elem = parent.find('strong', string='Published on  :')
-                        if date_elem and date_elem.parent:
-                            date_text = date_elem.parent.get_text(strip=True)
-                            date_str = date_text.replace('Published on  :', '').strip()
-                            published_date, date_obj = self.parse_date(date_str)
-                    
-                    # Check if date is within range
-                    if not self.is_date_valid(date_obj):
-                        skipped_count += 1
-                        print(f"⏭ Skipped Article #{processed_count} (published before cutoff date)")
-                        print(f"  Published Date: {published_date}")
-                        print(f"  Heading: {heading[:60]}...")
-                        print("-" * 60)
-                        continue
-                    
-                    publication = {
-                        'company_name': company_name,
-                        'heading': heading,
-                        'link': link,
-                        'practice_area': practice_area,
-                        'published_date': published_date
-                    }
-                    
-                    publications.append(publication)
-                    article_count += 1
-                    
-                    # Print to terminal
-                    print(f"✓ Article #{article_count} (Processed #{processed_count})")
-                    print(f"  Heading: {heading}")
-                    print(f"  Practice Area: {practice_area}")
-                    print(f"  Published Date: {published_date}")
-                    print(f"  Link: {link}")
-                    print("-" * 60)
-                    
-                    # Save to database
-                    self.save_to_database(publication)
-                    
-                    # Stop for 10 seconds after every 20 articles
-                    if article_count % 20 == 0:
-                        print(f"\n⏸ Processed {article_count} valid articles. Pausing for 10 seconds...\n")
-                        time.sleep(10)
-                    
-                except Exception as e:
-                    print(f"✗ Error processing article {processed_count}: {str(e)}")
-                    continue
+            # Save the whole page in one transaction
+            self.save_to_database(publications)
             
             print(f"\n{'='*60}")
             print(f"✓ Scraping complete!")
@@ -206,33 +206,25 @@ class PublicationScraper:
             print(f"✗ Error fetching {url}: {str(e)}")
             return []
     
-    def save_to_database(self, publication):
-        """Save publication to MySQL database"""
-        connection = self.get_connection()
-        if not connection:
-            return
+    def save_to_database(self, publications):
+        """Save publications to MySQL database in one batched transaction"""
+        # Links already stored are left as they are (no columns updated). Unlike
+        # the old per-row INSERT IGNORE, a bad value fails the whole page, so
+        # parse_publications only passes real dates or NULL.
+        writer = publication_writer(
+            self.db_config, FIRM,
+            update_columns=[],
+            batch_size=len(publications) or 1
+        )
         
         try:
-            cursor = connection.cursor()
-            
-            sql = '''
-                INSERT IGNORE INTO publications 
-                (company_name, published_date, practice_area, heading, link)
-                VALUES (%s, %s, %s, %s, %s)
-            '''
-            
-            values = (
-                publication['company_name'],
-                publication['published_date'],
-                publication['practice_area'],
-                publication['heading'],
-                publication['link']
-            )
-            
-            cursor.execute(sql, values)
-            connection.commit()
-            cursor.close()
-            connection.close()
+            with writer:
+                for publication in publications:
+                    writer.add(publication)
+            counts = writer.totals()
+            print(f"💾 Saved {counts['inserted']} new publications "
+                  f"({counts['unchanged']} already in database)")
+            return counts
         except Error as e:
             print(f"Database error: {str(e)}")
     
@@ -246,13 +238,14 @@ class PublicationScraper:
             cursor = connection.cursor()
             
             sql = '''
-                SELECT company_name, heading, practice_area, published_date, link
+                SELECT company_name, article_heading, practice_area, publication_date, article_link
                 FROM publications
-                ORDER BY published_date DESC, scraped_at DESC
+                WHERE firm = %s
+                ORDER BY publication_date DESC, scraped_at DESC
                 LIMIT %s
             '''
             
-            cursor.execute(sql, (limit,))
+            cursor.execute(sql, (FIRM, limit))
             results = cursor.fetchall()
             
             cursor.close()
@@ -273,47 +266,20 @@ class PublicationScraper:
             print(f"Error viewing data: {e}")
     
     def get_statistics(self):
-        """Get statistics about scraped data"""
-        connection = self.get_connection()
-        if not connection:
-            return
-        
+        """Get statistics about scraped data from the publication_stats rollup"""
         try:
-            cursor = connection.cursor()
-            
-            # Total count
-            cursor.execute('SELECT COUNT(*) FROM publications')
-            total = cursor.fetchone()[0]
-            
-            # By company
-            cursor.execute('''
-                SELECT company_name, COUNT(*) 
-                FROM publications 
-                GROUP BY company_name
-            ''')
-            by_company = cursor.fetchall()
-            
-            # By practice area
-            cursor.execute('''
-                SELECT practice_area, COUNT(*) 
-                FROM publications 
-                GROUP BY practice_area
-                ORDER BY COUNT(*) DESC
-                LIMIT 5
-            ''')
-            by_practice = cursor.fetchall()
-            
-            cursor.close()
-            connection.close()
+            total = rollup_counts(self.db_config, firm=FIRM)
+            by_firm = rollup_counts(self.db_config, 'firm')
+            by_practice = rollup_counts(self.db_config, 'practice_area', firm=FIRM, limit=5)
             
             print(f"\n{'='*60}")
             print(f"Database Statistics")
             print(f"{'='*60}\n")
             print(f"Total Publications: {total}\n")
             
-            print("By Company:")
-            for company, count in by_company:
-                print(f"  {company}: {count}")
+            print("By Firm (all scrapers):")
+            for firm, count in by_firm:
+                print(f"  {firm}: {count}")
             
             print(f"\nTop 5 Practice Areas:")
             for practice, count in by_practice:
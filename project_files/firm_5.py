@@ -1,26 +1,51 @@
-import requests
-from bs4 import BeautifulSoup
 import mysql.connector
-from datetime import datetime
-import time
-from urllib.parse import urljoin
-import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from datetime import datetime
+from urllib.parse import urljoin
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from driver_pool import lease_driver, record_page
+from enrichment_cache import get_enrichment_cache
+from html_parser import make_soup
+from http_client import fetch
+from network_capture import ReplayError, ReplayIncomplete, forget_endpoint, load_endpoint, remember_endpoint, replay_pages
+from publications import ensure_publications_table, publication_writer
+from rate_limiter import wait_for_token
+from replay_server import save_snapshot, site_url
+from scrolling import count_selector, last_match_text, scroll_until_stable
+from seen_index import get_seen_index
+from url_key import url_key
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_5'
+
+# Listing dates look like "04 Nov '25"
+DATE_PATTERN = r'\d{2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\'\d{2}'
 
 class KhaitanScraper:
-    def __init__(self, db_config, use_selenium=True):
-        """Initialize scraper with database configuration"""
+    def __init__(self, db_config, use_selenium=True, detail_workers=8):
+        """
+        Initialize scraper with database configuration
+        
+        detail_workers: Threads fetching article pages for practice areas
+        (requests per host are still capped by the shared rate limiter)
+        """
         self.db_config = db_config
         self.company_name = "Khaitan & Co."
         self.use_selenium = use_selenium
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        self.detail_workers = detail_workers
+        self.pages_scraped = 0
+        self.total_saved = 0
+        self.stats_lock = threading.Lock()
+        self.seen_index = None
         
     def setup_database(self):
         """Create database and table if they don't exist"""
@@ -34,45 +59,17 @@ class KhaitanScraper:
             cursor = conn.cursor()
             
             cursor.execute("CREATE DATABASE IF NOT EXISTS publications_db")
-            cursor.execute("USE publications_db")
-            
-            create_table_query = """
-            CREATE TABLE IF NOT EXISTS `Khaitan&Co_Publications` (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                company_name VARCHAR(255),
-                publication_type VARCHAR(100),
-                publishing_date DATE,
-                practice_area VARCHAR(255),
-                article_heading TEXT,
-                article_link TEXT,
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE KEY unique_article (article_link(500))
-            )
-            """
-            cursor.execute(create_table_query)
-            conn.commit()
+            
+            ensure_publications_table(dict(self.db_config, database='publications_db'))
             print("✓ Database and table setup completed successfully")
             
-        except mysql.connector.Error as err:
+        except (mysql.connector.Error, RuntimeError) as err:
             print(f"❌ Database setup error: {err}")
         finally:
             if conn.is_connected():
                 cursor.close()
                 conn.close()
     
-    def init_selenium_driver(self):
-        """Initialize Selenium Chrome driver"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument(f'user-agent={self.headers["User-Agent"]}')
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        return driver
-    
     def parse_date(self, date_str):
         """Parse date string to MySQL date format"""
         try:
@@ -101,181 +98,356 @@ class KhaitanScraper:
         except:
             return False
     
+    def parse_practice_area(self, soup):
+        """
+        Extract the practice area from a parsed article page
+        
+        Returns:
+            tuple: (practice_area, method) where method is 'public-footer', 'tags'
+            or 'class-match', or ("Unknown", None) if nothing matched
+        """
+        # Method 1: Check for <div class="public-footer"><p>Practice Area</p></div>
+        public_footer = soup.find('div', class_='public-footer')
+        if public_footer:
+            practice_p = public_footer.find('p')
+            if practice_p:
+                practice_area = practice_p.get_text(strip=True)
+                if practice_area and len(practice_area) > 0:
+                    return practice_area, 'public-footer'
+        
+        # Method 2: Check for tag list with practice areas
+        tags_ul = soup.find('ul', class_=lambda x: x and 'flex' in str(x) and 'gap-2' in str(x))
+        if tags_ul:
+            tags = []
+            for li in tags_ul.find_all('li'):
+                a_tag = li.find('a')
+                if a_tag:
+                    tag_text = a_tag.get_text(strip=True)
+                    if tag_text:
+                        tags.append(tag_text)
+            
+            if tags:
+                return ', '.join(tags), 'tags'
+        
+        # Method 3: Look for any class containing "practice"
+        for elem in soup.find_all(['div', 'span', 'p', 'a']):
+            class_attr = elem.get('class', [])
+            if any('practice' in str(c).lower() for c in class_attr):
+                text = elem.get_text(strip=True)
+                if text and 5 < len(text) < 100:
+                    return text, 'class-match'
+        
+        return "Unknown", None
+    
     def extract_practice_area_from_url(self, url):
-        """Fetch individual article page and extract practice area"""
+        """Fetch individual article page and extract practice area (cached across runs)"""
         # Skip PDF files
         if url.lower().endswith('.pdf'):
             print(f"    ⚠ Skipping PDF file (no practice area extraction)")
             return "Unknown"
+        
+        # Opened on first use, so building the scraper (e.g. in parse_benchmark.py) creates no file
+        enrichment_cache = get_enrichment_cache()
+        cached = enrichment_cache.get(url) if enrichment_cache else None
+        # Entries without a method are misses stored by older runs; fetch those again
+        if cached and cached[1]:
+            practice_area, method = cached
+            print(f"    ✓ Practice Area (cached, {method}): {practice_area}")
+            return practice_area
             
         try:
             print(f"    🔍 Fetching practice area from: {url}")
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = fetch(url, headers=self.headers, timeout=30)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Method 1: Check for <div class="public-footer"><p>Practice Area</p></div>
-            public_footer = soup.find('div', class_='public-footer')
-            if public_footer:
-                practice_p = public_footer.find('p')
-                if practice_p:
-                    practice_area = practice_p.get_text(strip=True)
-                    if practice_area and len(practice_area) > 0:
-                        print(f"    ✓ Practice Area (public-footer): {practice_area}")
-                        return practice_area
-            
-            # Method 2: Check for tag list with practice areas
-            tags_ul = soup.find('ul', class_=lambda x: x and 'flex' in str(x) and 'gap-2' in str(x))
-            if tags_ul:
-                tags = []
-                for li in tags_ul.find_all('li'):
-                    a_tag = li.find('a')
-                    if a_tag:
-                        tag_text = a_tag.get_text(strip=True)
-                        if tag_text:
-                            tags.append(tag_text)
-                
-                if tags:
-                    practice_area = ', '.join(tags)
-                    print(f"    ✓ Practice Area (tags): {practice_area}")
-                    return practice_area
-            
-            # Method 3: Look for any class containing "practice"
-            for elem in soup.find_all(['div', 'span', 'p', 'a']):
-                class_attr = elem.get('class', [])
-                if any('practice' in str(c).lower() for c in class_attr):
-                    text = elem.get_text(strip=True)
-                    if text and 5 < len(text) < 100:
-                        print(f"    ✓ Practice Area (class match): {text}")
-                        return text
-            
-            print(f"    ⚠ Practice area not found on page")
-            return "Unknown"
+            with self.stats_lock:
+                self.pages_scraped += 1
+            soup = make_soup(response.content)
+            
+            practice_area, method = self.parse_practice_area(soup)
+            if method:
+                print(f"    ✓ Practice Area ({method}): {practice_area}")
+            else:
+                print(f"    ⚠ Practice area not found on page")
+            
+            # Only pages an extractor matched are cached; fetch errors and pages
+            # without a practice area (e.g. a consent page) are retried next run
+            if enrichment_cache and method:
+                enrichment_cache.put(url, practice_area, method)
+            return practice_area
             
         except Exception as e:
             print(f"    ❌ Error extracting practice area: {e}")
             return "Unknown"
     
-    def scroll_to_load_all_content(self, driver, max_scrolls=40):
-        """Scroll down the page to load all lazy-loaded content"""
+    def fetch_practice_areas(self, urls):
+        """
+        Fetch practice areas for many article pages concurrently
+        
+        Returns:
+            list: Practice areas in the same order as urls ("Unknown" when not found)
+        """
+        if not urls:
+            return []
+        print(f"  🔍 Fetching practice areas for {len(urls)} articles ({self.detail_workers} workers)...")
+        with ThreadPoolExecutor(max_workers=self.detail_workers) as executor:
+            return list(executor.map(self.extract_practice_area_from_url, urls))
+    
+    def drop_known(self, articles):
+        """Leave out articles already stored, so they cost no detail fetch or write"""
+        if not self.seen_index:
+            return articles
+        fresh = [article for article in articles if not self.seen_index.contains(article['article_link'])]
+        if len(fresh) < len(articles):
+            print(f"  ⏭ Skipping {len(articles) - len(fresh)} articles already in the database")
+        return fresh
+    
+    def add_practice_areas(self, articles):
+        """Fill in each article's practice_area from its detail page"""
+        practice_areas = self.fetch_practice_areas([article['article_link'] for article in articles])
+        for article, practice_area in zip(articles, practice_areas):
+            article['practice_area'] = practice_area
+            print(f"  🏢 {article['article_heading'][:60]}... -> {practice_area}")
+    
+    def scroll_to_load_all_content(self, driver, link_path, max_scrolls=40):
+        """
+        Scroll down the page until no more article links load
+        
+        Stops early once the last loaded article is dated before January 2024.
+        link_path: path prefix of the article links, e.g. '/thought-leadership/'
+        """
         print("  🔄 Scrolling to load all content...")
+        link_selector = f'a[href*="{link_path}"]'
+        
+        def reached_cutoff(driver):
+            text = driver.execute_script(last_match_text(link_selector, closest='div, article, li'))
+            date_match = re.search(DATE_PATTERN, text or '')
+            return bool(date_match) and not self.is_from_jan_2024_onwards(date_match.group())
+        
+        result = scroll_until_stable(
+            driver,
+            count_script=count_selector(link_selector),
+            should_stop=reached_cutoff,
+            idle_timeout=4,
+            max_scrolls=max_scrolls
+        )
+        print(f"  ✓ Content loading complete: {result['count']} links after "
+              f"{result['scrolls']} scrolls in {result['seconds']:.0f}s ({result['reason']})")
+    
+    def parse_thought_leadership(self, html, url):
+        """Extract thought-leadership articles (without practice areas) from listing markup"""
+        articles = []
+        soup = make_soup(html)
+        
+        # Find all article cards/blocks on the page
+        # Look for links that contain /thought-leadership/
+        article_links = soup.find_all('a', href=re.compile(r'/thought-leadership/[^/]+'))
         
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        scroll_count = 0
-        no_change_count = 0
+        print(f"✓ Found {len(article_links)} article links")
         
-        while scroll_count < max_scrolls:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+        processed_urls = set()
+        
+        for link_elem in article_links:
+            article_url = urljoin(url, link_elem.get('href'))
             
-            new_height = driver.execute_script("return document.body.scrollHeight")
+            # Skip duplicates
+            if article_url in processed_urls:
+                continue
+            processed_urls.add(article_url)
             
-            scroll_count += 1
-            print(f"  📜 Scroll {scroll_count}: Height {last_height} -> {new_height}")
+            # Get article title from link text or nearby elements
+            article_title = link_elem.get_text(strip=True)
             
-            if new_height == last_height:
-                no_change_count += 1
-                if no_change_count >= 2:
-                    print(f"  ✓ Reached bottom after {scroll_count} scrolls")
-                    break
-            else:
-                no_change_count = 0
+            # Try to find the parent card/container for more info
+            parent = link_elem.find_parent(['div', 'article', 'li'])
             
-            last_height = new_height
+            # Extract date
+            date_str = None
+            pub_type = "Unknown"
+            
+            if parent:
+                parent_text = parent.get_text()
+                
+                # Look for date pattern
+                date_match = re.search(DATE_PATTERN, parent_text)
+                if date_match:
+                    date_str = date_match.group()
+                
+                # Look for publication type
+                if 'Ergo Update' in parent_text:
+                    pub_type = 'Ergo Update'
+                elif 'Ergo Newsflash' in parent_text:
+                    pub_type = 'Ergo Newsflash'
+                elif 'Ergo Newsletter' in parent_text:
+                    pub_type = 'Ergo Newsletter'
+                elif 'Article' in parent_text:
+                    pub_type = 'Article'
+            
+            # Filter by date
+            if date_str and not self.is_from_jan_2024_onwards(date_str):
+                continue
+            
+            print(f"\n--- Processing Article ---")
+            print(f"  📰 Title: {article_title[:80]}...")
+            print(f"  📅 Date: {date_str if date_str else 'Unknown'}")
+            print(f"  📄 Type: {pub_type}")
+            print(f"  🔗 URL: {article_url}")
+            
+            articles.append({
+                'company_name': self.company_name,
+                'publication_type': pub_type,
+                'publishing_date': self.parse_date(date_str) if date_str else None,
+                'practice_area': 'Unknown',
+                'article_heading': article_title,
+                'article_link': article_url
+            })
         
-        time.sleep(1)
-        print(f"  ✓ Content loading complete")
+        return articles
     
-    def scrape_thought_leadership(self):
-        """Scrape thought-leadership with practice area extraction using Selenium"""
-        url = "https://www.khaitanco.com/thought-leadership"
+    def parse_news_and_events(self, html, url):
+        """Extract news/event entries (without practice areas) from listing markup"""
         articles = []
+        soup = make_soup(html)
         
-        driver = None
-        try:
-            print(f"\n🔍 Fetching URL: {url}")
-            print("  🌐 Initializing browser...")
+        # Find all article links
+        article_links = soup.find_all('a', href=re.compile(r'/news-and-events/[^/]+'))
+        
+        print(f"✓ Found {len(article_links)} news/event links")
+        
+        processed_urls = set()
+        
+        for link_elem in article_links:
+            article_url = urljoin(url, link_elem.get('href'))
             
-            driver = self.init_selenium_driver()
-            driver.get(url)
+            # Skip duplicates
+            if article_url in processed_urls:
+                continue
+            processed_urls.add(article_url)
             
-            print("  ⏳ Waiting for page to load...")
-            time.sleep(3)
+            article_title = link_elem.get_text(strip=True)
             
-            self.scroll_to_load_all_content(driver)
+            if not article_title or len(article_title) < 10:
+                continue
             
-            # Get the fully loaded page source
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            # Try to find date in parent container
+            parent = link_elem.find_parent(['div', 'article', 'li'])
+            date_str = None
+            
+            if parent:
+                parent_text = parent.get_text()
+                date_match = re.search(DATE_PATTERN, parent_text)
+                if date_match:
+                    date_str = date_match.group()
+            
+            print(f"\n--- Processing News/Event ---")
+            print(f"  📰 Title: {article_title[:80]}...")
+            print(f"  📅 Date: {date_str if date_str else 'Unknown'}")
+            print(f"  🔗 URL: {article_url}")
+            
+            articles.append({
+                'company_name': self.company_name,
+                'publication_type': 'News/Event',
+                'publishing_date': self.parse_date(date_str) if date_str else None,
+                'practice_area': 'Unknown',
+                'article_heading': article_title,
+                'article_link': article_url
+            })
+        
+        return articles
+    
+    def markup_reached_cutoff(self, markup, link_path):
+        """True if the last listing entry in replayed markup is dated before January 2024"""
+        soup = make_soup(markup)
+        links = soup.find_all('a', href=re.compile(re.escape(link_path) + r'[^/]+'))
+        if not links:
+            return False
+        parent = links[-1].find_parent(['div', 'article', 'li'])
+        date_match = re.search(DATE_PATTERN, parent.get_text() if parent else '')
+        return bool(date_match) and not self.is_from_jan_2024_onwards(date_match.group())
+    
+    def endpoint_name(self, link_path):
+        """Key of a listing's recorded endpoint, e.g. 'khaitan_thought-leadership'"""
+        return f"khaitan_{link_path.strip('/')}"
+    
+    def load_listing_via_endpoint(self, url, link_path, parse):
+        """
+        Page through the listing endpoint recorded by an earlier Selenium run
+        
+        Returns:
+            list: Parsed entries, or None if no endpoint is recorded or the replay failed
+        """
+        endpoint_name = self.endpoint_name(link_path)
+        template = load_endpoint(endpoint_name)
+        if not template:
+            return None
+        
+        print(f"  ⚡ Replaying recorded listing endpoint {template['url']}")
+        articles = []
+        seen_links = set()
+        try:
+            for markup in replay_pages(template, marker=link_path):
+                self.pages_scraped += 1
+                for article in parse(markup, url):
+                    key = url_key(article['article_link'])
+                    if key not in seen_links:
+                        seen_links.add(key)
+                        articles.append(article)
+                if self.markup_reached_cutoff(markup, link_path):
+                    break
+        except ReplayIncomplete as e:
+            print(f"  ⚠ Endpoint replay stopped early ({e}), keeping {len(articles)} entries")
+        except ReplayError as e:
+            print(f"  ⚠ Endpoint replay failed ({e}), falling back to Selenium")
+            forget_endpoint(endpoint_name)
+            return None
+        
+        return articles
+    
+    def load_listing_via_selenium(self, url, link_path, parse):
+        """Render and scroll the listing in Chrome, recording its endpoint for next time"""
+        print("  🌐 Leasing browser from the pool...")
+        with lease_driver() as driver:
+            wait_for_token(url)
+            driver.get(site_url(url))
+            record_page(driver)
+            self.pages_scraped += 1
             
-            # Find all article cards/blocks on the page
-            # Look for links that contain /thought-leadership/
-            article_links = soup.find_all('a', href=re.compile(r'/thought-leadership/[^/]+'))
+            print("  ⏳ Waiting for page to load...")
+            try:
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, f'a[href*="{link_path}"]'))
+                )
+            except TimeoutException:
+                print("  ⚠️  No articles rendered after 15s")
             
-            print(f"✓ Found {len(article_links)} article links")
+            self.scroll_to_load_all_content(driver, link_path)
             
-            processed_urls = set()
+            # Get the fully loaded page source
+            html = driver.page_source
+            save_snapshot(url, html)
+            articles = parse(html, url)
+            remember_endpoint(driver, self.endpoint_name(link_path), marker=link_path)
+        print("  🔒 Browser returned to the pool")
+        return articles
+    
+    def load_listing(self, url, link_path, parse):
+        """Listing entries via the recorded endpoint when possible, Selenium otherwise"""
+        articles = self.load_listing_via_endpoint(url, link_path, parse)
+        if articles is None:
+            articles = self.load_listing_via_selenium(url, link_path, parse)
+        return articles
+    
+    def scrape_thought_leadership(self):
+        """Scrape thought-leadership with practice area extraction"""
+        url = "https://www.khaitanco.com/thought-leadership"
+        articles = []
+        
+        try:
+            print(f"\n🔍 Fetching URL: {url}")
+            articles = self.load_listing(url, '/thought-leadership/', self.parse_thought_leadership)
             
-            for link_elem in article_links:
-                article_url = urljoin(url, link_elem.get('href'))
-                
-                # Skip duplicates
-                if article_url in processed_urls:
-                    continue
-                processed_urls.add(article_url)
-                
-                # Get article title from link text or nearby elements
-                article_title = link_elem.get_text(strip=True)
-                
-                # Try to find the parent card/container for more info
-                parent = link_elem.find_parent(['div', 'article', 'li'])
-                
-                # Extract date
-                date_str = None
-                pub_type = "Unknown"
-                
-                if parent:
-                    parent_text = parent.get_text()
-                    
-                    # Look for date pattern
-                    date_match = re.search(r'\d{2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\'\d{2}', parent_text)
-                    if date_match:
-                        date_str = date_match.group()
-                    
-                    # Look for publication type
-                    if 'Ergo Update' in parent_text:
-                        pub_type = 'Ergo Update'
-                    elif 'Ergo Newsflash' in parent_text:
-                        pub_type = 'Ergo Newsflash'
-                    elif 'Ergo Newsletter' in parent_text:
-                        pub_type = 'Ergo Newsletter'
-                    elif 'Article' in parent_text:
-                        pub_type = 'Article'
-                
-                # Filter by date
-                if date_str and not self.is_from_jan_2024_onwards(date_str):
-                    continue
-                
-                print(f"\n--- Processing Article ---")
-                print(f"  📰 Title: {article_title[:80]}...")
-                print(f"  📅 Date: {date_str if date_str else 'Unknown'}")
-                print(f"  📄 Type: {pub_type}")
-                print(f"  🔗 URL: {article_url}")
-                
-                # Extract practice area from article page
-                practice_area = self.extract_practice_area_from_url(article_url)
-                time.sleep(0.5)
-                
-                print(f"  🏢 Practice Area: {practice_area}")
-                
-                articles.append({
-                    'company_name': self.company_name,
-                    'publication_type': pub_type,
-                    'publishing_date': self.parse_date(date_str) if date_str else None,
-                    'practice_area': practice_area,
-                    'article_heading': article_title,
-                    'article_link': article_url
-                })
+            # Extract practice areas from the article pages
+            articles = self.drop_known(articles)
+            self.add_practice_areas(articles)
             
             print(f"\n✓ Total scraped from thought-leadership: {len(articles)}")
             
@@ -283,10 +455,6 @@ class KhaitanScraper:
             print(f"❌ Error scraping thought-leadership: {e}")
             import traceback
             traceback.print_exc()
-        finally:
-            if driver:
-                driver.quit()
-                print("  🔒 Browser closed")
         
         return articles
     
@@ -295,71 +463,13 @@ class KhaitanScraper:
         url = "https://www.khaitanco.com/news-and-events"
         articles = []
         
-        driver = None
         try:
             print(f"\n🔍 Fetching URL: {url}")
-            print("  🌐 Initializing browser...")
+            articles = self.load_listing(url, '/news-and-events/', self.parse_news_and_events)
             
-            driver = self.init_selenium_driver()
-            driver.get(url)
-            
-            print("  ⏳ Waiting for page to load...")
-            time.sleep(3)
-            
-            self.scroll_to_load_all_content(driver)
-            
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Find all article links
-            article_links = soup.find_all('a', href=re.compile(r'/news-and-events/[^/]+'))
-            
-            print(f"✓ Found {len(article_links)} news/event links")
-            
-            processed_urls = set()
-            
-            for link_elem in article_links:
-                article_url = urljoin(url, link_elem.get('href'))
-                
-                # Skip duplicates
-                if article_url in processed_urls:
-                    continue
-                processed_urls.add(article_url)
-                
-                article_title = link_elem.get_text(strip=True)
-                
-                if not article_title or len(article_title) < 10:
-                    continue
-                
-                # Try to find date in parent container
-                parent = link_elem.find_parent(['div', 'article', 'li'])
-                date_str = None
-                
-                if parent:
-                    parent_text = parent.get_text()
-                    date_match = re.search(r'\d{2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\'\d{2}', parent_text)
-                    if date_match:
-                        date_str = date_match.group()
-                
-                print(f"\n--- Processing News/Event ---")
-                print(f"  📰 Title: {article_title[:80]}...")
-                print(f"  📅 Date: {date_str if date_str else 'Unknown'}")
-                print(f"  🔗 URL: {article_url}")
-                
-                # Extract practice area from article page
-                practice_area = self.extract_practice_area_from_url(article_url)
-                time.sleep(0.5)
-                
-                print(f"  🏢 Practice Area: {practice_area}")
-                
-                articles.append({
-                    'company_name': self.company_name,
-                    'publication_type': 'News/Event',
-                    'publishing_date': self.parse_date(date_str) if date_str else None,
-                    'practice_area': practice_area,
-                    'article_heading': article_title,
-                    'article_link': article_url
-                })
+            # Extract practice areas from the article pages
+            articles = self.drop_known(articles)
+            self.add_practice_areas(articles)
             
             print(f"\n✓ Total scraped from news-and-events: {len(articles)}")
             
@@ -367,10 +477,6 @@ class KhaitanScraper:
             print(f"❌ Error scraping news-and-events: {e}")
             import traceback
             traceback.print_exc()
-        finally:
-            if driver:
-                driver.quit()
-                print("  🔒 Browser closed")
         
         return articles
     
@@ -382,11 +488,12 @@ class KhaitanScraper:
         
         try:
             print(f"\n🔍 Fetching URL: {url}")
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = fetch(url, headers=self.headers, timeout=30)
             response.raise_for_status()
+            self.pages_scraped += 1
             
             content = response.text
-            soup = BeautifulSoup(content, 'html.parser')
+            soup = make_soup(content)
             
             page_text = soup.get_text()
             lines = page_text.split('\n')
@@ -457,56 +564,26 @@ class KhaitanScraper:
         return final_articles
     
     def save_to_database(self, articles):
-        """Save articles to MySQL database"""
+        """Save articles to MySQL database in one batched transaction"""
         if not articles:
             print("\n⚠ No articles to save")
             return
         
+        writer = publication_writer(
+            dict(self.db_config, database='publications_db'), FIRM,
+            batch_size=len(articles)
+        )
+        
         try:
-            conn = mysql.connector.connect(
-                host=self.db_config['host'],
-                user=self.db_config['user'],
-                password=self.db_config['password'],
-                database='publications_db'
-            )
-            cursor = conn.cursor()
-            
-            insert_query = """
-            INSERT INTO `Khaitan&Co_Publications` 
-            (company_name, publication_type, publishing_date, practice_area, article_heading, article_link)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-            company_name=VALUES(company_name),
-            publication_type=VALUES(publication_type),
-            publishing_date=VALUES(publishing_date),
-            practice_area=VALUES(practice_area),
-            article_heading=VALUES(article_heading)
-            """
-            
-            inserted = 0
-            for article in articles:
-                try:
-                    cursor.execute(insert_query, (
-                        article['company_name'],
-                        article['publication_type'],
-                        article['publishing_date'],
-                        article['practice_area'],
-                        article['article_heading'],
-                        article['article_link']
-                    ))
-                    inserted += 1
-                except mysql.connector.Error as err:
-                    print(f"  ❌ Error inserting article: {err}")
-            
-            conn.commit()
-            print(f"\n✅ Successfully saved {inserted} articles to database")
-            
+            with writer:
+                for article in articles:
+                    writer.add(article)
+            counts = writer.totals()
+            print(f"\n✅ Successfully saved {len(articles)} articles to database "
+                  f"({counts['inserted']} new, {counts['updated']} updated, {counts['unchanged']} unchanged)")
+            return counts
         except mysql.connector.Error as err:
             print(f"❌ Database error: {err}")
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
     
     def run(self):
         """Main execution method with progressive saving"""
@@ -518,6 +595,7 @@ class KhaitanScraper:
         print("=" * 60)
         
         self.setup_database()
+        self.seen_index = get_seen_index(dict(self.db_config, database='publications_db'))
         
         total_saved = 0
         
@@ -530,7 +608,6 @@ class KhaitanScraper:
             print("\n💾 Saving Thought Leadership articles to database...")
             self.save_to_database(articles_tl)
             total_saved += len(articles_tl)
-        time.sleep(2)
         
         # Scrape and save News & Events
         print("\n" + "=" * 60)
@@ -541,7 +618,6 @@ class KhaitanScraper:
             print("\n💾 Saving News & Events articles to database...")
             self.save_to_database(articles_news)
             total_saved += len(articles_news)
-        time.sleep(2)
         
         # Scrape and save Compass Blog
         print("\n" + "=" * 60)
@@ -553,6 +629,8 @@ class KhaitanScraper:
             self.save_to_database(articles_blog)
             total_saved += len(articles_blog)
         
+        self.total_saved = total_saved
+        
         # Final Summary
         print("\n" + "=" * 60)
         print(f"📊 FINAL SUMMARY")
@@ -1,13 +1,28 @@
-import requests
-from bs4 import BeautifulSoup
 import mysql.connector
 from datetime import datetime
 import re
 from urllib.parse import urljoin
-import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+from html_parser import listing_scope, make_soup
+from http_cache import get_response_cache
+from http_client import fetch_conditional
+from pipeline import PageError, run_pipeline
+from publications import ensure_publications_table, publication_writer
+from watermarks import load_watermark, save_watermark
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_6'
+
+# Containers read from the insights and alerts listings (see html_parser.py)
+ARTICLE_SCOPE = listing_scope('div.inner_sec')
+
+# Containers read from the newsletter listings
+NEWSLETTER_SCOPE = listing_scope('div.news_sec')
+
 load_dotenv()
 
 # Database configuration
@@ -22,6 +37,27 @@ DB_CONFIG = {
 START_DATE = datetime(2024, 1, 1)
 END_DATE = datetime(2025, 12, 31)
 
+# Pages fetched during the current run (read by run_all_scrapers.py)
+RUN_STATS = {'pages': 0}
+RUN_STATS_LOCK = threading.Lock()
+
+# Listings crawled at the same time by main(); requests to the site are still
+# capped by the shared per-host rate limiter
+CRAWL_WORKERS = 4
+
+NEWSLETTERS = [
+    ("https://www.lakshmisri.com/insights/newsletters/tax-amicus/", "Tax"),
+    ("https://www.lakshmisri.com/insights/newsletters/direct-tax-amicus/", "Direct Tax"),
+    ("https://www.lakshmisri.com/insights/newsletters/international-trade-amicus/", "International Trade"),
+    ("https://www.lakshmisri.com/insights/newsletters/ipr-amicus/", "IPR"),
+    ("https://www.lakshmisri.com/insights/newsletters/corporate-amicus/", "Corporate"),
+    ("https://www.lakshmisri.com/insights/newsletters/competition-law/", "Competition Law"),
+    ("https://www.lakshmisri.com/insights/newsletters/quarterly-update/", "Corporate Quarterly Updates"),
+    ("https://www.lakshmisri.com/insights/newsletters/lks-bis-amicus/", "BIS"),
+    ("https://www.lakshmisri.com/insights/newsletters/technolawgy-bulletin/", "Technology"),
+    ("https://www.lakshmisri.com/insights/newsletters/hyma-newsletter/", "M&A")
+]
+
 # Month mapping for parsing dates
 MONTHS = {
     'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
@@ -77,6 +113,83 @@ def parse_newsletter_date(title):
         return get_last_day_of_month(month_name, year)
     return None
 
+def parse_inner_sec(content, base_url):
+    """
+    Entries of an articles or alerts listing page (div.inner_sec cards)
+    
+    Returns:
+        list: dicts with practice_area, article_heading, article_link and
+        pub_date (None when the card has no parseable date)
+    """
+    soup = make_soup(content, ARTICLE_SCOPE)
+    entries = []
+    
+    for article in soup.find_all('div', class_='inner_sec'):
+        try:
+            # Extract practice area
+            practice_elem = article.find('p', class_='typePractice')
+            practice_area = practice_elem.text.strip() if practice_elem else 'N/A'
+            
+            # Extract title and link
+            title_elem = article.find('h2')
+            if not title_elem:
+                continue
+            link_elem = title_elem.find('a')
+            article_heading = link_elem.text.strip() if link_elem else title_elem.text.strip()
+            article_link = link_elem['href'] if link_elem and link_elem.get('href') else ''
+            
+            # Extract date
+            date_elem = article.find('p', class_='date')
+            pub_date = parse_date(date_elem.text.strip()) if date_elem else None
+            
+            entries.append({
+                'practice_area': practice_area,
+                'article_heading': article_heading,
+                'article_link': urljoin(base_url, article_link),
+                'pub_date': pub_date
+            })
+        except Exception as e:
+            print(f"Error processing entry: {e}")
+            continue
+    
+    return entries
+
+def parse_news_sec(content, base_url, is_quarterly=False):
+    """
+    Entries of a newsletter listing page (div.news_sec cards)
+    
+    The date comes from the title: "Tax Amicus: June 2025", or the quarter's
+    last month for "Quarterly Update 2025 (July - September)".
+    """
+    soup = make_soup(content, NEWSLETTER_SCOPE)
+    entries = []
+    
+    for article in soup.find_all('div', class_='news_sec'):
+        try:
+            # Extract title and link
+            link_elem = article.find('a', class_='desc_title')
+            if not link_elem:
+                continue
+            article_heading = link_elem.text.strip()
+            article_link = link_elem['href'] if link_elem.get('href') else ''
+            
+            # Parse date based on type
+            if is_quarterly:
+                pub_date = parse_quarterly_date(article_heading)
+            else:
+                pub_date = parse_newsletter_date(article_heading)
+            
+            entries.append({
+                'article_heading': article_heading,
+                'article_link': urljoin(base_url, article_link),
+                'pub_date': pub_date
+            })
+        except Exception as e:
+            print(f"Error processing newsletter: {e}")
+            continue
+    
+    return entries
+
 def setup_database():
     """Create database and table if they don't exist"""
     conn = mysql.connector.connect(
@@ -88,353 +201,216 @@ def setup_database():
     
     # Create database
     cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-    cursor.execute(f"USE {DB_CONFIG['database']}")
-    
-    # Create table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS lks_publications (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            company_name VARCHAR(50),
-            publication_type VARCHAR(100),
-            publishing_date DATE,
-            practice_area VARCHAR(200),
-            article_heading TEXT,
-            article_link TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE KEY unique_article (article_link(500))
-        )
-    """)
-    
-    conn.commit()
     cursor.close()
     conn.close()
+    
+    # Create the shared publications table
+    ensure_publications_table(DB_CONFIG)
     print("Database setup completed")
 
-def check_duplicate(article_link):
-    """Check if article link already exists in database"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        query = "SELECT COUNT(*) FROM lks_publications WHERE article_link = %s"
-        cursor.execute(query, (article_link,))
-        count = cursor.fetchone()[0]
-        
-        cursor.close()
-        conn.close()
-        
-        return count > 0
-    except Exception as e:
-        print(f"Error checking duplicate: {e}")
-        return False
+def make_writer():
+    """Batched writer for this firm's rows in the publications table; existing links are skipped"""
+    return publication_writer(DB_CONFIG, FIRM, update_columns=[])
 
-def insert_record(data):
-    """Insert record into database"""
+def flush_page(writer, page):
+    """Write one page's records in a single transaction, return how many were new (None on a database error)"""
     try:
-        # Check for duplicate first
-        if check_duplicate(data['article_link']):
-            print(f"⊗ Duplicate skipped: {data['article_heading'][:50]}...")
-            return False
-        
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        query = """
-            INSERT INTO lks_publications 
-            (company_name, publication_type, publishing_date, practice_area, article_heading, article_link)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(query, (
-            data['company_name'],
-            data['publication_type'],
-            data['publishing_date'],
-            data['practice_area'],
-            data['article_heading'],
-            data['article_link']
-        ))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"Error inserting record: {e}")
-        return False
+        counts = writer.flush()
+    except mysql.connector.Error as e:
+        print(f"✗ Page {page}: failed to save to database: {e}")
+        return None
+    print(f"Page {page}: {counts['inserted']} added, {counts['unchanged']} duplicates skipped")
+    return counts['inserted']
 
-def scrape_articles(base_url, page_param=True):
-    """Scrape articles from the given URL"""
-    page = 1
-    total_scraped = 0
-    max_pages = 50
+def crawl_listing(base_url, parse, make_row, noun, page_param=True, incremental=False):
+    """
+    Crawl one paginated LKS listing and save its entries from the date range
     
-    while page <= max_pages:
-        if page_param:
-            url = f"{base_url}?page={page}" if page > 1 else base_url
-        else:
-            url = base_url
-            
+    Later pages are fetched and parsed while the current one is saved (see
+    pipeline.py); pagination still stops in page order.
+    
+    parse: content -> entries with pub_date, article_link and article_heading
+    make_row: (entry, pub_date) -> row for the publications writer
+    noun: what the listing holds, for messages ("articles", "alerts", ...)
+    page_param: False for a listing without ?page=N pages
+    """
+    max_pages = 50 if page_param else 1
+    cache = get_response_cache()
+    processed_pages = []
+    watermark = load_watermark(DB_CONFIG, base_url) if incremental else None
+    writer = make_writer()
+    state = {'page': 1, 'total_scraped': 0, 'crawl_ok': True}
+    
+    def pages():
+        for page in range(1, max_pages + 1):
+            yield page, f"{base_url}?page={page}" if page > 1 else base_url
+    
+    def fetch_page(item):
+        page, url = item
         print(f"Scraping: {url}")
-        
-        try:
-            response = requests.get(url, timeout=30)
+        response = fetch_conditional(url, cache=cache, timeout=30)
+        if response.status_code != 404:
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            articles = soup.find_all('div', class_='inner_sec')
-            
-            if not articles:
-                print(f"No more articles found on page {page}")
-                break
-            
-            found_old_date = False
-            page_has_valid_dates = False
-            
-            for article in articles:
-                try:
-                    # Extract practice area
-                    practice_elem = article.find('p', class_='typePractice')
-                    practice_area = practice_elem.text.strip() if practice_elem else 'N/A'
-                    
-                    # Extract title and link
-                    title_elem = article.find('h2')
-                    if title_elem:
-                        link_elem = title_elem.find('a')
-                        article_heading = link_elem.text.strip() if link_elem else title_elem.text.strip()
-                        article_link = link_elem['href'] if link_elem and link_elem.get('href') else ''
-                        article_link = urljoin(base_url, article_link)
-                    else:
-                        continue
-                    
-                    # Extract date
-                    date_elem = article.find('p', class_='date')
-                    if date_elem:
-                        date_str = date_elem.text.strip()
-                        pub_date = parse_date(date_str)
-                        
-                        if pub_date:
-                            # Check if date is before Jan 1, 2024
-                            if pub_date < START_DATE:
-                                found_old_date = True
-                                continue
-                            elif pub_date > END_DATE:
-                                continue
-                            
-                            page_has_valid_dates = True
-                            
-                            # Insert into database
-                            data = {
-                                'company_name': 'LKS',
-                                'publication_type': 'Articles',
-                                'publishing_date': pub_date.strftime('%Y-%m-%d'),
-                                'practice_area': practice_area,
-                                'article_heading': article_heading,
-                                'article_link': article_link
-                            }
-                            
-                            if insert_record(data):
-                                total_scraped += 1
-                                print(f"✓ Added: {article_heading[:50]}... ({pub_date.strftime('%Y-%m-%d')})")
-                    
-                except Exception as e:
-                    print(f"Error processing article: {e}")
-                    continue
-            
-            # Stop if we've reached articles before Jan 1, 2024
-            if found_old_date and not page_has_valid_dates:
-                print("Reached articles before Jan 1, 2024, stopping pagination")
-                break
-            
-            if not page_param:
-                break
-            
-            if page >= max_pages:
-                print(f"Reached maximum page limit ({max_pages})")
-                break
-                
-            page += 1
-            time.sleep(1)  # Be polite to the server
-            
-        except Exception as e:
-            print(f"Error scraping page {page}: {e}")
-            break
+        return response
     
-    print(f"Total articles scraped: {total_scraped}")
-    return total_scraped
-
-def scrape_alerts(base_url):
-    """Scrape alerts/updates"""
-    page = 1
-    total_scraped = 0
-    max_pages = 50
+    def parse_page(item, response):
+        # A 404 past the last ?page=N ends the listing like an empty page
+        if response.unchanged or response.status_code == 404:
+            return response, []
+        return response, parse(response.content)
     
-    while page <= max_pages:
-        url = f"{base_url}?page={page}" if page > 1 else base_url
-        print(f"Scraping: {url}")
+    def save_parsed_page(item, parsed):
+        """Save one page in order; True stops pagination"""
+        page, url = item
+        response, entries = parsed
+        state['page'] = page
+        with RUN_STATS_LOCK:
+            RUN_STATS['pages'] += 1
         
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            articles = soup.find_all('div', class_='inner_sec')
-            
-            if not articles:
-                print(f"No more alerts found on page {page}")
-                break
-            
-            found_old_date = False
-            page_has_valid_dates = False
+        if response.unchanged:
+            print(f"Page {page} unchanged since last run, stopping pagination")
+            return True
+        
+        if not entries:
+            print(f"No more {noun} found on page {page}")
+            return True
+        
+        found_old_date = False
+        page_has_valid_dates = False
+        page_links = []
+        page_dates = []
+        
+        for entry in entries:
+            pub_date = entry['pub_date']
+            if not pub_date:
+                continue
             
-            for article in articles:
-                try:
-                    # Extract title and link
-                    title_elem = article.find('h2')
-                    if title_elem:
-                        link_elem = title_elem.find('a')
-                        article_heading = link_elem.text.strip() if link_elem else title_elem.text.strip()
-                        article_link = link_elem['href'] if link_elem and link_elem.get('href') else ''
-                        article_link = urljoin(base_url, article_link)
-                    else:
-                        continue
-                    
-                    # Extract date
-                    date_elem = article.find('p', class_='date')
-                    if date_elem:
-                        date_str = date_elem.text.strip()
-                        pub_date = parse_date(date_str)
-                        
-                        if pub_date:
-                            if pub_date < START_DATE:
-                                found_old_date = True
-                                continue
-                            elif pub_date > END_DATE:
-                                continue
-                            
-                            page_has_valid_dates = True
-                            
-                            data = {
-                                'company_name': 'LKS',
-                                'publication_type': 'Alerts/Updates',
-                                'publishing_date': pub_date.strftime('%Y-%m-%d'),
-                                'practice_area': 'N/A',
-                                'article_heading': article_heading,
-                                'article_link': article_link
-                            }
-                            
-                            if insert_record(data):
-                                total_scraped += 1
-                                print(f"✓ Added: {article_heading[:50]}... ({pub_date.strftime('%Y-%m-%d')})")
-                    
-                except Exception as e:
-                    print(f"Error processing alert: {e}")
-                    continue
+            page_links.append(entry['article_link'])
+            page_dates.append(pub_date)
             
-            if found_old_date and not page_has_valid_dates:
-                print("Reached alerts before Jan 1, 2024, stopping pagination")
-                break
+            # Check if date is before Jan 1, 2024
+            if pub_date < START_DATE:
+                found_old_date = True
+                continue
+            elif pub_date > END_DATE:
+                continue
             
-            if page >= max_pages:
-                print(f"Reached maximum page limit ({max_pages})")
-                break
+            page_has_valid_dates = True
             
-            page += 1
-            time.sleep(1)
+            if watermark and watermark.is_known(entry['article_link'], pub_date):
+                continue
             
-        except Exception as e:
-            print(f"Error scraping page {page}: {e}")
-            break
+            # Insert into database
+            writer.add(make_row(entry, pub_date))
+            print(f"✓ Found: {entry['article_heading'][:50]}... ({pub_date.strftime('%Y-%m-%d')})")
+        
+        inserted = flush_page(writer, page)
+        if inserted is None:
+            # Keep crawling; the rows stay buffered for the next flush
+            state['crawl_ok'] = False
+        else:
+            state['total_scraped'] += inserted
+        processed_pages.append(response)
+        
+        if watermark:
+            page_known = watermark.page_is_known(page_links, page_dates)
+            watermark.observe_page(page, page_links, page_dates)
+            if page_known:
+                print(f"Page {page} only has already-seen entries, stopping pagination")
+                return True
+        
+        # Stop if we've reached entries before Jan 1, 2024
+        if found_old_date and not page_has_valid_dates:
+            print(f"Reached {noun} before Jan 1, 2024, stopping pagination")
+            return True
+        
+        if page_param and page >= max_pages:
+            print(f"Reached maximum page limit ({max_pages})")
+        
+        return False
+    
+    try:
+        run_pipeline(pages(), fetch_page, parse_page, save_parsed_page)
+    except Exception as e:
+        page = e.item[0] if isinstance(e, PageError) else state['page']
+        print(f"Error scraping page {page}: {e}")
+        state['crawl_ok'] = False
+    
+    try:
+        writer.close()
+    except mysql.connector.Error as e:
+        print(f"✗ Failed to save the remaining {noun} to database: {e}")
+        state['crawl_ok'] = False
+    
+    # Don't cache a partial crawl, or the next run would stop at page 1
+    # before reaching the pages that failed
+    crawl_ok = state['crawl_ok']
+    if cache and crawl_ok:
+        for response in processed_pages:
+            cache.store(response)
     
-    print(f"Total alerts scraped: {total_scraped}")
+    if watermark and crawl_ok:
+        save_watermark(DB_CONFIG, watermark)
+    
+    total_scraped = state['total_scraped']
+    print(f"Total {noun} scraped: {total_scraped}")
     return total_scraped
 
-def scrape_newsletters(base_url, newsletter_type):
+def scrape_articles(base_url, page_param=True, incremental=False):
+    """Scrape articles from the given URL"""
+    def make_row(entry, pub_date):
+        return {
+            'company_name': 'LKS',
+            'publication_type': 'Articles',
+            'publishing_date': pub_date.strftime('%Y-%m-%d'),
+            'practice_area': entry['practice_area'],
+            'article_heading': entry['article_heading'],
+            'article_link': entry['article_link']
+        }
+    
+    return crawl_listing(base_url, lambda content: parse_inner_sec(content, base_url), make_row,
+                         'articles', page_param=page_param, incremental=incremental)
+
+def scrape_alerts(base_url, incremental=False):
+    """Scrape alerts/updates"""
+    def make_row(entry, pub_date):
+        return {
+            'company_name': 'LKS',
+            'publication_type': 'Alerts/Updates',
+            'publishing_date': pub_date.strftime('%Y-%m-%d'),
+            'practice_area': 'N/A',
+            'article_heading': entry['article_heading'],
+            'article_link': entry['article_link']
+        }
+    
+    return crawl_listing(base_url, lambda content: parse_inner_sec(content, base_url), make_row,
+                         'alerts', incremental=incremental)
+
+def scrape_newsletters(base_url, newsletter_type, incremental=False):
     """Scrape newsletters"""
-    page = 1
-    total_scraped = 0
-    max_pages = 50
     is_quarterly = 'quarterly' in newsletter_type.lower()
     
-    while page <= max_pages:
-        url = f"{base_url}?page={page}" if page > 1 else base_url
-        print(f"Scraping: {url}")
-        
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            articles = soup.find_all('div', class_='news_sec')
-            
-            if not articles:
-                print(f"No more newsletters found on page {page}")
-                break
-            
-            found_old_date = False
-            page_has_valid_dates = False
-            
-            for article in articles:
-                try:
-                    # Extract title and link
-                    link_elem = article.find('a', class_='desc_title')
-                    if link_elem:
-                        article_heading = link_elem.text.strip()
-                        article_link = link_elem['href'] if link_elem.get('href') else ''
-                        article_link = urljoin(base_url, article_link)
-                    else:
-                        continue
-                    
-                    # Parse date based on type
-                    if is_quarterly:
-                        pub_date = parse_quarterly_date(article_heading)
-                    else:
-                        pub_date = parse_newsletter_date(article_heading)
-                    
-                    if pub_date:
-                        if pub_date < START_DATE:
-                            found_old_date = True
-                            continue
-                        elif pub_date > END_DATE:
-                            continue
-                        
-                        page_has_valid_dates = True
-                        
-                        data = {
-                            'company_name': 'LKS',
-                            'publication_type': f'Newsletter - {newsletter_type}',
-                            'publishing_date': pub_date.strftime('%Y-%m-%d'),
-                            'practice_area': newsletter_type,
-                            'article_heading': article_heading,
-                            'article_link': article_link
-                        }
-                        
-                        if insert_record(data):
-                            total_scraped += 1
-                            print(f"✓ Added: {article_heading[:50]}... ({pub_date.strftime('%Y-%m-%d')})")
-                    
-                except Exception as e:
-                    print(f"Error processing newsletter: {e}")
-                    continue
-            
-            if found_old_date and not page_has_valid_dates:
-                print(f"Reached newsletters before Jan 1, 2024, stopping pagination")
-                break
-            
-            if page >= max_pages:
-                print(f"Reached maximum page limit ({max_pages})")
-                break
-            
-            page += 1
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"Error scraping page {page}: {e}")
-            break
+    def make_row(entry, pub_date):
+        return {
+            'company_name': 'LKS',
+            'publication_type': f'Newsletter - {newsletter_type}',
+            'publishing_date': pub_date.strftime('%Y-%m-%d'),
+            'practice_area': newsletter_type,
+            'article_heading': entry['article_heading'],
+            'article_link': entry['article_link']
+        }
     
-    print(f"Total newsletters scraped: {total_scraped}")
-    return total_scraped
+    return crawl_listing(base_url, lambda content: parse_news_sec(content, base_url, is_quarterly), make_row,
+                         'newsletters', incremental=incremental)
 
-def main():
+def main(incremental=False, workers=CRAWL_WORKERS):
+    """
+    Crawl the articles, alerts and newsletter listings concurrently
+    
+    Each listing is an independent task with its own writer (connections come
+    from the shared pool, see db_pool.py). Returns the total number of new
+    records, the same as crawling the listings one after another.
+    """
     print("Starting Lakshmisri Web Scraper...")
     print(f"Date range: {START_DATE.strftime('%Y-%m-%d')} to {END_DATE.strftime('%Y-%m-%d')}")
     print("=" * 80)
@@ -442,44 +418,38 @@ def main():
     # Setup database
     setup_database()
     
-    total_records = 0
-    
-    # 1. Scrape Articles
-    print("\n" + "=" * 80)
-    print("SCRAPING ARTICLES")
-    print("=" * 80)
-    total_records += scrape_articles("https://www.lakshmisri.com/insights/articles/")
-    
-    # 2. Scrape Alerts/Updates
-    print("\n" + "=" * 80)
-    print("SCRAPING ALERTS/UPDATES")
-    print("=" * 80)
-    total_records += scrape_alerts("https://www.lakshmisri.com/newsroom/news-briefings/")
-    
-    # 3. Scrape Newsletters
-    newsletters = [
-        ("https://www.lakshmisri.com/insights/newsletters/tax-amicus/", "Tax"),
-        ("https://www.lakshmisri.com/insights/newsletters/direct-tax-amicus/", "Direct Tax"),
-        ("https://www.lakshmisri.com/insights/newsletters/international-trade-amicus/", "International Trade"),
-        ("https://www.lakshmisri.com/insights/newsletters/ipr-amicus/", "IPR"),
-        ("https://www.lakshmisri.com/insights/newsletters/corporate-amicus/", "Corporate"),
-        ("https://www.lakshmisri.com/insights/newsletters/competition-law/", "Competition Law"),
-        ("https://www.lakshmisri.com/insights/newsletters/quarterly-update/", "Corporate Quarterly Updates"),
-        ("https://www.lakshmisri.com/insights/newsletters/lks-bis-amicus/", "BIS"),
-        ("https://www.lakshmisri.com/insights/newsletters/technolawgy-bulletin/", "Technology"),
-        ("https://www.lakshmisri.com/insights/newsletters/hyma-newsletter/", "M&A")
+    sources = [
+        ("ARTICLES", scrape_articles, ("https://www.lakshmisri.com/insights/articles/",)),
+        ("ALERTS/UPDATES", scrape_alerts, ("https://www.lakshmisri.com/newsroom/news-briefings/",)),
     ]
+    sources += [(f"NEWSLETTER: {newsletter_type}", scrape_newsletters, (url, newsletter_type))
+                for url, newsletter_type in NEWSLETTERS]
     
-    for url, newsletter_type in newsletters:
-        print("\n" + "=" * 80)
-        print(f"SCRAPING NEWSLETTER: {newsletter_type}")
-        print("=" * 80)
-        total_records += scrape_newsletters(url, newsletter_type)
+    print(f"Crawling {len(sources)} listings with {workers} workers")
+    
+    total_records = 0
+    finished = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(scrape, *args, incremental=incremental): label
+                   for label, scrape, args in sources}
+        
+        for future in as_completed(futures):
+            label = futures[future]
+            finished += 1
+            try:
+                records = future.result()
+            except Exception as e:
+                print(f"[{finished}/{len(sources)}] {label} failed: {e}")
+                continue
+            total_records += records
+            print(f"[{finished}/{len(sources)}] {label}: {records} new records")
     
     print("\n" + "=" * 80)
     print(f"SCRAPING COMPLETE!")
     print(f"Total records added to database: {total_records}")
     print("=" * 80)
+    
+    return total_records
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,10 +1,19 @@
 import requests
-from bs4 import BeautifulSoup
-import mysql.connector
 from mysql.connector import Error
-import time
 from datetime import datetime
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from html_parser import make_soup
+from http_cache import get_response_cache
+from http_client import fetch_conditional
+from pipeline import PageError, run_pipeline
+from publications import ensure_publications_table, publication_writer
+from watermarks import load_watermark, save_watermark
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_7'
 
 # Set up logging
 logging.basicConfig(
@@ -18,10 +27,17 @@ START_DATE = datetime(2024, 1, 1)
 END_DATE = datetime(2025, 12, 31)
 
 class SAMScraper:
-    def __init__(self, db_config):
-        """Initialize the scraper with database configuration"""
+    def __init__(self, db_config, incremental=False, crawl_workers=4):
+        """
+        Initialize the scraper with database configuration
+        
+        incremental: Stop each listing at the first page with only already-seen articles
+        crawl_workers: Practice x publication-type listings crawled at the same time
+        (requests to the site are still capped by the shared rate limiter)
+        """
         self.db_config = db_config
         self.company_name = "SAM"
+        self.incremental = incremental
         
         self.practices = {
             'General Corporate': 'https://www.amsshardul.com/insight-category/general-corporate/',
@@ -44,39 +60,39 @@ class SAMScraper:
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         }
+        self.crawl_workers = crawl_workers
+        self.pages_scraped = 0
+        self.stats_lock = threading.Lock()
+        
+    def practice_rank_update(self):
+        """
+        SQL assignment keeping the practice that comes first in self.practices
         
+        Listings are crawled concurrently, so an article filed under several
+        practices must not get whichever crawl happens to write it first.
+        Practices outside the list (e.g. from older rows) rank last.
+        """
+        names = ', '.join("'" + name.replace("'", "''") + "'" for name in self.practices)
+        new_rank = f"FIELD(VALUES(`practice_area`), {names})"
+        old_rank = f"FIELD(`practice_area`, {names})"
+        return (f"CASE WHEN {new_rank} > 0 AND ({old_rank} = 0 OR {new_rank} < {old_rank}) "
+                f"THEN VALUES(`practice_area`) ELSE `practice_area` END")
+    
+    def make_writer(self):
+        """Batched writer for this firm's rows; each listing crawl gets its own"""
+        return publication_writer(
+            self.db_config, FIRM,
+            update_columns=['publication_date', 'article_name'],
+            extra_updates={'practice_area': self.practice_rank_update()}
+        )
+    
     def create_table(self):
-        """Create the SAM_publications table if it doesn't exist"""
+        """Create the shared publications table if it doesn't exist"""
         try:
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor()
-            
-            create_table_query = """
-            CREATE TABLE IF NOT EXISTS SAM_publications (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                company_name VARCHAR(10) NOT NULL,
-                publication_type VARCHAR(50) NOT NULL,
-                publication_date DATE,
-                practice_area VARCHAR(100) NOT NULL,
-                article_name TEXT NOT NULL,
-                article_link VARCHAR(500) NOT NULL UNIQUE,
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_practice (practice_area),
-                INDEX idx_pub_type (publication_type),
-                INDEX idx_pub_date (publication_date)
-            )
-            """
-            
-            cursor.execute(create_table_query)
-            connection.commit()
-            logger.info("Table SAM_publications created or already exists")
-            
+            ensure_publications_table(self.db_config)
+            logger.info("Table publications created or already exists")
         except Error as e:
             logger.error(f"Error creating table: {e}")
-        finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
     
     def parse_date(self, date_string):
         """Parse date string to MySQL date format and datetime object"""
@@ -87,20 +103,38 @@ class SAMScraper:
             logger.warning(f"Error parsing date '{date_string}': {e}")
             return None, None
     
-    def get_page_content(self, url):
-        """Fetch page content with error handling"""
+    def fetch_listing(self, url, cache=None):
+        """
+        Fetch a listing page, revalidating it against the HTTP cache if given
+        
+        Returns:
+            requests.Response: The page, or the 404 past the last page of the
+            listing; None if the fetch failed
+        """
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = fetch_conditional(url, cache=cache, headers=self.headers, timeout=30)
+            if response.status_code == 404:
+                return response
             response.raise_for_status()
-            return response.text
+            with self.stats_lock:
+                self.pages_scraped += 1
+            return response
         except requests.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
     
+    def get_page_content(self, url):
+        """Fetch page content with error handling"""
+        response = self.fetch_listing(url)
+        return response.text if response else None
+    
     def extract_articles(self, html_content):
         """Extract articles from HTML content - FIXED to find great-grandparent link"""
         articles = []
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Not scoped: each card is a bare <a> around div.insight-text, with no
+        # known listing container, and scoping to every <a> would keep the
+        # navigation and footer links too, saving next to nothing
+        soup = make_soup(html_content)
         
         # Find all insight-text divs
         insight_divs = soup.find_all('div', class_='insight-text')
@@ -157,49 +191,80 @@ class SAMScraper:
         return articles
     
     def scrape_practice_publication(self, practice_name, practice_url, pub_type, pub_param):
-        """Scrape all pages for a specific practice area and publication type"""
+        """
+        Scrape all pages for a specific practice area and publication type
+        
+        Pages are fetched and parsed ahead of the one being saved (see
+        pipeline.py); pagination still stops in page order.
+        """
         all_articles = []
-        page = 1
         max_pages = 20
-        consecutive_empty_pages = 0
         max_consecutive_empty = 2
-        found_old_article = False
+        cache = get_response_cache()
+        processed_pages = []
+        source = f"{practice_url}{pub_param}"
+        watermark = load_watermark(self.db_config, source) if self.incremental else None
+        state = {'consecutive_empty_pages': 0, 'crawl_ok': True}
+        writer = self.make_writer()
+        label = f"{practice_name} - {pub_type}"
         
-        while page <= max_pages:
-            if page == 1:
-                url = f"{practice_url}{pub_param}"
-            else:
-                url = f"{practice_url}page/{page}/{pub_param}"
-            
+        def pages():
+            for page in range(1, max_pages + 1):
+                if page == 1:
+                    yield page, f"{practice_url}{pub_param}"
+                else:
+                    yield page, f"{practice_url}page/{page}/{pub_param}"
+        
+        def fetch_page(item):
+            page, url = item
             logger.info(f"Scraping: {practice_name} - {pub_type} - Page {page}")
+            # A failed fetch is retried before pagination gives up on it
+            for attempt in range(1, max_consecutive_empty + 1):
+                response = self.fetch_listing(url, cache)
+                if response is not None:
+                    return response
+                logger.warning(f"Failed to fetch page {page}. Attempt {attempt}/{max_consecutive_empty}")
+            return None
+        
+        def parse_page(item, response):
+            if response is None or response.status_code == 404 or response.unchanged:
+                return response, []
+            return response, self.extract_articles(response.text)
+        
+        def save_parsed_page(item, parsed):
+            """Filter and save one page in order; True stops pagination"""
+            page, url = item
+            response, articles = parsed
             
-            html_content = self.get_page_content(url)
-            if not html_content:
-                consecutive_empty_pages += 1
-                logger.warning(f"Failed to fetch page {page}. Attempt {consecutive_empty_pages}/{max_consecutive_empty}")
-                
-                if consecutive_empty_pages >= max_consecutive_empty:
-                    logger.info(f"No more pages found for {practice_name} - {pub_type}")
-                    break
-                
-                time.sleep(3)
-                continue
+            if response is None:
+                # Every attempt failed: stop, but don't move the watermark past this page
+                logger.error(f"Giving up on page {page} for {practice_name} - {pub_type}")
+                state['crawl_ok'] = False
+                return True
             
-            articles = self.extract_articles(html_content)
+            if response.status_code == 404:
+                logger.info(f"No more pages found for {practice_name} - {pub_type}")
+                return True
+            
+            if response.unchanged:
+                logger.info(f"Page {page} unchanged since last run. Stopping pagination for {practice_name} - {pub_type}")
+                return True
             
             if not articles:
-                consecutive_empty_pages += 1
-                logger.info(f"No articles found on page {page}. Attempt {consecutive_empty_pages}/{max_consecutive_empty}")
+                state['consecutive_empty_pages'] += 1
+                logger.info(f"No articles found on page {page}. Attempt {state['consecutive_empty_pages']}/{max_consecutive_empty}")
                 
-                if consecutive_empty_pages >= max_consecutive_empty:
+                if state['consecutive_empty_pages'] >= max_consecutive_empty:
                     logger.info(f"No more articles found for {practice_name} - {pub_type}")
-                    break
+                    return True
                 
-                time.sleep(2)
-                page += 1
-                continue
+                return False
             
-            consecutive_empty_pages = 0
+            state['consecutive_empty_pages'] = 0
+            found_old_article = False
+            
+            page_links = [article['article_link'] for article in articles]
+            page_dates = [article.get('date_obj') for article in articles]
             
             # Filter articles by date range
             filtered_articles = []
@@ -207,6 +272,9 @@ class SAMScraper:
                 date_obj = article.get('date_obj')
                 
                 if date_obj and START_DATE <= date_obj <= END_DATE:
+                    if watermark and watermark.is_known(article['article_link'], date_obj):
+                        continue
+                    
                     article['practice_area'] = practice_name
                     article['publication_type'] = pub_type
                     article['company_name'] = self.company_name
@@ -221,62 +289,69 @@ class SAMScraper:
                     print(f"  Link: {article['article_link']}")
                     print(f"{'='*80}")
                     
-                    self.save_single_article(article)
+                    writer.add(article)
                     
                 elif date_obj and date_obj < START_DATE:
                     found_old_article = True
                     logger.info(f"Found article older than Jan 2024: {article['publication_date']}")
             
+            if self.save_page(writer, page, label) is None:
+                state['crawl_ok'] = False
+            
+            processed_pages.append(response)
             all_articles.extend(filtered_articles)
             logger.info(f"Found {len(filtered_articles)} articles in date range on page {page}")
             
             if found_old_article:
                 logger.info(f"Reached articles older than Jan 2024. Stopping pagination for {practice_name} - {pub_type}")
-                break
+                return True
+            
+            if watermark:
+                page_known = watermark.page_is_known(page_links, page_dates)
+                watermark.observe_page(page, page_links, page_dates)
+                if page_known:
+                    logger.info(f"Page {page} only has already-seen articles. Stopping pagination for {practice_name} - {pub_type}")
+                    return True
             
-            time.sleep(2)
-            page += 1
+            return False
+        
+        try:
+            run_pipeline(pages(), fetch_page, parse_page, save_parsed_page)
+        except PageError as e:
+            logger.error(f"Error on page {e.item[0]} for {practice_name} - {pub_type}: {e}")
+            state['crawl_ok'] = False
+        finally:
+            writer.close()
+        
+        crawl_ok = state['crawl_ok']
+        
+        # A page that failed to save must be fetched and parsed again next run
+        if cache and crawl_ok:
+            for response in processed_pages:
+                cache.store(response)
+        
+        if watermark and crawl_ok:
+            save_watermark(self.db_config, watermark)
         
         return all_articles
     
-    def save_single_article(self, article):
-        """Save a single article to MySQL database immediately"""
+    def save_page(self, writer, page, label):
+        """
+        Save the buffered articles of one listing page in a single transaction
+        
+        Returns:
+            dict: inserted / updated / unchanged counts, or None on a database error
+        """
         try:
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor()
-            
-            insert_query = """
-            INSERT INTO SAM_publications 
-            (company_name, publication_type, publication_date, practice_area, article_name, article_link)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                publication_date = VALUES(publication_date),
-                article_name = VALUES(article_name)
-            """
-            
-            cursor.execute(insert_query, (
-                article['company_name'],
-                article['publication_type'],
-                article['publication_date'],
-                article['practice_area'],
-                article['article_name'],
-                article['article_link']
-            ))
-            
-            connection.commit()
-            
-            if cursor.rowcount > 0:
-                print(f"  ✓ Saved to database")
-            else:
-                print(f"  ℹ Already exists in database")
-            
+            counts = writer.flush()
         except Error as e:
             logger.error(f"Database error: {e}")
-            print(f"  ✗ Failed to save to database: {e}")
-        finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
+            print(f"  ✗ {label}: failed to save page {page} to database: {e}")
+            return None
+        
+        print(f"  ✓ {label} page {page}: {counts['inserted']} saved, {counts['updated']} updated, "
+              f"{counts['unchanged']} already in database")
+        return counts
     
     def scrape_all(self):
         """Main method to scrape all practices and publication types"""
@@ -285,43 +360,43 @@ class SAMScraper:
         
         self.create_table()
         
+        # The 21 practice x publication-type listings are independent crawls,
+        # each with its own stop conditions; run them side by side
+        tasks = [(practice_name, practice_url, pub_type, pub_param)
+                 for practice_name, practice_url in self.practices.items()
+                 for pub_type, pub_param in self.publication_types.items()]
+        progress = {practice_name: {'done': 0, 'articles': 0} for practice_name in self.practices}
         total_articles = []
-        practice_count = 0
+        finished = 0
         
-        for practice_name, practice_url in self.practices.items():
-            practice_count += 1
-            print(f"\n\n{'#'*80}")
-            print(f"# PRACTICE {practice_count}/{len(self.practices)}: {practice_name}")
-            print(f"{'#'*80}\n")
-            logger.info(f"Scraping Practice: {practice_name}")
-            
-            practice_articles = 0
+        logger.info(f"Crawling {len(tasks)} listings with {self.crawl_workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=self.crawl_workers) as executor:
+            futures = {executor.submit(self.scrape_practice_publication, *task): task for task in tasks}
             
-            for pub_type, pub_param in self.publication_types.items():
-                print(f"\n{'-'*80}")
-                print(f"Publication Type: {pub_type}")
-                print(f"{'-'*80}")
-                
-                articles = self.scrape_practice_publication(
-                    practice_name, 
-                    practice_url, 
-                    pub_type, 
-                    pub_param
-                )
+            for future in as_completed(futures):
+                practice_name, _, pub_type, _ = futures[future]
+                finished += 1
+                try:
+                    articles = future.result()
+                except Exception as e:
+                    logger.error(f"Crawl failed for {practice_name} - {pub_type}: {e}")
+                    articles = []
                 
                 if articles:
-                    logger.info(f"Found {len(articles)} articles for {practice_name} - {pub_type}")
+                    logger.info(f"[{finished}/{len(tasks)}] Found {len(articles)} articles for {practice_name} - {pub_type}")
                     total_articles.extend(articles)
-                    practice_articles += len(articles)
                 else:
-                    logger.info(f"No articles found for {practice_name} - {pub_type}")
+                    logger.info(f"[{finished}/{len(tasks)}] No articles found for {practice_name} - {pub_type}")
                 
-                time.sleep(3)
-            
-            print(f"\n{'='*80}")
-            print(f"Practice Summary: {practice_name}")
-            print(f"Total articles found: {practice_articles}")
-            print(f"{'='*80}\n")
+                practice = progress[practice_name]
+                practice['done'] += 1
+                practice['articles'] += len(articles)
+                if practice['done'] == len(self.publication_types):
+                    print(f"\n{'='*80}")
+                    print(f"Practice Summary: {practice_name}")
+                    print(f"Total articles found: {practice['articles']}")
+                    print(f"{'='*80}\n")
         
         print(f"\n\n{'#'*80}")
         print(f"# SCRAPING COMPLETED!")
@@ -1,73 +1,54 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 import mysql.connector
 from datetime import datetime
+from urllib.parse import urljoin
 import time
 
+from db_pool import connect
+from driver_pool import lease_driver, record_page
+from html_parser import make_soup
+from network_capture import ReplayError, ReplayIncomplete, forget_endpoint, load_endpoint, remember_endpoint, replay_pages
+from pipeline import Lookahead
+from publications import ensure_publications_table, publication_writer
+from rate_limiter import wait_for_token
+from replay_server import save_snapshot, site_url
+from watermarks import load_watermark, save_watermark
+
+# Key of this scraper's rows in the shared publications table
+FIRM = 'firm_8'
+
+# Key of the recorded listing endpoint in network_endpoints.json
+ENDPOINT_NAME = 'trilegal_knowledge_repository'
+
 class TrilegalScraperSelenium:
-    def __init__(self, db_config, headless=True):
+    def __init__(self, db_config, headless=None, incremental=False):
         """
         Initialize the scraper with database configuration
         
         db_config should contain: host, user, password, database
-        headless: Run browser in headless mode (default: True)
+        headless: Run browser in headless mode (default: SELENIUM_CONFIG['headless'])
+        incremental: Stop at the first page with only already-seen articles
         """
         self.base_url = "https://trilegal.com/knowledge-repository/"
         self.company_name = "Trilegal"
         self.db_config = db_config
         self.cutoff_date = datetime(2024, 1, 1)
         self.headless = headless
+        self.incremental = incremental
         self.driver = None
+        self.pages_scraped = 0
+        self.total_articles = 0
         
-    def setup_driver(self):
-        """Setup Selenium WebDriver"""
-        chrome_options = Options()
-        if self.headless:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.maximize_window()
-        
-    def close_driver(self):
-        """Close Selenium WebDriver"""
-        if self.driver:
-            self.driver.quit()
-    
     def connect_db(self):
-        """Establish database connection"""
-        return mysql.connector.connect(**self.db_config)
+        """Borrow a pooled database connection (close() returns it)"""
+        return connect(self.db_config)
     
     def create_table(self):
-        """Create the publications table if it doesn't exist"""
-        conn = self.connect_db()
-        cursor = conn.cursor()
-        
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS trilegal_publications (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            company_name VARCHAR(255),
-            article_type VARCHAR(100),
-            article_date DATE,
-            practice_area TEXT,
-            article_heading TEXT,
-            article_link TEXT,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE KEY unique_article (article_link(500))
-        )
-        """
-        
-        cursor.execute(create_table_query)
-        conn.commit()
-        cursor.close()
-        conn.close()
+        """Create the shared publications table if it doesn't exist"""
+        ensure_publications_table(self.db_config)
         print("Table created or already exists.")
     
     def parse_date(self, date_str):
@@ -109,10 +90,18 @@ class TrilegalScraperSelenium:
             pass
     
     def scrape_page(self, url):
-        """Scrape a single page and return articles data"""
+        """
+        Scrape a single page
+        
+        Returns:
+            tuple: (articles, should_stop), or None if the page failed to load
+        """
         try:
             print(f"Loading page: {url}")
-            self.driver.get(url)
+            wait_for_token(url)
+            self.driver.get(site_url(url))
+            record_page(self.driver)
+            self.pages_scraped += 1
             
             # Handle cookie consent on first page
             if url == self.base_url:
@@ -127,253 +116,244 @@ class TrilegalScraperSelenium:
                 time.sleep(3)  # Additional wait for dynamic content
             except TimeoutException:
                 print("Timeout waiting for articles to load")
-                return [], False
-            
-            articles = []
-            
-            # Find all article items
-            # Try multiple selectors
-            article_elements = []
-            
-            # Try finding by item class
-            try:
-                article_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.item")
-                print(f"Found {len(article_elements)} article items with class 'item'")
-            except:
-                pass
-            
-            # If no items found, try finding by article structure
-            if not article_elements:
-                try:
-                    article_elements = self.driver.find_elements(By.CSS_SELECTOR, "article")
-                    print(f"Found {len(article_elements)} article elements")
-                except:
-                    pass
-            
-            # Last resort: find all links containing knowledge_repository
-            if not article_elements:
-                links = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='knowledge_repository']")
-                print(f"Found {len(links)} knowledge repository links")
-                
-                for link in links:
-                    article_data = self._parse_article_from_link_element(link)
-                    if article_data:
-                        articles.append(article_data)
-                        if article_data['article_date'] and article_data['article_date'] < self.cutoff_date:
-                            return articles, True
-            else:
-                # Parse each article item
-                for item in article_elements:
-                    article_data = self._parse_article_item_element(item)
-                    if article_data:
-                        articles.append(article_data)
-                        if article_data['article_date'] and article_data['article_date'] < self.cutoff_date:
-                            return articles, True
+                return None
             
-            return articles, False
+            # One page_source snapshot parsed locally instead of a WebDriver
+            # round-trip for every link, span and tag of every item
+            html = self.driver.page_source
+            save_snapshot(url, html)
+            return self._parse_items_html(html, url)
             
         except Exception as e:
             print(f"Error scraping page {url}: {e}")
             import traceback
             traceback.print_exc()
-            return [], False
+            return None
     
-    def _parse_article_item_element(self, item):
-        """Parse an article from an item element"""
-        try:
-            # Find the link
-            link = item.find_element(By.CSS_SELECTOR, "a[href*='knowledge_repository']")
-            article_link = link.get_attribute('href')
-            
-            if not article_link or 'knowledge-repository/page' in article_link:
-                return None
-            
-            # Extract info div (type and date)
-            try:
-                info_div = item.find_element(By.CSS_SELECTOR, "div.info")
-                type_span = info_div.find_element(By.CSS_SELECTOR, "span.type")
-                date_span = info_div.find_element(By.CSS_SELECTOR, "span.date")
-                
-                article_type = type_span.text.strip()
-                date_str = date_span.text.strip()
-                article_date = self.parse_date(date_str)
-            except NoSuchElementException:
-                return None
-            
-            # Extract heading
-            try:
-                heading_tag = item.find_element(By.CSS_SELECTOR, "h3")
-                article_heading = heading_tag.text.strip()
-            except NoSuchElementException:
-                article_heading = ""
-            
-            # Extract practice areas from tags div
-            practice_area = ""
-            try:
-                tags_div = item.find_element(By.CSS_SELECTOR, "div.tags")
-                tags = tags_div.find_elements(By.TAG_NAME, "a")
-                practice_area = " | ".join([tag.text.strip() for tag in tags if tag.text.strip()])
-            except NoSuchElementException:
-                pass
-            
-            print(f"Parsed: {article_heading[:50]}... | Type: {article_type} | Areas: {practice_area}")
-            
-            return {
-                'company_name': self.company_name,
-                'article_type': article_type,
-                'article_date': article_date,
-                'practice_area': practice_area,
-                'article_heading': article_heading,
-                'article_link': article_link
-            }
-            
-        except Exception as e:
-            print(f"Error parsing article item: {e}")
+    def _parse_items_html(self, html, page_url=None):
+        """
+        Parse the listing markup (rendered page_source or a replayed endpoint response)
+        
+        Relative links are resolved against page_url (default: the first
+        listing page), as the browser resolved them against the page it loaded.
+        
+        Returns:
+            tuple: (articles, should_stop) - stops at the first article older
+            than the cutoff date
+        """
+        soup = make_soup(html)
+        articles = []
+        page_url = page_url or self.base_url
+        base = soup.find("base", href=True)
+        if base:
+            page_url = urljoin(page_url, base['href'])
+        
+        # Try finding by item class, then by article structure
+        items = soup.select("div.item")
+        if items:
+            print(f"Found {len(items)} article items with class 'item'")
+        else:
+            items = soup.select("article")
+            if items:
+                print(f"Found {len(items)} article elements")
+        
+        if items:
+            parsed = (self._parse_article_item(item, page_url) for item in items)
+        else:
+            # Last resort: find all links containing knowledge_repository
+            links = soup.select("a[href*='knowledge_repository']")
+            print(f"Found {len(links)} knowledge repository links")
+            parsed = (self._parse_article_from_link(link, page_url) for link in links)
+        
+        for article_data in parsed:
+            if article_data:
+                articles.append(article_data)
+                if article_data['article_date'] and article_data['article_date'] < self.cutoff_date:
+                    return articles, True
+        
+        return articles, False
+    
+    @staticmethod
+    def _text(tag):
+        """Visible text of a tag with whitespace collapsed, like WebElement.text"""
+        return " ".join(tag.get_text(" ").split()) if tag else ""
+    
+    def _tag_names(self, scope):
+        """Practice areas from the first div.tags under scope, or None if there is none"""
+        tags_div = scope.select_one("div.tags") if scope else None
+        if not tags_div:
             return None
+        names = [self._text(tag) for tag in tags_div.find_all("a")]
+        return " | ".join(name for name in names if name)
     
-    def _parse_article_from_link_element(self, link):
-        """Fallback: Parse article from link element"""
-        try:
-            article_link = link.get_attribute('href')
-            
-            if not article_link or 'knowledge-repository/page' in article_link:
-                return None
-            
-            # Get parent element
-            parent = self.driver.execute_script("return arguments[0].parentElement;", link)
-            
-            # Try to find info div
-            try:
-                info_div = parent.find_element(By.CSS_SELECTOR, "div.info")
-                type_span = info_div.find_element(By.CSS_SELECTOR, "span.type")
-                date_span = info_div.find_element(By.CSS_SELECTOR, "span.date")
-                
-                article_type = type_span.text.strip()
-                date_str = date_span.text.strip()
-                article_date = self.parse_date(date_str)
-            except NoSuchElementException:
-                return None
-            
-            # Extract heading
-            try:
-                heading_tag = link.find_element(By.CSS_SELECTOR, "h3")
-                article_heading = heading_tag.text.strip()
-            except NoSuchElementException:
-                article_heading = ""
-            
-            # Extract practice areas
-            practice_area = ""
-            try:
-                # Try in parent
-                tags_div = parent.find_element(By.CSS_SELECTOR, "div.tags")
-                tags = tags_div.find_elements(By.TAG_NAME, "a")
-                practice_area = " | ".join([tag.text.strip() for tag in tags if tag.text.strip()])
-            except NoSuchElementException:
-                # Try in grandparent
-                try:
-                    grandparent = self.driver.execute_script("return arguments[0].parentElement.parentElement;", link)
-                    tags_div = grandparent.find_element(By.CSS_SELECTOR, "div.tags")
-                    tags = tags_div.find_elements(By.TAG_NAME, "a")
-                    practice_area = " | ".join([tag.text.strip() for tag in tags if tag.text.strip()])
-                except:
-                    pass
-            
-            return {
-                'company_name': self.company_name,
-                'article_type': article_type,
-                'article_date': article_date,
-                'practice_area': practice_area,
-                'article_heading': article_heading,
-                'article_link': article_link
-            }
-            
-        except Exception as e:
+    def _build_article(self, link, page_url, info_scope, heading_scope, practice_area):
+        """Article dict from a link and the tag holding its div.info, or None"""
+        href = link.get('href')
+        if not href:
             return None
+        article_link = urljoin(page_url, href)
+        if 'knowledge-repository/page' in article_link:
+            return None
+        
+        info_div = info_scope.select_one("div.info") if info_scope else None
+        type_span = info_div.select_one("span.type") if info_div else None
+        date_span = info_div.select_one("span.date") if info_div else None
+        if not type_span or not date_span:
+            return None
+        
+        return {
+            'company_name': self.company_name,
+            'article_type': self._text(type_span),
+            'article_date': self.parse_date(self._text(date_span)),
+            'practice_area': practice_area or "",
+            'article_heading': self._text(heading_scope.select_one("h3")),
+            'article_link': article_link
+        }
+    
+    def _parse_article_item(self, item, page_url):
+        """Parse an article from an item element"""
+        link = item.select_one("a[href*='knowledge_repository']")
+        if not link:
+            return None
+        
+        article = self._build_article(link, page_url, item, item, self._tag_names(item))
+        if article:
+            print(f"Parsed: {article['article_heading'][:50]}... | Type: {article['article_type']} | Areas: {article['practice_area']}")
+        return article
+    
+    def _parse_article_from_link(self, link, page_url):
+        """Fallback: Parse article from link element and its parent"""
+        parent = link.parent
+        # Tags live in the parent, or failing that the grandparent
+        practice_area = self._tag_names(parent)
+        if practice_area is None and parent is not None:
+            practice_area = self._tag_names(parent.parent)
+        return self._build_article(link, page_url, parent, link, practice_area)
     
     def save_to_db(self, articles):
-        """Save articles to database"""
+        """
+        Save one page of articles to database in a single transaction
+        
+        Returns:
+            int: Number of rows inserted or updated, or None on a database error
+        """
         if not articles:
             return 0
         
-        conn = self.connect_db()
-        cursor = conn.cursor()
+        writer = publication_writer(
+            self.db_config, FIRM,
+            batch_size=len(articles)
+        )
         
-        insert_query = """
-        INSERT INTO trilegal_publications 
-        (company_name, article_type, article_date, practice_area, article_heading, article_link)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-        company_name = VALUES(company_name),
-        article_type = VALUES(article_type),
-        article_date = VALUES(article_date),
-        practice_area = VALUES(practice_area),
-        article_heading = VALUES(article_heading)
+        try:
+            with writer:
+                for article in articles:
+                    writer.add(article)
+        except mysql.connector.Error as e:
+            print(f"Error inserting articles: {e}")
+            return None
+        
+        counts = writer.totals()
+        return counts['inserted'] + counts['updated']
+    
+    def page_url(self, page):
+        """URL of a listing page"""
+        return self.base_url if page == 1 else f"{self.base_url}page/{page}/"
+    
+    def selenium_listing(self, max_pages=None):
         """
+        Yield (page, articles, should_stop) by rendering each listing page in Chrome
         
-        inserted = 0
-        for article in articles:
-            try:
-                cursor.execute(insert_query, (
-                    article['company_name'],
-                    article['article_type'],
-                    article['article_date'],
-                    article['practice_area'],
-                    article['article_heading'],
-                    article['article_link']
-                ))
-                inserted += cursor.rowcount
-            except Exception as e:
-                print(f"Error inserting article: {e}")
+        articles is None for a page that failed to load.
+        """
+        page = 1
+        while not max_pages or page <= max_pages:
+            url = self.page_url(page)
+            
+            print(f"\n{'='*60}")
+            print(f"Scraping page {page}: {url}")
+            print('='*60)
+            
+            result = self.scrape_page(url)
+            if result is None:
+                yield page, None, False
+            else:
+                articles, should_stop = result
+                yield page, articles, should_stop
+            page += 1
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        print(f"\nReached maximum page limit ({max_pages}). Stopping.")
+    
+    def replay_listing(self, template, max_pages=None):
+        """
+        Yield (page, articles, should_stop) from the recorded listing endpoint
         
-        return inserted
+        A page that fails after the first is yielded with articles None, like
+        a Selenium page that failed to load.
+        """
+        pages = replay_pages(template, marker='knowledge_repository', max_pages=max_pages)
+        page = 0
+        while True:
+            try:
+                markup = next(pages)
+            except StopIteration:
+                return
+            except ReplayIncomplete as e:
+                print(f"\nEndpoint replay stopped early ({e})")
+                yield page + 1, None, False
+                return
+            page += 1
+            self.pages_scraped += 1
+            print(f"\n{'='*60}")
+            print(f"Replaying page {page}: {template['url']}")
+            print('='*60)
+            
+            # Links resolve as they would on the rendered listing page
+            articles, should_stop = self._parse_items_html(markup, self.page_url(page))
+            if page == 1 and not articles:
+                raise ReplayError("No articles in the first replayed page")
+            yield page, articles, should_stop
     
-    def run(self, max_pages=None, stop_at_date=True):
+    def crawl(self, pages, watermark=None, stop_at_date=True):
         """
-        Main scraping function
+        Save articles from a listing page iterator until a stop condition
         
-        Args:
-            max_pages (int, optional): Maximum number of pages to scrape
-            stop_at_date (bool): If True, stops when reaching articles before January 2024
+        A page that failed to load or save ends the crawl and marks it as
+        incomplete, so the caller doesn't advance the watermark past it.
+        
+        Returns:
+            tuple: (articles processed, last page number, crawl_ok)
         """
-        print("Starting Trilegal Knowledge Repository Scraper (Selenium)...")
-        if max_pages:
-            print(f"Maximum pages to scrape: {max_pages}")
-        if stop_at_date:
-            print(f"Will stop at articles before January 2024")
+        total_articles = 0
+        page = 0
+        crawl_ok = True
         
-        try:
-            # Setup driver
-            self.setup_driver()
-            
-            # Create table
-            self.create_table()
-            
-            total_articles = 0
-            page = 1
-            
-            while True:
-                # Check if we've reached max_pages limit
-                if max_pages and page > max_pages:
-                    print(f"\nReached maximum page limit ({max_pages}). Stopping.")
+        # The next page is loaded and parsed while this one is saved
+        with Lookahead(pages) as pages:
+            for page, articles, should_stop in pages:
+                if articles is None:
+                    print(f"\nPage {page} failed to load. Stopping.")
+                    crawl_ok = False
                     break
                 
-                if page == 1:
-                    url = self.base_url
-                else:
-                    url = f"{self.base_url}page/{page}/"
-                
-                print(f"\n{'='*60}")
-                print(f"Scraping page {page}: {url}")
-                print('='*60)
+                page_known = False
+                if watermark and articles:
+                    links = [article['article_link'] for article in articles]
+                    dates = [article['article_date'] for article in articles]
+                    page_known = watermark.page_is_known(links, dates)
+                    watermark.observe_page(page, links, dates)
+                    articles = [article for article in articles
+                                if not watermark.is_known(article['article_link'], article['article_date'])]
                 
-                articles, should_stop = self.scrape_page(url)
+                if page_known:
+                    print("\nPage only has already-seen articles. Stopping.")
+                    break
                 
                 if articles:
                     inserted = self.save_to_db(articles)
+                    if inserted is None:
+                        crawl_ok = False
+                        inserted = 0
                     total_articles += len(articles)
                     print(f"\nFound {len(articles)} articles on page {page}")
                     print(f"Inserted/Updated {inserted} records")
@@ -389,10 +369,57 @@ class TrilegalScraperSelenium:
                 if not articles:
                     print("\nNo more articles found. Reached the end.")
                     break
-                
-                page += 1
-                time.sleep(3)  # Be polite to the server
+        
+        return total_articles, page, crawl_ok
+    
+    def run(self, max_pages=None, stop_at_date=True):
+        """
+        Main scraping function
+        
+        Uses the listing endpoint recorded by an earlier Selenium run when there
+        is one, and falls back to rendering the pages in Chrome otherwise.
+        
+        Args:
+            max_pages (int, optional): Maximum number of pages to scrape
+            stop_at_date (bool): If True, stops when reaching articles before January 2024
+        """
+        print("Starting Trilegal Knowledge Repository Scraper (Selenium)...")
+        if max_pages:
+            print(f"Maximum pages to scrape: {max_pages}")
+        if stop_at_date:
+            print(f"Will stop at articles before January 2024")
+        
+        try:
+            # Create table
+            self.create_table()
+            
+            watermark = load_watermark(self.db_config, self.base_url) if self.incremental else None
+            result = None
+            
+            template = load_endpoint(ENDPOINT_NAME)
+            if template:
+                print(f"Replaying recorded listing endpoint {template['url']}")
+                try:
+                    result = self.crawl(self.replay_listing(template, max_pages), watermark, stop_at_date)
+                except ReplayError as e:
+                    print(f"Endpoint replay failed ({e}), falling back to Selenium")
+                    forget_endpoint(ENDPOINT_NAME)
+            
+            if result is None:
+                with lease_driver(self.headless) as driver:
+                    self.driver = driver
+                    result = self.crawl(self.selenium_listing(max_pages), watermark, stop_at_date)
+                    remember_endpoint(self.driver, ENDPOINT_NAME, marker='knowledge_repository')
+            
+            total_articles, page, crawl_ok = result
+            
+            # A failed page or save must not move the watermark past unsaved articles
+            if watermark and crawl_ok:
+                save_watermark(self.db_config, watermark)
+            elif watermark:
+                print("Crawl incomplete, watermark not updated")
             
+            self.total_articles = total_articles
             print(f"\n{'='*60}")
             print(f"Scraping completed!")
             print(f"Total articles processed: {total_articles}")
@@ -400,8 +427,8 @@ class TrilegalScraperSelenium:
             print(f"{'='*60}")
             
         finally:
-            # Always close the driver
-            self.close_driver()
+            # The browser goes back to the pool for the next scraper
+            self.driver = None
 
 import os
 from dotenv import load_dotenv
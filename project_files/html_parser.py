@@ -0,0 +1,180 @@
+"""
+Shared HTML parse layer for the scrapers
+
+Every scraper builds its BeautifulSoup through make_soup(), which picks the
+tree builder from HTML_PARSER['backend'] (see config_template.py):
+
+- 'lxml' (default): C-based libxml2 parser, several times faster than
+  the pure-Python 'html.parser'
+- 'html5lib': browser-grade error recovery, slowest
+- 'html.parser': pure Python, no extra dependency
+- 'selectolax': the Lexbor C engine locates the listing containers and only
+  their HTML is handed to BeautifulSoup (needs a scope; full pages fall back
+  to lxml / html.parser)
+
+A missing backend falls back to 'html.parser' with a warning.
+
+Scoped parsing: a scraper that only reads a few listing containers declares
+them once with listing_scope() and passes it to make_soup(). Only those
+containers (and everything inside them) are materialised, so find_all() on
+the result keeps working unchanged:
+
+    LISTING_SCOPE = listing_scope('div.resource-blk')
+
+    soup = make_soup(response.content, LISTING_SCOPE)
+    blocks = soup.find_all('div', class_='resource-blk')
+
+Code that navigates to parents or siblings outside its containers must
+declare a scope that includes them (or pass no scope).
+"""
+
+import importlib
+import logging
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Module each backend needs
+BACKEND_MODULES = {
+    'lxml': 'lxml',
+    'html5lib': 'html5lib',
+    'html.parser': None,
+    'selectolax': 'selectolax.parser',
+}
+
+_available = {}
+
+# Process-wide override of HTML_PARSER['backend'] (see set_backend)
+_backend_override = None
+
+
+def _backend_available(backend):
+    if backend not in _available:
+        module = BACKEND_MODULES.get(backend, backend)
+        if module is None:
+            _available[backend] = True
+        else:
+            try:
+                importlib.import_module(module)
+                _available[backend] = True
+            except ImportError:
+                logger.warning(f"HTML parser backend '{backend}' is not installed, using 'html.parser'")
+                _available[backend] = False
+    return _available[backend]
+
+
+def _resolve_backend(backend=None):
+    backend = backend or _backend_override or get_setting('HTML_PARSER')['backend']
+    return backend if _backend_available(backend) else 'html.parser'
+
+
+def set_backend(backend):
+    """
+    Override HTML_PARSER['backend'] for every make_soup() call in this process
+    (used by parse_benchmark.py); None restores the configured backend
+
+    Returns:
+        str: The backend that will actually be used
+    """
+    global _backend_override
+    _backend_override = backend
+    return _resolve_backend()
+
+
+def _tree_builder():
+    """BeautifulSoup builder used under selectolax and for unscoped fallbacks"""
+    return 'lxml' if _backend_available('lxml') else 'html.parser'
+
+
+class Scope:
+    """
+    Listing containers a scraper reads, as simple 'tag.class' selectors
+
+    Holds both a SoupStrainer (for the BeautifulSoup backends) and the
+    equivalent CSS selector (for selectolax).
+    """
+
+    def __init__(self, selectors):
+        self.selectors = list(selectors)
+        names = []
+        classes = []
+        for selector in self.selectors:
+            name, _, css_class = selector.partition('.')
+            names.append(name or None)
+            classes.append(css_class or None)
+        self.css = ', '.join(self.selectors)
+        self.classes = None if None in classes else set(classes)
+        # Only SoupStrainer's public filters (a tag name list and a class_
+        # callable), which behave the same across bs4 releases. Several
+        # selectors are merged into one filter ("any of these tags with any of
+        # these classes"); that may keep a few extra elements, which only
+        # costs a little parsing.
+        names = None if None in names else sorted(set(names))
+        if self.classes is None:
+            self.strainer = SoupStrainer(names)
+        else:
+            self.strainer = SoupStrainer(names, class_=self._has_class)
+
+    def _has_class(self, value):
+        # While parsing, the class attribute is still the raw "a b c" string
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return any(css_class in self.classes for css_class in classes)
+
+    def __repr__(self):
+        return f"Scope({self.css!r})"
+
+
+def listing_scope(*selectors):
+    """Declare the containers a scraper reads, e.g. listing_scope('div.inner_sec')"""
+    return Scope(selectors)
+
+
+def _selectolax_fragment(markup, scope):
+    """HTML of the outermost nodes matching the scope, located with Lexbor"""
+    from selectolax.parser import HTMLParser
+
+    nodes = HTMLParser(markup).css(scope.css)
+    matched = {node.mem_id for node in nodes}
+    fragments = []
+    for node in nodes:
+        # Skip matches nested in another match; the outer one already contains them
+        parent = node.parent
+        while parent is not None and parent.mem_id not in matched:
+            parent = parent.parent
+        if parent is None:
+            fragments.append(node.html)
+    return ''.join(fragments)
+
+
+def make_soup(markup, scope=None, backend=None):
+    """
+    Parse markup with the configured backend
+
+    Args:
+        markup (str | bytes): HTML document or fragment
+        scope (Scope, optional): Only materialise these containers
+            (ignored when HTML_PARSER['scoped'] is off)
+        backend (str, optional): Override HTML_PARSER['backend']
+
+    Returns:
+        BeautifulSoup
+    """
+    backend = _resolve_backend(backend)
+    if scope is not None and not get_setting('HTML_PARSER')['scoped']:
+        scope = None
+
+    if backend == 'selectolax':
+        if scope is None:
+            return BeautifulSoup(markup, _tree_builder())
+        return BeautifulSoup(_selectolax_fragment(markup, scope), _tree_builder())
+
+    if backend == 'html5lib':
+        # html5lib ignores parse_only
+        return BeautifulSoup(markup, backend)
+
+    return BeautifulSoup(markup, backend, parse_only=scope.strainer if scope else None)
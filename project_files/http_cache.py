@@ -0,0 +1,127 @@
+"""
+On-disk conditional GET cache for listing pages
+
+Stores each listing page's ETag / Last-Modified validators and a SHA-256 of
+the body in a small SQLite file. The next run sends
+If-None-Match / If-Modified-Since and the scraper can skip parsing when the
+server answers 304 or returns a byte-identical page.
+
+Usage:
+    from http_client import fetch_conditional
+    from http_cache import get_response_cache
+
+    cache = get_response_cache()
+    response = fetch_conditional(url, cache=cache)
+    if response.unchanged:
+        ...  # nothing new on this page since the last run
+    else:
+        ...  # parse and save
+        cache.store(response)
+
+A page is only stored after the caller has finished processing it, so a run
+that crashes halfway re-processes the page next time instead of skipping it.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """SQLite-backed store of validators and body hashes, keyed by URL"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            )
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(http_cache)")]
+        if 'body' in columns:
+            # Caches written by earlier versions also kept the (unused) page bodies
+            try:
+                self.conn.execute("ALTER TABLE http_cache DROP COLUMN body")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Could not drop the body column from {path}: {e}")
+        self.conn.commit()
+
+    def lookup(self, url):
+        """Return (etag, last_modified, body_hash) for a URL, or None"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT etag, last_modified, body_hash FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+
+    def validator_headers(self, url):
+        """Conditional request headers for a previously stored URL"""
+        row = self.lookup(url)
+        if not row:
+            return {}
+        etag, last_modified, _ = row
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def is_unchanged(self, url, response):
+        """True for a 304, or a 200 whose body hash matches the stored one"""
+        if response.status_code == 304:
+            return True
+        if response.status_code != 200:
+            return False
+        row = self.lookup(url)
+        return bool(row) and row[2] == hashlib.sha256(response.content).hexdigest()
+
+    def store(self, response):
+        """Remember a processed 200 response; other statuses are ignored"""
+        if response.status_code != 200:
+            return
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO http_cache
+                (url, etag, last_modified, body_hash, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                response.request_url,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                hashlib.sha256(response.content).hexdigest(),
+                datetime.now().isoformat(timespec='seconds')
+            ))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide cache, or None when HTTP_CACHE is disabled"""
+    global _cache
+    settings = get_setting('HTTP_CACHE')
+    if not settings.get('enabled'):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(settings['path'])
+            logger.info(f"Using HTTP cache at {settings['path']}")
+        return _cache
@@ -0,0 +1,170 @@
+"""
+Shared HTTP client for the requests-based scrapers
+
+All page fetches go through fetch(), which:
+- reuses a keep-alive requests.Session per thread, with a connection pool per host
+- asks for gzip/deflate (and brotli when the brotli package is installed)
+- takes a token from the per-host rate limiter before every attempt and
+  caps the number of in-flight requests per host
+- retries connection errors, 429 and 5xx responses with exponential backoff,
+  honouring the server's Retry-After header
+- sends requests to the local replay server when SCRAPER_BASE_URL is set,
+  and saves responses as snapshots while recording (see replay_server.py)
+
+Usage:
+    from http_client import fetch
+
+    response = fetch(url, headers=self.headers, timeout=30)
+    response.raise_for_status()
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import host_slot, wait_for_token
+from replay_server import recording, save_snapshot, site_url
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bound for a single backoff or Retry-After wait (seconds)
+MAX_BACKOFF = 60
+
+# urllib3 only decodes brotli when one of these packages is importable
+if importlib.util.find_spec('brotli') or importlib.util.find_spec('brotlicffi'):
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+else:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+_local = threading.local()
+
+
+def _retry_settings():
+    """Retry count and timeout from RATE_LIMIT, overridable via .env"""
+    rate_limit = get_setting('RATE_LIMIT')
+    retries = max(0, int(os.getenv('MAX_RETRIES', rate_limit['retry_attempts'])))
+    timeout = float(os.getenv('REQUEST_TIMEOUT', rate_limit['timeout']))
+    backoff = float(rate_limit.get('backoff_factor', 1))
+    return retries, timeout, backoff
+
+
+def get_session():
+    """
+    Return this thread's pooled session
+
+    requests.Session is not guaranteed to be thread-safe, so each thread gets
+    its own; connections are still kept alive across every fetch it makes.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=8)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        _local.session = session
+    return session
+
+
+def retry_after_seconds(response):
+    """Parse a Retry-After header (seconds or HTTP date); None if absent"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch(url, headers=None, timeout=None, method='GET', **kwargs):
+    """
+    Fetch a URL through the shared session with rate limiting and retries
+
+    Args:
+        url (str): URL to fetch
+        headers (dict, optional): Extra request headers (e.g. User-Agent)
+        timeout (float, optional): Per-attempt timeout, defaults to RATE_LIMIT['timeout']
+        method (str): HTTP method
+        **kwargs: Passed through to requests (params, data, ...)
+
+    Returns:
+        requests.Response: The final response; non-retryable error statuses
+        (e.g. 404) are returned as-is for the caller to handle
+
+    Raises:
+        requests.RequestException: If every attempt failed at the connection level
+    """
+    retries, default_timeout, backoff = _retry_settings()
+    session = get_session()
+    # Rate limits stay keyed on the live host when crawling the replay server
+    target = site_url(url)
+
+    for attempt in range(retries + 1):
+        wait_for_token(url)
+        try:
+            with host_slot(url):
+                response = session.request(method, target, headers=headers,
+                                           timeout=timeout or default_timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries:
+                raise
+            delay = min(MAX_BACKOFF, backoff * (2 ** attempt))
+            logger.warning(f"{e.__class__.__name__} fetching {url}, retrying in {delay:.1f}s "
+                           f"({attempt + 1}/{retries})")
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt >= retries:
+            if response.status_code == 200 and recording():
+                # Keyed on the URL as requested, with params, not where redirects ended
+                recorded = requests.Request(method, url, params=kwargs.get('params')).prepare().url
+                save_snapshot(recorded, response.content, response.headers.get('Content-Type'),
+                              kwargs.get('data'))
+            return response
+
+        delay = retry_after_seconds(response)
+        if delay is None:
+            delay = backoff * (2 ** attempt)
+        delay = min(MAX_BACKOFF, delay)
+        logger.warning(f"HTTP {response.status_code} from {url}, retrying in {delay:.1f}s "
+                       f"({attempt + 1}/{retries})")
+        response.close()
+        time.sleep(delay)
+
+
+def fetch_conditional(url, cache=None, headers=None, **kwargs):
+    """
+    Fetch a listing page, revalidating it against the HTTP cache
+
+    Sends If-None-Match / If-Modified-Since for pages seen on a previous run.
+    The returned response gets two extra attributes:
+        request_url: the URL that was requested (before redirects)
+        unchanged: True on a 304 or when the body matches the cached copy
+
+    The caller should skip parsing unchanged pages and call
+    cache.store(response) once a changed page has been processed.
+    """
+    request_headers = dict(headers or {})
+    if cache:
+        request_headers.update(cache.validator_headers(url))
+    response = fetch(url, headers=request_headers, **kwargs)
+    response.request_url = url
+    response.unchanged = bool(cache) and cache.is_unchanged(url, response)
+    return response
@@ -0,0 +1,331 @@
+"""
+Network-capture mode for the Selenium-rendered listings
+
+ELP, Khaitan and Trilegal only need a browser because their listings load
+content with XHR/fetch calls. During a Selenium run we record the browser's
+network traffic (Chrome performance log), pick the paginated request whose
+response carries the listing markup and save it as an endpoint template.
+Later runs page through that endpoint with plain HTTP and only fall back to
+Selenium when the replay fails.
+
+Discovery (Selenium run):
+    options = enable_capture(Options())
+    driver = webdriver.Chrome(options=options)
+    ...  # load and scroll the listing as usual
+    remember_endpoint(driver, 'elp', marker='figcaption')
+
+Replay (later runs):
+    template = load_endpoint('elp')
+    if template:
+        try:
+            for markup in replay_pages(template, marker='figcaption'):
+                ...  # parse the HTML fragment like the rendered page
+        except ReplayIncomplete:
+            ...  # keep the pages already parsed, mark the crawl incomplete
+        except ReplayError:
+            forget_endpoint('elp')  # rediscover on the Selenium fallback
+
+Templates are stored as JSON in NETWORK_CAPTURE['path'] (see config_template.py).
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+from http_client import fetch
+from replay_server import live_url
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Query/form parameters that usually drive pagination, most specific first
+PAGE_PARAM_NAMES = ('paged', 'page', 'pageNo', 'page_no', 'pageNumber', 'pg',
+                    'offset', 'start', 'skip', 'from')
+
+# Parameters that count items rather than pages
+OFFSET_PARAMS = ('offset', 'start', 'skip', 'from')
+
+# Request headers worth replaying; cookies and browser fingerprints are not
+REPLAY_HEADERS = ('accept', 'content-type', 'x-requested-with', 'x-wp-nonce')
+
+_store_lock = threading.Lock()
+
+
+class ReplayError(Exception):
+    """A saved endpoint no longer returns usable listing pages"""
+
+
+class ReplayIncomplete(Exception):
+    """A page after the first failed; the endpoint still works and earlier pages stand"""
+
+
+def enable_capture(options):
+    """Turn on Chrome's performance log so network requests can be read back"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def captured_requests(driver):
+    """
+    XHR/fetch requests the browser made since the last call
+
+    Returns:
+        list: dicts with request_id, url, method, post_data, headers, status, mime_type
+    """
+    try:
+        entries = driver.get_log('performance')
+    except Exception as e:
+        logger.warning(f"Performance log not available ({e}); was enable_capture() used?")
+        return []
+
+    requests = {}
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        params = message.get('params', {})
+        request_id = params.get('requestId')
+
+        if message.get('method') == 'Network.requestWillBeSent' and params.get('type') in ('XHR', 'Fetch'):
+            request = params['request']
+            requests[request_id] = {
+                'request_id': request_id,
+                'url': request['url'],
+                'method': request.get('method', 'GET'),
+                'post_data': request.get('postData'),
+                'headers': request.get('headers', {}),
+                'status': None,
+                'mime_type': None
+            }
+        elif message.get('method') == 'Network.responseReceived' and request_id in requests:
+            response = params.get('response', {})
+            requests[request_id]['status'] = response.get('status')
+            requests[request_id]['mime_type'] = response.get('mimeType')
+
+    return list(requests.values())
+
+
+def extract_markup(text, response_type):
+    """
+    Return the HTML carried by a response body
+
+    JSON bodies (e.g. admin-ajax {"html": "..."}) are searched for string
+    values that contain markup; every such fragment is joined in order.
+    """
+    if response_type != 'json':
+        return text
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+
+    fragments = []
+
+    def walk(value):
+        if isinstance(value, str):
+            if '<' in value and '>' in value:
+                fragments.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(payload)
+    return '\n'.join(fragments)
+
+
+def _page_param(pairs):
+    """(name, value) of the first numeric pagination parameter, or None"""
+    values = dict(pairs)
+    for name in PAGE_PARAM_NAMES:
+        if name in values and str(values[name]).isdigit():
+            return name, int(values[name])
+    return None
+
+
+def _response_body(driver, request_id):
+    try:
+        body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+    except Exception:
+        return None
+    return body.get('body')
+
+
+def discover_endpoint(driver, requests, marker):
+    """
+    Build an endpoint template from captured requests
+
+    A candidate must return 200, carry a numeric pagination parameter in its
+    query string or form body, and its response must contain `marker` (a
+    string every listing page has, e.g. 'figcaption' or '/thought-leadership/').
+
+    Returns:
+        dict: Endpoint template, or None if nothing replayable was seen
+    """
+    candidates = {}
+    for request in requests:
+        if request['status'] != 200:
+            continue
+        parts = urlsplit(request['url'])
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        data = None
+        found = _page_param(query)
+        location = 'query'
+        if not found and request['post_data']:
+            data = parse_qsl(request['post_data'], keep_blank_values=True)
+            found = _page_param(data)
+            location = 'data'
+        if not found:
+            continue
+
+        response_type = 'json' if 'json' in (request['mime_type'] or '') else 'html'
+        body = _response_body(driver, request['request_id'])
+        markup = extract_markup(body, response_type) if body else None
+        if not markup or marker not in markup:
+            continue
+
+        page_param, page_value = found
+        # Store the live URL even when discovered against the replay server
+        base_url = live_url(urlunsplit((parts.scheme, parts.netloc, parts.path, '', '')))
+        key = (request['method'], base_url, page_param)
+        candidate = candidates.setdefault(key, {
+            'method': request['method'],
+            'url': base_url,
+            'params': dict(query),
+            'data': dict(data) if data is not None else None,
+            'page_param': page_param,
+            'location': location,
+            'response_type': response_type,
+            'headers': {name: value for name, value in request['headers'].items()
+                        if name.lower() in REPLAY_HEADERS},
+            'values': set()
+        })
+        candidate['values'].add(page_value)
+
+    if not candidates:
+        return None
+
+    # The request the listing fired most often is the pagination endpoint
+    best = max(candidates.values(), key=lambda c: len(c['values']))
+    values = sorted(best.pop('values'))
+    is_offset = best['page_param'] in OFFSET_PARAMS
+    if is_offset and len(values) < 2:
+        # One offset alone doesn't tell us the page size
+        return None
+    step = min(b - a for a, b in zip(values, values[1:])) if len(values) > 1 else 1
+    # The first page is often server-rendered; start one step before the first XHR
+    best['first_page'] = max(0 if is_offset else 1, values[0] - step)
+    best['step'] = step
+    best['discovered_at'] = datetime.now().isoformat(timespec='seconds')
+    return best
+
+
+def replay_pages(template, marker, max_pages=None, headers=None):
+    """
+    Page through a saved endpoint with plain HTTP
+
+    Yields the listing markup of each page. Stops when a page no longer
+    contains `marker`, repeats the previous page, or (after the first page)
+    answers with a 4xx, which is how some endpoints mark the end.
+
+    Raises:
+        ReplayError: If the first page is unusable or its request fails
+        ReplayIncomplete: If a later request fails or returns a 5xx
+    """
+    max_pages = max_pages or get_setting('NETWORK_CAPTURE')['max_pages']
+    request_headers = dict(template.get('headers') or {})
+    request_headers.update(headers or {})
+    previous = None
+
+    for index in range(max_pages):
+        value = template['first_page'] + index * template['step']
+        params = dict(template['params'])
+        data = dict(template['data']) if template['data'] is not None else None
+        (params if template['location'] == 'query' else data)[template['page_param']] = str(value)
+
+        try:
+            response = fetch(template['url'], headers=request_headers, method=template['method'],
+                             params=params, data=data)
+        except Exception as e:
+            if index == 0:
+                raise ReplayError(f"Request to {template['url']} failed: {e}")
+            raise ReplayIncomplete(f"Request for page {index + 1} of {template['url']} failed: {e}")
+        if response.status_code != 200:
+            if index == 0:
+                raise ReplayError(f"HTTP {response.status_code} from {template['url']}")
+            if 400 <= response.status_code < 500:
+                # Past the last page
+                return
+            raise ReplayIncomplete(f"HTTP {response.status_code} for page {index + 1} of {template['url']}")
+
+        markup = extract_markup(response.text, template['response_type'])
+        if not markup or marker not in markup or markup == previous:
+            if index == 0:
+                raise ReplayError(f"First page from {template['url']} has no listing markup")
+            return
+        previous = markup
+        yield markup
+
+
+def _load_store(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_store(path, store):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(store, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_endpoint(name):
+    """Return the saved template for a listing, or None (also when capture is disabled)"""
+    settings = get_setting('NETWORK_CAPTURE')
+    if not settings.get('enabled'):
+        return None
+    with _store_lock:
+        try:
+            return _load_store(settings['path']).get(name)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read {settings['path']}: {e}")
+            return None
+
+
+def save_endpoint(name, template):
+    settings = get_setting('NETWORK_CAPTURE')
+    with _store_lock:
+        store = _load_store(settings['path'])
+        store[name] = template
+        _save_store(settings['path'], store)
+    logger.info(f"Saved endpoint for {name}: {template['method']} {template['url']} "
+                f"({template['page_param']} from {template['first_page']}, step {template['step']})")
+
+
+def forget_endpoint(name):
+    """Drop a template that stopped working so the next Selenium run rediscovers it"""
+    settings = get_setting('NETWORK_CAPTURE')
+    with _store_lock:
+        store = _load_store(settings['path'])
+        if store.pop(name, None) is not None:
+            _save_store(settings['path'], store)
+
+
+def remember_endpoint(driver, name, marker):
+    """Discover the listing endpoint from this Selenium session and save it"""
+    if not get_setting('NETWORK_CAPTURE').get('enabled'):
+        return None
+    template = discover_endpoint(driver, captured_requests(driver), marker)
+    if template:
+        save_endpoint(name, template)
+    else:
+        logger.info(f"No replayable listing endpoint seen for {name}")
+    return template
@@ -0,0 +1,451 @@
+"""
+Offline parse-throughput benchmark for the firm extractors
+
+Runs each firm's extraction code (no network, no database) over saved HTML
+fixtures many times and reports pages/sec, records/sec and peak memory per
+firm and HTML_PARSER backend, optionally against a saved baseline.
+
+Fixtures live in benchmark_fixtures/<firm>/listing_*.html and detail_*.html.
+`record` refreshes them from the live sites (Selenium firms through the
+driver pool). A firm without recorded fixtures is benchmarked on synthetic
+pages built from the markup its extractor expects, wrapped in typical page
+chrome; such rows are marked "synthetic" and are only comparable with
+other synthetic runs.
+
+Usage:
+    python parse_benchmark.py
+    python parse_benchmark.py --backends lxml html.parser selectolax --repeat 50
+    python parse_benchmark.py --firms firm_1 firm_6 --save-baseline
+    python parse_benchmark.py record --firms firm_1 firm_6
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import html_parser
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_fixtures')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Scrapers are only constructed, never connected
+DUMMY_DB = {'host': 'localhost', 'user': 'benchmark', 'password': '', 'database': 'publications_db'}
+
+SYNTHETIC_CARDS = 24
+
+
+# ============================================================================
+# Synthetic fixtures
+#
+# Each builder returns the markup of one card in the shape the firm's
+# extractor reads; page() wraps the cards in head, navigation, scripts and
+# footer so scoped parsing has something to skip.
+# ============================================================================
+
+def card_date(index):
+    """Publication dates walking back from Oct 2025, all after the Jan 2024 cutoff"""
+    return datetime(2025, 10, 1) - timedelta(days=index * 20)
+
+
+def page(cards, wrapper='<div class="listing">{}</div>'):
+    nav = ''.join(f'<li><a href="/section-{i}/">Section {i}</a></li>' for i in range(150))
+    scripts = ''.join(f'<script>window.__chunk{i} = {json.dumps("x" * 400)};</script>' for i in range(20))
+    footer = ''.join(f'<p class="footer-note">Footer paragraph {i} with some legal boilerplate text.</p>'
+                     for i in range(60))
+    return (
+        '<!DOCTYPE html><html><head><title>Listing</title>'
+        '<style>' + 'body{margin:0}' * 200 + '</style>' + scripts + '</head><body>'
+        f'<header><nav><ul>{nav}</ul></nav></header>'
+        f'<main>{wrapper.format("".join(cards))}</main>'
+        f'<footer>{footer}</footer></body></html>'
+    )
+
+
+def azb_card(i):
+    d = card_date(i)
+    return (f'<div class="resource-blk"><a href="/resource/article-{i}/">'
+            f'<span class="label-span">Articles</span><h3>AZB article number {i}</h3></a>'
+            f'<div class="resource-tags"><span>{d.strftime("%b %d, %Y")}</span>'
+            f'<a href="/practice/banking/">Banking &amp; Finance</a></div></div>')
+
+
+def cam_card(i):
+    d = card_date(i)
+    return (f'<article><header class="lxb_af-post_header">'
+            f'<h1 class="lxb_af-template_tags-get_linked_post_title">'
+            f'<a href="https://disputeresolution.cyrilamarchandblogs.com/post-{i}/">CAM blog post {i}</a></h1>'
+            f'<time class="lxb_af-template_tags-get_post_date">{d.strftime("%B %d, %Y").replace(" 0", " ")}</time>'
+            f'<div class="lxb_af-template_tags-get_post_categories"><a href="/category/arbitration/">Arbitration</a></div>'
+            f'</header><div class="entry">Post body excerpt {i}</div></article>')
+
+
+def elp_card(i):
+    d = card_date(i)
+    return (f'<figure><img src="/img/{i}.jpg"><figcaption>'
+            f'<p><span>Articles</span><span>{d.day}th {d.strftime("%b %Y")}</span></p>'
+            f'<p>ELP thought leadership piece {i}</p>'
+            f'<p><a href="/practice/tax/">Tax</a><a href="/practice/corporate/">Corporate</a></p>'
+            f'<a class="btn" href="https://elplaw.in/leadership/piece-{i}/">View More</a>'
+            f'</figcaption></figure>')
+
+
+def induslaw_card(i):
+    d = card_date(i)
+    return (f'<div class="media-item"><p><a class="mediatitle" target="_blank" href="/publication/{i}">'
+            f'IndusLaw publication {i}</a></p>'
+            f'<p><strong>Practice Area :</strong><span><a href="/practice/funds">Funds</a></span></p>'
+            f'<p><strong>Published on  :</strong> {d.strftime("%d/%m/%Y")}</p></div>')
+
+
+def khaitan_card(i):
+    d = card_date(i)
+    return (f'<div class="card"><span>Ergo Update</span><span>{d.strftime("%d %b")} \'{d.strftime("%y")}</span>'
+            f'<a href="/thought-leadership/ergo-update-{i}">Khaitan Ergo update number {i}</a></div>')
+
+
+def khaitan_detail(i):
+    body = ''.join(f'<p>Paragraph {n} of the article body.</p>' for n in range(40))
+    return page([f'<article>{body}</article>'
+                 f'<div class="public-footer"><p>Competition / Antitrust</p></div>'])
+
+
+def lks_card(i):
+    d = card_date(i)
+    return (f'<div class="inner_sec"><p class="typePractice">Indirect Tax</p>'
+            f'<h2><a href="/insights/articles/article-{i}/">LKS article {i}</a></h2>'
+            f'<p class="date">{d.day} {d.strftime("%B %Y")}</p></div>')
+
+
+def sam_card(i):
+    d = card_date(i)
+    return (f'<a href="https://www.amsshardul.com/insight/insight-{i}/"><div class="insight-card">'
+            f'<div class="insight-text"><div class="date"><p>{d.strftime("%B %d, %Y")}</p></div>'
+            f'<h3>SAM insight {i}</h3></div></div></a>')
+
+
+def trilegal_card(i):
+    d = card_date(i)
+    return (f'<div class="item"><a href="/knowledge_repository/update-{i}/"><h3>Trilegal update {i}</h3></a>'
+            f'<div class="info"><span class="type">Update</span><span class="date">{d.strftime("%d %b %Y")}</span></div>'
+            f'<div class="tags"><a href="/tag/tmt/">TMT</a><a href="/tag/data/">Data Protection</a></div></div>')
+
+
+def synthetic(card):
+    return {'listing': [page([card(i) for i in range(SYNTHETIC_CARDS)]).encode('utf-8')]}
+
+
+# ============================================================================
+# Firms
+#
+# make: build a scraper without touching the database or network
+# extract: {kind: callable(scraper, markup) -> list of records}
+# record: [(kind, url, 'http' | 'browser')] pages saved by `record`
+# ============================================================================
+
+def make_firm_1():
+    from firm_1 import AZBResourceScraper
+    return AZBResourceScraper(DUMMY_DB)
+
+
+def make_firm_2():
+    from firm_2 import CAMScraper
+    return CAMScraper(DUMMY_DB)
+
+
+def make_firm_3():
+    from firm_3 import ELPScraper
+    return ELPScraper(DUMMY_DB)
+
+
+def make_firm_4():
+    from firm_4 import PublicationScraper
+    return PublicationScraper(setup_db=False)
+
+
+def make_firm_5():
+    from firm_5 import KhaitanScraper
+    return KhaitanScraper(DUMMY_DB)
+
+
+def make_firm_6():
+    import firm_6
+    return firm_6
+
+
+def make_firm_7():
+    from firm_7 import SAMScraper
+    return SAMScraper(DUMMY_DB)
+
+
+def make_firm_8():
+    from firm_8 import TrilegalScraperSelenium
+    return TrilegalScraperSelenium(DUMMY_DB)
+
+
+FIRMS = {
+    'firm_1': {
+        'make': make_firm_1,
+        'extract': {'listing': lambda s, m: s.parse_listing(m)},
+        'synthetic': lambda: synthetic(azb_card),
+        'record': [('listing', 'https://www.azbpartners.com/resource/', 'http'),
+                   ('listing', 'https://www.azbpartners.com/resource/page/2/', 'http')],
+    },
+    'firm_2': {
+        'make': make_firm_2,
+        'extract': {'listing': lambda s, m: s.parse_blog_headers(m, 'Dispute Resolution')},
+        'synthetic': lambda: synthetic(cam_card),
+        'record': [('listing', 'https://disputeresolution.cyrilamarchandblogs.com/', 'http'),
+                   ('listing', 'https://disputeresolution.cyrilamarchandblogs.com/page/2/', 'http')],
+    },
+    'firm_3': {
+        'make': make_firm_3,
+        'extract': {'listing': lambda s, m: s.extract_articles(m)},
+        'synthetic': lambda: synthetic(elp_card),
+        'record': [('listing', 'https://elplaw.in/thought-leadership/', 'browser')],
+    },
+    'firm_4': {
+        'make': make_firm_4,
+        'extract': {'listing': lambda s, m: s.parse_publications(m, 'IndusLaw')[0]},
+        'synthetic': lambda: synthetic(induslaw_card),
+        'record': [('listing', 'https://induslaw.com/publication', 'http')],
+    },
+    'firm_5': {
+        'make': make_firm_5,
+        'extract': {
+            'listing': lambda s, m: s.parse_thought_leadership(m, 'https://www.khaitanco.com/thought-leadership'),
+            'detail': lambda s, m: [s.parse_practice_area(html_parser.make_soup(m))],
+        },
+        'synthetic': lambda: dict(synthetic(khaitan_card),
+                                  detail=[khaitan_detail(i).encode('utf-8') for i in range(3)]),
+        'record': [('listing', 'https://www.khaitanco.com/thought-leadership', 'browser')],
+        # Detail pages are the first few articles of the recorded listing
+        'detail_links': lambda s, m: [a['article_link'] for a in
+                                      s.parse_thought_leadership(m, 'https://www.khaitanco.com/thought-leadership')[:3]],
+    },
+    'firm_6': {
+        'make': make_firm_6,
+        'extract': {'listing': lambda s, m: s.parse_inner_sec(m, 'https://www.lakshmisri.com/insights/articles/')},
+        'synthetic': lambda: synthetic(lks_card),
+        'record': [('listing', 'https://www.lakshmisri.com/insights/articles/', 'http'),
+                   ('listing', 'https://www.lakshmisri.com/newsroom/news-briefings/', 'http')],
+    },
+    'firm_7': {
+        'make': make_firm_7,
+        'extract': {'listing': lambda s, m: s.extract_articles(m)},
+        'synthetic': lambda: synthetic(sam_card),
+        'record': [('listing', 'https://www.amsshardul.com/insight-category/general-corporate/?category=alerts', 'http')],
+    },
+    'firm_8': {
+        'make': make_firm_8,
+        'extract': {'listing': lambda s, m: s._parse_items_html(m)[0]},
+        'synthetic': lambda: synthetic(trilegal_card),
+        'record': [('listing', 'https://trilegal.com/knowledge-repository/', 'browser')],
+    },
+}
+
+
+def load_fixtures(firm):
+    """Return ({kind: [markup, ...]}, source) for a firm"""
+    fixtures = {}
+    for kind in FIRMS[firm]['extract']:
+        paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, firm, f'{kind}_*.html')))
+        if paths:
+            fixtures[kind] = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    fixtures[kind].append(f.read())
+    if fixtures:
+        return fixtures, 'recorded'
+    return FIRMS[firm]['synthetic'](), 'synthetic'
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the extractors' per-article prints and logging while timing"""
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(previous)
+
+
+def run_pass(spec, scraper, fixtures):
+    """Extract every fixture once; returns (pages, records)"""
+    pages = records = 0
+    for kind, markups in fixtures.items():
+        extract = spec['extract'][kind]
+        for markup in markups:
+            records += len(extract(scraper, markup))
+            pages += 1
+    return pages, records
+
+
+def benchmark_firm(firm, backend, repeat):
+    spec = FIRMS[firm]
+    fixtures, source = load_fixtures(firm)
+    used_backend = html_parser.set_backend(backend)
+    try:
+        with quiet():
+            scraper = spec['make']()
+            run_pass(spec, scraper, fixtures)  # warm up imports and caches
+
+            start = time.perf_counter()
+            for _ in range(max(1, repeat)):
+                pages, records = run_pass(spec, scraper, fixtures)
+            elapsed = time.perf_counter() - start
+
+            # Peak memory from a separate pass; tracemalloc would skew the timing
+            tracemalloc.start()
+            run_pass(spec, scraper, fixtures)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        html_parser.set_backend(None)
+
+    return {
+        'firm': firm,
+        'backend': used_backend,
+        'source': source,
+        'pages': pages,
+        'records': records,
+        'pages_per_sec': pages * max(1, repeat) / elapsed,
+        'records_per_sec': records * max(1, repeat) / elapsed,
+        'peak_mb': peak / (1024 * 1024),
+    }
+
+
+def result_key(result):
+    return f"{result['firm']}|{result['backend']}|{result['source']}"
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(path, results):
+    payload = {
+        'saved_at': datetime.now().isoformat(timespec='seconds'),
+        'results': {result_key(r): {k: r[k] for k in ('pages_per_sec', 'records_per_sec', 'peak_mb')}
+                    for r in results}
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    print(f"Baseline saved to {path}")
+
+
+def print_report(results, baseline):
+    print("\n" + "=" * 96)
+    print("PARSE BENCHMARK")
+    print("=" * 96)
+    print(f"{'Firm':<8} {'Backend':<12} {'Fixtures':<10} {'Pages/s':>10} {'Records/s':>11} "
+          f"{'Peak MB':>9} {'vs baseline':>12}")
+    print("-" * 96)
+    for result in results:
+        base = baseline.get(result_key(result))
+        if base:
+            change = (result['pages_per_sec'] / base['pages_per_sec'] - 1) * 100
+            delta = f"{change:+.1f}%"
+        else:
+            delta = "-"
+        print(f"{result['firm']:<8} {result['backend']:<12} {result['source']:<10} "
+              f"{result['pages_per_sec']:>10.1f} {result['records_per_sec']:>11.1f} "
+              f"{result['peak_mb']:>9.2f} {delta:>12}")
+    print("=" * 96)
+
+
+def run(firms, backends, repeat, baseline_path=BASELINE_PATH, write_baseline=False):
+    results = []
+    for firm in firms:
+        for backend in backends:
+            results.append(benchmark_firm(firm, backend, repeat))
+    print_report(results, load_baseline(baseline_path))
+    if write_baseline:
+        save_baseline(baseline_path, results)
+    return results
+
+
+# ============================================================================
+# Recording
+# ============================================================================
+
+def save_fixture(firm, kind, index, markup):
+    directory = os.path.join(FIXTURE_DIR, firm)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{kind}_{index}.html')
+    with open(path, 'wb') as f:
+        f.write(markup if isinstance(markup, bytes) else markup.encode('utf-8'))
+    print(f"  saved {path}")
+
+
+def fetch_markup(url, how):
+    if how == 'browser':
+        from driver_pool import lease_driver, record_page
+        with lease_driver() as driver:
+            driver.get(url)
+            record_page(driver)
+            time.sleep(5)  # let the listing XHR render
+            return driver.page_source
+    from http_client import fetch
+    response = fetch(url, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+def record(firms):
+    """Save fresh listing (and detail) pages from the live sites as fixtures"""
+    for firm in firms:
+        spec = FIRMS[firm]
+        print(f"Recording {firm}")
+        counters = {}
+        listing = None
+        for kind, url, how in spec['record']:
+            markup = fetch_markup(url, how)
+            counters[kind] = counters.get(kind, 0) + 1
+            save_fixture(firm, kind, counters[kind], markup)
+            listing = listing or markup
+        if 'detail_links' in spec and listing is not None:
+            with quiet():
+                links = spec['detail_links'](spec['make'](), listing)
+            for index, url in enumerate(links, 1):
+                save_fixture(firm, 'detail', index, fetch_markup(url, 'http'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline parse-throughput benchmark for the firm extractors")
+    parser.add_argument('command', nargs='?', choices=['run', 'record'], default='run')
+    parser.add_argument('--firms', nargs='+', default=sorted(FIRMS), help="Firms to benchmark (default: all)")
+    parser.add_argument('--backends', nargs='+', default=[None],
+                        help="HTML_PARSER backends to compare (default: the configured one)")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed passes over the fixtures (default: 20)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline file to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Write this run's results as the baseline")
+    args = parser.parse_args()
+
+    unknown = [firm for firm in args.firms if firm not in FIRMS]
+    if unknown:
+        parser.error(f"Unknown firms: {', '.join(unknown)}")
+
+    if args.command == 'record':
+        record(args.firms)
+    else:
+        run(args.firms, args.backends, args.repeat, args.baseline, args.save_baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Staged fetch -> parse -> write pipeline for paginated listings
+
+A listing loop that fetches a page, parses it, saves its rows and only then
+requests the next page leaves the network idle during DB commits and the
+database idle during fetches. run_pipeline() overlaps the three stages:
+
+    fetch workers --(bounded queue)--> parse workers --(bounded queue)--> writer
+
+The writer stage runs in the calling thread and receives pages strictly in
+crawl order, so pagination rules that depend on earlier pages (stop at the
+first old article, at an unchanged page, at a page of already-seen links)
+behave exactly as in a sequential loop. When it asks to stop, pages already
+fetched ahead are dropped. At most PIPELINE['window'] pages are in flight at
+once, which bounds both the wasted requests and the memory held in the
+queues; a slow writer backs up the queues and pauses the fetchers. Every
+fetch still goes through the shared per-host rate limiter.
+
+For loops that already produce their pages from a generator, Lookahead
+is the lighter option: it runs the generator a page or two ahead in a
+background thread while the loop body saves the current page.
+
+Plugging in a scraper's page loop:
+
+    def pages():
+        for page in range(1, max_pages + 1):
+            yield page, f"{base_url}?page={page}"
+
+    def save(item, entries):
+        ...                  # add entries to the writer, flush the page
+        return done          # True stops the crawl after this page
+
+    run_pipeline(pages(),
+                 fetch=lambda item: fetch(item[1], timeout=30),
+                 parse=lambda item, response: parse_listing(response.content),
+                 write=save)
+"""
+
+import logging
+import queue
+import threading
+
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class PageError(Exception):
+    """A fetch or parse failure, raised by run_pipeline() when the writer reaches that page"""
+
+    def __init__(self, item, error):
+        super().__init__(str(error))
+        self.item = item
+        self.error = error
+
+
+def _start_stage(name, inbox, outbox, work, workers, downstream_workers, stop):
+    """
+    Start worker threads applying work(item, value) to each unit from inbox
+
+    Once stop is set, units are passed along untouched so the writer can
+    account for them. The last worker to finish signals every downstream worker.
+    """
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def run():
+        while True:
+            unit = inbox.get()
+            if unit is _DONE:
+                break
+            seq, item, value, error = unit
+            if error is None and not stop.is_set():
+                try:
+                    value = work(item, value)
+                except Exception as e:
+                    error = PageError(item, e)
+            outbox.put((seq, item, value, error))
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(downstream_workers):
+                outbox.put(_DONE)
+
+    threads = [threading.Thread(target=run, name=f"pipeline-{name}-{i}", daemon=True)
+               for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def run_pipeline(items, fetch, parse, write, fetch_workers=None, parse_workers=None, window=None):
+    """
+    Crawl items with overlapping fetch, parse and write stages
+
+    Args:
+        items (iterable): Pages in crawl order, e.g. (page, url) tuples;
+            consumed lazily, so it may be unbounded
+        fetch (callable): fetch(item) -> raw page, run on fetch_workers threads
+        parse (callable): parse(item, raw) -> records, run on parse_workers threads
+        write (callable): write(item, records), called in the calling thread in
+            crawl order; returning True stops the crawl after this page
+        fetch_workers, parse_workers, window (int, optional): Default to the
+            PIPELINE settings; window is the number of pages in flight
+
+    Returns:
+        dict: pages written, and pages queued past the end of the crawl and dropped
+
+    Raises:
+        PageError: fetch or parse failed for the next page in order; the
+            crawl stops there, as a sequential loop would
+    """
+    settings = get_setting('PIPELINE')
+    fetch_workers = fetch_workers or settings['fetch_workers']
+    parse_workers = parse_workers or settings['parse_workers']
+    window = max(1, window or settings['window'])
+
+    stop = threading.Event()
+    slots = threading.Semaphore(window)
+    fetch_queue = queue.Queue(window)
+    parse_queue = queue.Queue(window)
+    results = queue.Queue(window)
+
+    def take_slot():
+        """Wait for room in the window; False once the crawl has stopped"""
+        while not slots.acquire(timeout=0.1):
+            if stop.is_set():
+                return False
+        if stop.is_set():
+            slots.release()
+            return False
+        return True
+
+    def feed():
+        seq = 0
+        try:
+            for item in items:
+                if not take_slot():
+                    return
+                fetch_queue.put((seq, item, None, None))
+                seq += 1
+        except Exception as e:
+            # A failing page generator ends the crawl at that point
+            if take_slot():
+                fetch_queue.put((seq, None, None, e))
+        finally:
+            for _ in range(fetch_workers):
+                fetch_queue.put(_DONE)
+
+    feeder = threading.Thread(target=feed, name="pipeline-feed", daemon=True)
+    feeder.start()
+    threads = [feeder]
+    threads += _start_stage('fetch', fetch_queue, parse_queue, lambda item, _: fetch(item),
+                            fetch_workers, parse_workers, stop)
+    threads += _start_stage('parse', parse_queue, results, parse,
+                            parse_workers, 1, stop)
+
+    stats = {'pages': 0, 'dropped': 0}
+    pending = {}
+    next_seq = 0
+    finished = False
+    try:
+        while True:
+            unit = results.get()
+            if unit is _DONE:
+                finished = True
+                break
+            seq, item, records, error = unit
+            if stop.is_set():
+                stats['dropped'] += 1
+                slots.release()
+                continue
+            pending[seq] = (item, records, error)
+            while next_seq in pending and not stop.is_set():
+                item, records, error = pending.pop(next_seq)
+                next_seq += 1
+                slots.release()
+                if error is not None:
+                    raise error
+                stats['pages'] += 1
+                if write(item, records):
+                    stop.set()
+            if stop.is_set():
+                stats['dropped'] += len(pending)
+                for _ in pending:
+                    slots.release()
+                pending.clear()
+    finally:
+        stop.set()
+        # Unblock any worker still waiting on a full queue
+        while not finished:
+            if results.get() is _DONE:
+                finished = True
+            else:
+                slots.release()
+        for thread in threads:
+            thread.join()
+
+    if stats['dropped']:
+        logger.debug(f"Pipeline dropped {stats['dropped']} pages queued past the end of the crawl")
+    return stats
+
+
+class Lookahead:
+    """
+    Iterate over pages while the next ones are already being fetched
+
+    Runs iterable (typically a generator that fetches and parses one page per
+    item) up to `pages` items ahead of the loop consuming it, in a background
+    thread:
+
+        with Lookahead(self.listing_pages()) as pages:
+            for page, articles in pages:
+                ...   # save; break at the date cutoff or an empty page
+
+    Leaving the block stops the generator after the page it is working on,
+    and that page is discarded. Exceptions from the generator are raised at
+    the point in the loop where they happened. pages=0 (LOOKAHEAD['pages'])
+    iterates in the calling thread as before.
+    """
+
+    def __init__(self, iterable, pages=None):
+        self.iterable = iterable
+        self.iterator = iter(iterable)
+        self.pages = get_setting('LOOKAHEAD')['pages'] if pages is None else pages
+        self.thread = None
+        if self.pages > 0:
+            self.stop = threading.Event()
+            self.slots = threading.Semaphore(self.pages)
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self._produce, name="lookahead", daemon=True)
+            self.thread.start()
+
+    def _produce(self):
+        try:
+            while True:
+                while not self.slots.acquire(timeout=0.1):
+                    if self.stop.is_set():
+                        return
+                if self.stop.is_set():
+                    return
+                try:
+                    item = next(self.iterator)
+                except StopIteration:
+                    return
+                self.queue.put((item, None))
+        except Exception as e:
+            self.queue.put((None, e))
+        finally:
+            self.queue.put((_DONE, None))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.thread is None:
+            return next(self.iterator)
+        item, error = self.queue.get()
+        if item is _DONE:
+            self.queue.put((_DONE, None))
+            raise StopIteration
+        if error is not None:
+            raise error
+        self.slots.release()
+        return item
+
+    def close(self):
+        """Stop fetching ahead and discard pages not consumed yet"""
+        if self.thread is not None:
+            self.stop.set()
+            self.thread.join()
+        close = getattr(self.iterable, 'close', None)
+        if close:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,524 @@
+"""
+Canonical publications table shared by every scraper
+
+All eight scrapers write to one `publications` table with the same column
+names, keyed by (firm, url_hash) where url_hash is the 16-byte url_key() of
+the article link (see url_key.py), so links of any length dedupe on a compact
+fixed-width key and variants of one URL (tracking parameters, trailing
+slash, http/https) count as one article. Composite indexes make the usual cross-firm questions single-index
+range scans:
+
+- idx_date (publication_date): everything published in a date range
+- idx_firm_date (firm, publication_date): one firm's output over time
+- idx_practice_date (practice_area, publication_date): one practice area over time
+
+Scrapers keep building their rows with their own field names (article_name,
+publishing_date, article_type, link, ...); PublicationWriter maps them onto
+the canonical columns before the batched upsert:
+
+    writer = publication_writer(db_config, 'firm_2', update_columns=[])
+    writer.add({'company_name': 'CAM', 'article_name': ..., 'article_link': ...})
+    writer.close()
+
+The per-firm tables written before this (azb_partners_publications,
+cam_publications, ...) are left in place. Backfill them once with:
+
+    python publications.py migrate
+
+Rows whose url_hash predates URL normalisation (a plain MD5 of the link) are
+re-keyed, and duplicates merged, with `python publications.py rehash`;
+migrate does this for the rows it copies.
+
+Firm_4 used to write to a table that was already called `publications`;
+ensure_publications_table() renames it to induslaw_publications before
+creating the canonical table, and the migration backfills it like the others.
+
+Statistics rollup: publication_stats holds the number of publications per
+(firm, month, publication_type, practice_area). PublicationWriter updates it
+in the same transaction as each batch of upserts, from the batch's rows as
+they were before and after the write, so counts stay exact when an update
+moves an article to another month or practice area. Statistics and
+dashboards read rollup_counts() instead of scanning `publications`; its cost
+depends on the number of groups, not on the number of articles. After
+writing to `publications` outside PublicationWriter, rebuild it with:
+
+    python publications.py rebuild-stats
+"""
+
+import argparse
+import logging
+import os
+from collections import Counter
+
+import mysql.connector
+
+from bulk_writer import BulkWriter
+from db_pool import connect
+from seen_index import get_seen_index
+from url_key import url_key
+
+logger = logging.getLogger(__name__)
+
+PUBLICATIONS_TABLE = 'publications'
+
+CREATE_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS publications (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    firm VARCHAR(16) NOT NULL,
+    url_hash BINARY(16) NOT NULL,
+    company_name VARCHAR(255) NOT NULL,
+    publication_type VARCHAR(255),
+    publication_date DATE,
+    practice_area VARCHAR(255),
+    article_heading TEXT NOT NULL,
+    article_link TEXT NOT NULL,
+    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_firm_url (firm, url_hash),
+    INDEX idx_date (publication_date),
+    INDEX idx_firm_date (firm, publication_date),
+    INDEX idx_practice_date (practice_area, publication_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+# Empty strings stand in for unknown month / type / practice area in the key
+CREATE_STATS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS publication_stats (
+    firm VARCHAR(16) NOT NULL,
+    month CHAR(7) NOT NULL,
+    publication_type VARCHAR(255) NOT NULL,
+    practice_area VARCHAR(255) NOT NULL,
+    publications INT NOT NULL,
+    PRIMARY KEY (firm, month, publication_type, practice_area),
+    INDEX idx_month (month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+# Columns rollup_counts() can group by
+STATS_DIMENSIONS = ('firm', 'month', 'publication_type', 'practice_area')
+
+COLUMNS = ['firm', 'url_hash', 'company_name', 'publication_type', 'publication_date',
+           'practice_area', 'article_heading', 'article_link']
+
+# Field names the scrapers use for the canonical columns
+ALIASES = {
+    'publishing_date': 'publication_date',
+    'published_date': 'publication_date',
+    'article_date': 'publication_date',
+    'article_name': 'article_heading',
+    'heading': 'article_heading',
+    'article_type': 'publication_type',
+    'link': 'article_link',
+}
+
+# VARCHAR columns that some old tables kept as TEXT
+MAX_LENGTHS = {'publication_type': 255, 'practice_area': 255, 'company_name': 255}
+
+# Firm_4's pre-migration table, renamed out of the way of the canonical one
+INDUSLAW_LEGACY_TABLE = 'induslaw_publications'
+
+# Per-firm tables written before the canonical table existed:
+# firm -> (table, company name fallback, date, type, heading, link, scraped-at column)
+LEGACY_TABLES = {
+    'firm_1': ('azb_partners_publications', 'AZB Partners', 'publication_date',
+               'publication_type', 'article_heading', 'article_link', 'scraped_at'),
+    'firm_2': ('cam_publications', 'CAM', 'publication_date',
+               'publication_type', 'article_name', 'article_link', 'created_at'),
+    'firm_3': ('elp_publications', 'ELP', 'publication_date',
+               'publication_type', 'article_name', 'article_link', 'scraped_at'),
+    'firm_4': (INDUSLAW_LEGACY_TABLE, 'IndusLaw', 'published_date',
+               None, 'heading', 'link', 'scraped_at'),
+    'firm_5': ('Khaitan&Co_Publications', 'Khaitan & Co.', 'publishing_date',
+               'publication_type', 'article_heading', 'article_link', 'scraped_at'),
+    'firm_6': ('lks_publications', 'LKS', 'publishing_date',
+               'publication_type', 'article_heading', 'article_link', 'created_at'),
+    'firm_7': ('SAM_publications', 'SAM', 'publication_date',
+               'publication_type', 'article_name', 'article_link', 'scraped_at'),
+    'firm_8': ('trilegal_publications', 'Trilegal', 'article_date',
+               'article_type', 'article_heading', 'article_link', 'scraped_at'),
+}
+
+
+def _table_columns(cursor, table):
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s", (table,)
+    )
+    return {row[0].lower() for row in cursor.fetchall()}
+
+
+def ensure_publications_table(db_config):
+    """
+    Create the canonical table, moving Firm_4's old `publications` table aside first
+
+    Safe to call on every run.
+    """
+    conn = connect(db_config)
+    cursor = conn.cursor()
+    try:
+        columns = _table_columns(cursor, PUBLICATIONS_TABLE)
+        if columns and 'url_hash' not in columns:
+            if _table_columns(cursor, INDUSLAW_LEGACY_TABLE):
+                raise RuntimeError(f"Both an old-style `{PUBLICATIONS_TABLE}` table and "
+                                   f"`{INDUSLAW_LEGACY_TABLE}` exist; merge them by hand")
+            cursor.execute(f"RENAME TABLE `{PUBLICATIONS_TABLE}` TO `{INDUSLAW_LEGACY_TABLE}`")
+            logger.info(f"Renamed Firm_4's old `{PUBLICATIONS_TABLE}` table to `{INDUSLAW_LEGACY_TABLE}`")
+        cursor.execute(CREATE_TABLE_QUERY)
+        cursor.execute(CREATE_STATS_TABLE_QUERY)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _rollup_key(publication_date, publication_type, practice_area):
+    month = publication_date.strftime('%Y-%m') if publication_date else ''
+    return month, publication_type or '', practice_area or ''
+
+
+def _rollup_keys(cursor, firm, hashes, lock=False):
+    """Rollup keys of the stored rows among these url hashes"""
+    placeholders = ', '.join(['%s'] * len(hashes))
+    cursor.execute(
+        f"SELECT publication_date, publication_type, practice_area FROM publications "
+        f"WHERE firm = %s AND url_hash IN ({placeholders})" + (" FOR UPDATE" if lock else ""),
+        [firm] + list(hashes)
+    )
+    return [_rollup_key(*row) for row in cursor.fetchall()]
+
+
+def apply_stats_delta(cursor, firm, before, after):
+    """
+    Move a batch's rows from their old rollup groups to their new ones
+
+    Args:
+        before (list): Rollup keys of the batch's rows before the write
+        after (list): Rollup keys of the same rows after it
+    """
+    delta = Counter(after)
+    delta.subtract(before)
+    # Sorted, so concurrent writers lock rollup rows in the same order
+    changes = [(firm, month, publication_type, practice_area, count)
+               for (month, publication_type, practice_area), count in sorted(delta.items()) if count]
+    if not changes:
+        return
+    cursor.executemany(
+        "INSERT INTO publication_stats (firm, month, publication_type, practice_area, publications) "
+        "VALUES (%s, %s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE publications = publications + VALUES(publications)",
+        changes
+    )
+    if any(change[-1] < 0 for change in changes):
+        cursor.execute("DELETE FROM publication_stats WHERE firm = %s AND publications <= 0", (firm,))
+
+
+class PublicationWriter(BulkWriter):
+    """BulkWriter for the canonical table that accepts each scraper's own field names"""
+
+    def __init__(self, db_config, firm, update_columns=None, extra_updates=None, batch_size=100):
+        if update_columns is not None:
+            update_columns = [ALIASES.get(column, column) for column in update_columns]
+        super().__init__(db_config, PUBLICATIONS_TABLE, COLUMNS, key_columns=['firm', 'url_hash'],
+                         update_columns=update_columns, extra_updates=extra_updates,
+                         batch_size=batch_size)
+        self.firm = firm
+        # Insert-only writers drop rows the seen-URL index already knows (see seen_index.py)
+        self.seen = get_seen_index(db_config)
+        self.skip_seen = update_columns == []
+        self.skipped = 0
+        self.written_keys = []
+
+    def canonical(self, row):
+        """Map a scraper's row onto the canonical columns"""
+        mapped = {ALIASES.get(key, key): value for key, value in row.items()}
+        for column, length in MAX_LENGTHS.items():
+            if isinstance(mapped.get(column), str):
+                mapped[column] = mapped[column][:length]
+        mapped['firm'] = self.firm
+        mapped['url_hash'] = url_key(mapped['article_link'])
+        mapped.setdefault('article_heading', '')
+        return mapped
+
+    def add(self, row):
+        row = self.canonical(row)
+        if self.skip_seen and self.seen and self.seen.contains_key(row['url_hash']):
+            with self.lock:
+                self.skipped += 1
+            return None
+        return super().add(row)
+
+    def flush(self):
+        """Write buffered rows; rows skipped as already seen count as unchanged"""
+        with self.lock:
+            self.written_keys = []
+            counts = super().flush()
+            if self.seen:
+                for key in self.written_keys:
+                    self.seen.add_key(key)
+            counts['unchanged'] += self.skipped
+            self.unchanged += self.skipped
+            self.skipped = 0
+            return counts
+
+    def _write_batch(self, cursor, batch):
+        """Upsert the batch and move its rows between rollup groups in the same transaction"""
+        # Keys in a fixed order, so concurrent writers of one firm take their locks alike
+        batch = sorted(batch, key=lambda row: row['url_hash'])
+        hashes = [row['url_hash'] for row in batch]
+        # Locking the batch's keys (and gaps) keeps concurrent writers from counting a row twice
+        before = _rollup_keys(cursor, self.firm, hashes, lock=True)
+        unchanged = self._count_unchanged(cursor, batch)
+        cursor.executemany(self.insert_query,
+                           [tuple(row.get(c) for c in self.columns) for row in batch])
+        affected = cursor.rowcount
+        apply_stats_delta(cursor, self.firm, before, _rollup_keys(cursor, self.firm, hashes))
+        self.written_keys = hashes
+        return len(before), affected, unchanged
+
+
+def publication_writer(db_config, firm, update_columns=None, extra_updates=None, batch_size=100):
+    """
+    Batched upsert writer for one firm's rows in the canonical table
+
+    Args:
+        db_config (dict): MySQL connection settings
+        firm (str): Firm key, e.g. 'firm_1'
+        update_columns (list, optional): Columns refreshed for links already
+            stored, in either canonical or the scraper's own names
+            (default: all, [] to keep existing rows as they are)
+        extra_updates (dict, optional): Raw SQL assignments on duplicate key
+        batch_size (int): add() flushes automatically at this many rows
+
+    Returns:
+        PublicationWriter
+    """
+    return PublicationWriter(db_config, firm, update_columns, extra_updates, batch_size)
+
+
+def backfill_query(firm, table, company, date_col, type_col, heading_col, link_col, scraped_col):
+    """
+    INSERT ... SELECT copying one legacy table; existing (firm, link) rows win
+
+    SQL can't normalise URLs, so rows are keyed by the plain MD5 of their link
+    until rehash() re-keys them.
+    """
+    type_expr = f"LEFT(`{type_col}`, 255)" if type_col else "NULL"
+    return (
+        f"INSERT INTO publications (firm, url_hash, company_name, publication_type, publication_date, "
+        f"practice_area, article_heading, article_link, scraped_at) "
+        f"SELECT %s, UNHEX(MD5(`{link_col}`)), LEFT(COALESCE(company_name, %s), 255), {type_expr}, "
+        f"`{date_col}`, LEFT(practice_area, 255), COALESCE(`{heading_col}`, ''), `{link_col}`, "
+        f"COALESCE(`{scraped_col}`, CURRENT_TIMESTAMP) "
+        f"FROM `{table}` WHERE `{link_col}` IS NOT NULL AND `{link_col}` <> '' "
+        f"ON DUPLICATE KEY UPDATE id = id"
+    ), (firm, company)
+
+
+def rehash(db_config, firms=None, chunk_size=500):
+    """
+    Re-key rows with url_key() and merge rows whose links normalise to the same URL
+
+    Per firm, the row already carrying the canonical key (written by a
+    scraper) is kept, otherwise the newest one. Run rebuild_stats() afterwards.
+
+    Returns:
+        dict: firm -> (rows re-keyed, duplicate rows removed)
+    """
+    results = {}
+    conn = connect(db_config)
+    cursor = conn.cursor()
+    try:
+        if not firms:
+            cursor.execute("SELECT DISTINCT firm FROM publications")
+            firms = [row[0] for row in cursor.fetchall()]
+        for firm in firms:
+            cursor.execute("SELECT id, url_hash, article_link FROM publications WHERE firm = %s ORDER BY id",
+                           (firm,))
+            groups = {}
+            for row_id, stored, link in cursor.fetchall():
+                groups.setdefault(url_key(link), []).append((row_id, bytes(stored)))
+
+            updates, duplicates = [], []
+            for key, members in groups.items():
+                keeper = next((member for member in members if member[1] == key), members[-1])
+                duplicates += [row_id for row_id, _ in members if row_id != keeper[0]]
+                if keeper[1] != key:
+                    updates.append((key, keeper[0]))
+
+            # Duplicates go first so no re-keyed row collides with one
+            for start in range(0, len(duplicates), chunk_size):
+                chunk = duplicates[start:start + chunk_size]
+                cursor.execute(f"DELETE FROM publications WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            for start in range(0, len(updates), chunk_size):
+                cursor.executemany("UPDATE publications SET url_hash = %s WHERE id = %s",
+                                   updates[start:start + chunk_size])
+            conn.commit()
+            results[firm] = (len(updates), len(duplicates))
+            logger.info(f"{firm}: re-keyed {len(updates)} rows, merged {len(duplicates)} duplicates")
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return results
+
+
+def rebuild_stats(db_config, firms=None):
+    """
+    Recompute publication_stats from `publications` in one transaction
+
+    Run it while no scraper is writing, after backfills or manual edits.
+    """
+    ensure_publications_table(db_config)
+    where, params = '', []
+    if firms:
+        where = f" WHERE firm IN ({', '.join(['%s'] * len(firms))})"
+        params = list(firms)
+    conn = connect(db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM publication_stats{where}", params)
+        cursor.execute(
+            "INSERT INTO publication_stats (firm, month, publication_type, practice_area, publications) "
+            "SELECT firm, COALESCE(LEFT(publication_date, 7), ''), "
+            "COALESCE(publication_type, ''), COALESCE(practice_area, ''), COUNT(*) "
+            f"FROM publications{where} GROUP BY 1, 2, 3, 4",
+            params
+        )
+        groups = cursor.rowcount
+        conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    logger.info(f"Rebuilt publication_stats: {groups} groups")
+    return groups
+
+
+def rollup_counts(db_config, by=None, firm=None, since_month=None, limit=None):
+    """
+    Publication counts from the rollup table
+
+    Args:
+        db_config (dict): MySQL connection settings
+        by (str, optional): One of STATS_DIMENSIONS to group by; None for the total
+        firm (str, optional): Only this firm, e.g. 'firm_1'
+        since_month (str, optional): Only months from this one on, 'YYYY-MM'
+        limit (int, optional): Return only the largest groups (newest months for by='month')
+
+    Returns:
+        int for the total, else a list of (value, count) with None for unknown values
+    """
+    if by is not None and by not in STATS_DIMENSIONS:
+        raise ValueError(f"Cannot group publication_stats by {by!r}")
+    conditions, params = [], []
+    if firm:
+        conditions.append("firm = %s")
+        params.append(firm)
+    if since_month:
+        conditions.append("month >= %s")
+        params.append(since_month)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    if by is None:
+        query = f"SELECT COALESCE(SUM(publications), 0) FROM publication_stats{where}"
+    else:
+        order = "`month` DESC" if by == 'month' else "total DESC"
+        query = (f"SELECT `{by}`, SUM(publications) AS total FROM publication_stats{where} "
+                 f"GROUP BY `{by}` ORDER BY {order}")
+        if limit:
+            query += f" LIMIT {int(limit)}"
+
+    conn = connect(db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        if by is None:
+            return int(cursor.fetchone()[0])
+        return [(value or None, int(total)) for value, total in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def migrate(db_config, firms=None):
+    """
+    Backfill the canonical table from the per-firm tables
+
+    Idempotent: rows already in `publications` (from an earlier migration or
+    a scraper run) are kept as they are.
+
+    Returns:
+        dict: Rows copied per firm
+    """
+    ensure_publications_table(db_config)
+    copied = {}
+    conn = connect(db_config)
+    cursor = conn.cursor()
+    try:
+        for firm in firms or sorted(LEGACY_TABLES):
+            table = LEGACY_TABLES[firm][0]
+            if not _table_columns(cursor, table):
+                logger.info(f"{firm}: no `{table}` table, nothing to backfill")
+                continue
+            query, params = backfill_query(firm, *LEGACY_TABLES[firm])
+            try:
+                cursor.execute(query, params)
+                conn.commit()
+            except mysql.connector.Error as err:
+                conn.rollback()
+                logger.error(f"{firm}: backfill from `{table}` failed: {err}")
+                continue
+            # INSERT ... SELECT reports 1 per inserted row, 0 for rows already there
+            copied[firm] = cursor.rowcount
+            logger.info(f"{firm}: copied {cursor.rowcount} rows from `{table}`")
+    finally:
+        cursor.close()
+        conn.close()
+    # The backfill bypasses PublicationWriter: normalise its keys and recount
+    if copied:
+        rehash(db_config, list(copied))
+    rebuild_stats(db_config, firms)
+    return copied
+
+
+def main():
+    from dotenv import load_dotenv
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Canonical publications table")
+    parser.add_argument('command', choices=['create', 'migrate', 'rehash', 'rebuild-stats'],
+                        help="create: create the tables; migrate: also backfill the per-firm tables; "
+                             "rehash: re-key rows with normalised URLs; rebuild-stats: recompute publication_stats")
+    parser.add_argument('--firms', nargs='+', choices=sorted(LEGACY_TABLES),
+                        help="Firms to backfill / recount (default: all)")
+    args = parser.parse_args()
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'database': os.getenv('DB_NAME', 'publications_db'),
+        'port': int(os.getenv('DB_PORT', 3306))
+    }
+    if args.command == 'create':
+        ensure_publications_table(db_config)
+    elif args.command == 'rehash':
+        results = rehash(db_config, args.firms)
+        rebuild_stats(db_config, args.firms)
+        print("Re-keyed: " + ', '.join(f"{firm}={updated} (merged {merged})"
+                                       for firm, (updated, merged) in results.items()))
+    elif args.command == 'rebuild-stats':
+        groups = rebuild_stats(db_config, args.firms)
+        print(f"Rebuilt publication_stats: {groups} groups")
+    else:
+        copied = migrate(db_config, args.firms)
+        print(f"Backfilled {sum(copied.values())} rows: "
+              + ', '.join(f"{firm}={count}" for firm, count in copied.items()))
+
+
+if __name__ == "__main__":
+    main()
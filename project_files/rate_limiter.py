@@ -0,0 +1,137 @@
+"""
+Per-host token-bucket rate limiter shared by all scrapers
+
+Every request to a firm's site takes a token from that host's bucket first:
+
+    from rate_limiter import wait_for_token
+
+    wait_for_token(url)
+    response = requests.get(url, headers=headers, timeout=30)
+
+Only time spent actually waiting for a token is slept, so parsing and
+database work no longer add fixed pauses. Limits come from
+RATE_LIMIT['requests_per_minute'] with optional RATE_LIMIT['per_host']
+overrides (see config_template.py).
+
+Concurrent fetchers additionally hold a per-host slot while a request is in
+flight, so no host sees more than RATE_LIMIT['max_concurrent_per_host']
+open requests from this process:
+
+    with host_slot(url):
+        response = session.get(url)
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that refills at a fixed rate"""
+
+    def __init__(self, requests_per_minute, burst=1):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take one token and return how long the caller must wait before using it
+
+        Tokens may go negative, which queues callers in the order they
+        arrived instead of letting them race for the next refill.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available; returns the time slept"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HostRateLimiter:
+    """One token bucket per host, created lazily on first use"""
+
+    def __init__(self, requests_per_minute=None, per_host=None, burst=None):
+        rate_limit = get_setting('RATE_LIMIT')
+        self.requests_per_minute = requests_per_minute or rate_limit['requests_per_minute']
+        self.per_host = per_host if per_host is not None else rate_limit.get('per_host', {})
+        self.burst = burst or rate_limit.get('burst', 1)
+        self.max_concurrent = max(1, rate_limit.get('max_concurrent_per_host', 4))
+        self.buckets = {}
+        self.slots = {}
+        self.lock = threading.Lock()
+
+    def limit_for(self, host):
+        """Requests per minute allowed for a host"""
+        if host in self.per_host:
+            return self.per_host[host]
+        for pattern, limit in self.per_host.items():
+            if pattern.startswith('.') and (host.endswith(pattern) or host == pattern[1:]):
+                return limit
+        return self.requests_per_minute
+
+    def bucket_for(self, host):
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.limit_for(host), self.burst)
+                self.buckets[host] = bucket
+            return bucket
+
+    def slot_for(self, host):
+        """Semaphore bounding in-flight requests to a host"""
+        with self.lock:
+            slot = self.slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_concurrent)
+                self.slots[host] = slot
+            return slot
+
+    def wait(self, url):
+        """Block until a request to the URL's host is allowed"""
+        host = urlparse(url).netloc.lower()
+        delay = self.bucket_for(host).acquire()
+        if delay > 0:
+            logger.debug(f"Rate limited {host} for {delay:.2f}s")
+        return delay
+
+
+# Process-wide limiter so every scraper in a run shares the same buckets
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide HostRateLimiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostRateLimiter()
+        return _limiter
+
+
+def wait_for_token(url):
+    """Block until the shared limiter allows a request to url"""
+    return get_rate_limiter().wait(url)
+
+
+def host_slot(url):
+    """Semaphore to hold while a request to url's host is in flight"""
+    return get_rate_limiter().slot_for(urlparse(url).netloc.lower())
@@ -0,0 +1,347 @@
+"""
+Local replay server for end-to-end crawl benchmarks without the network
+
+Complete crawls are recorded once from the live sites and then replayed as
+often as needed, so concurrency, rate limits and DB batching can be tuned
+against the same pages every time.
+
+Snapshots live under REPLAY['snapshot_dir'] (see config_template.py), one
+file per URL the scrapers requested:
+
+    replay_snapshots/www.azbpartners.com/resource/index.html
+    replay_snapshots/www.azbpartners.com/resource/page/2/index.html
+    replay_snapshots/www.lakshmisri.com/insights/articles/index@page=2.html
+    replay_snapshots/compass.khaitanco.com/.../index@action=load&paged=3.json
+
+Paginated `page/N/` and `?page=N` routes are just snapshot paths, so the page
+after the last recorded one is a 404, like the end of a real listing.
+
+Recording: set SCRAPER_RECORD_SNAPSHOTS=1 (or REPLAY['record']) and run the
+scrapers against the live sites. fetch() saves every 200 response and the
+Selenium scrapers save the rendered page they parse.
+
+Replaying:
+
+    python replay_server.py --latency-ms 150 --jitter-ms 50 --error-rate 0.02
+    python run_all_scrapers.py --base-url http://127.0.0.1:8765
+
+SCRAPER_BASE_URL (or REPLAY['base_url'], set by --base-url) rewrites every
+request the scrapers make, https://<host>/<path> -> <base_url>/<host>/<path>,
+in http_client.fetch() and before each driver.get(). Rate limiting, the HTTP
+cache and the watermarks stay keyed on the live URLs.
+
+The server answers GET /__stats__ with per-host request counts, which
+run_all_scrapers.py turns into the requests column of its summary.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+from urllib.request import urlopen
+
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+STATS_PATH = '/__stats__'
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.json': 'application/json; charset=utf-8',
+}
+
+
+# ============================================================================
+# Client side: URL rewriting and recording
+# ============================================================================
+
+def replay_base_url():
+    """Base URL of the replay server, or None for live crawling"""
+    base_url = os.getenv('SCRAPER_BASE_URL') or get_setting('REPLAY')['base_url']
+    return base_url.rstrip('/') if base_url else None
+
+
+def site_url(url):
+    """
+    URL to actually request for a live URL
+
+    Unchanged unless a replay base URL is set; URLs already pointing at the
+    replay server (e.g. endpoints discovered during a replay run) are left alone.
+    """
+    base_url = replay_base_url()
+    if not base_url or url.startswith(base_url + '/'):
+        return url
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return url
+    replayed = f"{base_url}/{parts.netloc}{parts.path or '/'}"
+    return f"{replayed}?{parts.query}" if parts.query else replayed
+
+
+def live_url(url):
+    """Inverse of site_url(): the live https URL behind a replay server URL"""
+    base_url = replay_base_url()
+    if not base_url or not url.startswith(base_url + '/'):
+        return url
+    return 'https://' + url[len(base_url) + 1:]
+
+
+def recording():
+    """True when responses should be saved as snapshots"""
+    if replay_base_url():
+        return False
+    flag = os.getenv('SCRAPER_RECORD_SNAPSHOTS')
+    if flag is not None:
+        return flag.lower() in ('1', 'true', 'yes')
+    return bool(get_setting('REPLAY')['record'])
+
+
+def _form_pairs(data):
+    if not data:
+        return []
+    if isinstance(data, dict):
+        return [(str(key), str(value)) for key, value in data.items()]
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', 'replace')
+    return parse_qsl(data, keep_blank_values=True)
+
+
+def snapshot_stem(root, host, path, pairs):
+    """
+    Snapshot file path without its extension
+
+    The query string and form body are folded into the file name, sorted so
+    parameter order doesn't matter.
+    """
+    segments = [segment for segment in path.split('/') if segment not in ('', '.', '..')]
+    name = 'index'
+    if pairs:
+        name += '@' + quote(urlencode(sorted(pairs)), safe='=&')
+    return os.path.join(root, host, *segments, name)
+
+
+def save_snapshot(url, body, content_type='text/html', data=None):
+    """
+    Save a response body as the snapshot for url (no-op unless recording)
+
+    Args:
+        url (str): Live URL that was requested
+        body (str | bytes): Response body or rendered page source
+        content_type (str): Response Content-Type; JSON is saved as .json
+        data (dict | str, optional): Form body of a POST request
+    """
+    if not recording():
+        return None
+    parts = urlsplit(url)
+    pairs = parse_qsl(parts.query, keep_blank_values=True) + _form_pairs(data)
+    stem = snapshot_stem(get_setting('REPLAY')['snapshot_dir'], parts.netloc, parts.path, pairs)
+    extension = '.json' if 'json' in (content_type or '') else '.html'
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    try:
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        with open(stem + extension, 'wb') as f:
+            f.write(body)
+    except OSError as e:
+        logger.warning(f"Could not save snapshot for {url}: {e}")
+        return None
+    return stem + extension
+
+
+def fetch_stats(base_url=None):
+    """Per-host counters from a running replay server, or {} if unreachable"""
+    base_url = (base_url or replay_base_url() or '').rstrip('/')
+    if not base_url:
+        return {}
+    try:
+        with urlopen(base_url + STATS_PATH, timeout=5) as response:
+            return json.load(response)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read replay server stats: {e}")
+        return {}
+
+
+# ============================================================================
+# Server side
+# ============================================================================
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the snapshot root, fault settings and counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, snapshot_dir, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, error_status=503, seed=None):
+        super().__init__(address, ReplayHandler)
+        self.snapshot_dir = snapshot_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def count(self, host, key, amount=1):
+        with self.lock:
+            counters = self.stats.setdefault(host, {
+                'requests': 0, 'served': 0, 'not_modified': 0,
+                'not_found': 0, 'errors': 0, 'bytes': 0
+            })
+            counters[key] += amount
+
+    def delay(self):
+        """Injected response latency in seconds"""
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def find_snapshot(self, host, path, pairs):
+        stem = snapshot_stem(self.snapshot_dir, host, path, pairs)
+        for extension in CONTENT_TYPES:
+            if os.path.isfile(stem + extension):
+                return stem + extension
+        return None
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves /<host>/<path>?<query> from the snapshot tree"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._serve()
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        content_type = self.headers.get('Content-Type') or ''
+        self._serve(_form_pairs(body) if 'form-urlencoded' in content_type else [])
+
+    def _serve(self, form_pairs=None, head=False):
+        parts = urlsplit(self.path)
+        if parts.path == STATS_PATH:
+            with self.server.lock:
+                payload = json.dumps(self.server.stats).encode('utf-8')
+            return self._send(200, payload, CONTENT_TYPES['.json'])
+
+        host, _, path = parts.path.lstrip('/').partition('/')
+        self.server.count(host, 'requests')
+
+        delay = self.server.delay()
+        if delay:
+            time.sleep(delay)
+
+        if self.server.should_fail():
+            self.server.count(host, 'errors')
+            return self._send(self.server.error_status, b'Injected error', 'text/plain')
+
+        pairs = parse_qsl(parts.query, keep_blank_values=True) + (form_pairs or [])
+        snapshot = self.server.find_snapshot(host, path, pairs)
+        if snapshot is None:
+            self.server.count(host, 'not_found')
+            return self._send(404, b'Not found', 'text/plain')
+
+        stat = os.stat(snapshot)
+        etag = f'"{int(stat.st_mtime)}-{stat.st_size}"'
+        if self._not_modified(etag, stat.st_mtime):
+            self.server.count(host, 'not_modified')
+            return self._send(304, b'', None, {'ETag': etag})
+
+        with open(snapshot, 'rb') as f:
+            body = f.read()
+        self.server.count(host, 'served')
+        self.server.count(host, 'bytes', len(body))
+        headers = {'ETag': etag, 'Last-Modified': formatdate(stat.st_mtime, usegmt=True)}
+        extension = os.path.splitext(snapshot)[1]
+        self._send(200, b'' if head else body, CONTENT_TYPES[extension], headers,
+                   length=len(body))
+
+    def _not_modified(self, etag, mtime):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send(self, status, body, content_type, headers=None, length=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body) if length is None else length))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def serve(host='127.0.0.1', port=8765, **kwargs):
+    """Run a replay server until interrupted"""
+    settings = get_setting('REPLAY')
+    options = {
+        'snapshot_dir': settings['snapshot_dir'],
+        'latency_ms': settings['latency_ms'],
+        'jitter_ms': settings['jitter_ms'],
+        'error_rate': settings['error_rate'],
+        'error_status': settings['error_status'],
+    }
+    options.update({key: value for key, value in kwargs.items() if value is not None})
+    server = ReplayServer((host, port), **options)
+    logger.info(f"Replaying {options['snapshot_dir']} at http://{host}:{port} "
+                f"(latency {options['latency_ms']}±{options['jitter_ms']} ms, "
+                f"error rate {options['error_rate']:.1%})")
+    logger.info(f"Point the scrapers at it with SCRAPER_BASE_URL=http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve recorded site snapshots for offline crawls")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--snapshots', dest='snapshot_dir',
+                        help="Snapshot directory (default: REPLAY['snapshot_dir'])")
+    parser.add_argument('--latency-ms', type=float, help="Added to every response")
+    parser.add_argument('--jitter-ms', type=float, help="Uniform +/- variation on the latency")
+    parser.add_argument('--error-rate', type=float, help="Fraction of requests answered with --error-status")
+    parser.add_argument('--error-status', type=int, help="Status for injected errors (default: 503)")
+    parser.add_argument('--seed', type=int, help="Seed for jitter and error injection")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, snapshot_dir=args.snapshot_dir, latency_ms=args.latency_ms,
+          jitter_ms=args.jitter_ms, error_rate=args.error_rate, error_status=args.error_status,
+          seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Run every firm scraper concurrently and print a per-firm summary.
+
+Selenium-heavy firms (Firm_3, Firm_5, Firm_8) run together on threads of one
+separate (spawned) process, where they lease browsers from a shared driver pool instead
+of each starting Chrome; the requests/BeautifulSoup firms run in a thread pool.
+
+Firms are also concurrent internally: listings are fetched ahead of the page
+being saved (pipeline.py), and Firm_6 and Firm_7 crawl their listings in
+parallel. Several requests to one host can therefore be in flight at once.
+The only politeness bound is the shared per-host rate limiter
+(RATE_LIMIT['per_host'] and 'max_concurrent_per_host' in config_template.py),
+which every fetch and Selenium page load goes through.
+
+With --base-url every scraper crawls a local replay server instead of the live
+sites (see replay_server.py), and the summary adds the number of requests each
+firm made, read from the server's counters.
+
+Usage:
+    python run_all_scrapers.py
+    python run_all_scrapers.py --firms firm_1 firm_6 --http-workers 2
+    python run_all_scrapers.py --base-url http://127.0.0.1:8765
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from replay_server import fetch_stats, replay_base_url
+from seen_index import build_seen_index
+from settings import get_setting
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def build_db_config():
+    """Database configuration shared by every scraper"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'database': os.getenv('DB_NAME', 'publications_db'),
+        'port': int(os.getenv('DB_PORT', 3306))
+    }
+
+
+# ============================================================================
+# Per-firm runners
+#
+# Each runner imports its scraper lazily (so Selenium is only imported where
+# it is needed), runs the full scrape and returns {'pages': .., 'rows': ..}.
+# They are module-level functions so the process pool can pickle them.
+# `incremental` only affects the paginated firms (1, 2, 6, 7, 8).
+# ============================================================================
+
+def run_firm_1(db_config, incremental=False):
+    from firm_1 import AZBResourceScraper
+    scraper = AZBResourceScraper(db_config, incremental=incremental)
+    scraper.scrape_all(max_pages=None)
+    return {'pages': scraper.pages_scraped, 'rows': scraper.total_saved}
+
+
+def run_firm_2(db_config, incremental=False):
+    from firm_2 import CAMScraper
+    scraper = CAMScraper(db_config, start_date="2024-01-01", end_date="2025-12-31",
+                         incremental=incremental)
+    scraper.run_full_scrape()
+    return {'pages': scraper.pages_scraped, 'rows': scraper.articles_scraped}
+
+
+def run_firm_3(db_config, incremental=False):
+    from firm_3 import ELPScraper
+    scraper = ELPScraper(db_config)
+    scraper.run()
+    return {'pages': scraper.pages_scraped, 'rows': scraper.articles_saved}
+
+
+def run_firm_4(db_config, incremental=False):
+    from firm_4 import PublicationScraper
+    scraper = PublicationScraper(
+        host=db_config['host'],
+        user=db_config['user'],
+        password=db_config['password'],
+        database=db_config['database'],
+        cutoff_date='2024-01-01'
+    )
+    publications = scraper.scrape_induslaw()
+    return {'pages': scraper.pages_scraped, 'rows': len(publications)}
+
+
+def run_firm_5(db_config, incremental=False):
+    from firm_5 import KhaitanScraper
+    scraper = KhaitanScraper(db_config, use_selenium=True)
+    scraper.run()
+    return {'pages': scraper.pages_scraped, 'rows': scraper.total_saved}
+
+
+def run_firm_6(db_config, incremental=False):
+    import firm_6
+    firm_6.DB_CONFIG.update(db_config)
+    firm_6.RUN_STATS['pages'] = 0
+    total_records = firm_6.main(incremental=incremental)
+    return {'pages': firm_6.RUN_STATS['pages'], 'rows': total_records}
+
+
+def run_firm_7(db_config, incremental=False):
+    from firm_7 import SAMScraper
+    scraper = SAMScraper(db_config, incremental=incremental)
+    articles = scraper.scrape_all()
+    return {'pages': scraper.pages_scraped, 'rows': len(articles)}
+
+
+def run_firm_8(db_config, incremental=False):
+    from firm_8 import TrilegalScraperSelenium
+    scraper = TrilegalScraperSelenium(db_config, headless=True, incremental=incremental)
+    scraper.run()
+    return {'pages': scraper.pages_scraped, 'rows': scraper.total_articles}
+
+
+# Firms that drive a real browser and therefore get their own process
+SELENIUM_FIRMS = {
+    'firm_3': run_firm_3,
+    'firm_5': run_firm_5,
+    'firm_8': run_firm_8,
+}
+
+# Plain requests + BeautifulSoup firms, cheap enough to share a process
+HTTP_FIRMS = {
+    'firm_1': run_firm_1,
+    'firm_2': run_firm_2,
+    'firm_4': run_firm_4,
+    'firm_6': run_firm_6,
+    'firm_7': run_firm_7,
+}
+
+# Domains each firm crawls (subdomains included), for the replay request counts
+FIRM_HOSTS = {
+    'firm_1': ('azbpartners.com',),
+    'firm_2': ('cyrilshroff.com', 'cyrilamarchandblogs.com'),
+    'firm_3': ('elplaw.in',),
+    'firm_4': ('induslaw.com',),
+    'firm_5': ('khaitanco.com',),
+    'firm_6': ('lakshmisri.com',),
+    'firm_7': ('amsshardul.com',),
+    'firm_8': ('trilegal.com',),
+}
+
+
+def requests_by_firm(before, after):
+    """Replay server requests per firm between two fetch_stats() snapshots"""
+    counts = {}
+    for host, counters in after.items():
+        made = counters['requests'] - before.get(host, {}).get('requests', 0)
+        for firm, domains in FIRM_HOSTS.items():
+            if any(host == domain or host.endswith('.' + domain) for domain in domains):
+                counts[firm] = counts.get(firm, 0) + made
+                break
+    return counts
+
+
+def timed_run(firm, runner, db_config, incremental=False):
+    """Run one firm and return its summary row (never raises)"""
+    start = time.time()
+    result = {'firm': firm, 'pages': 0, 'rows': 0, 'status': 'ok'}
+    try:
+        result.update(runner(db_config, incremental=incremental))
+    except Exception as e:
+        result['status'] = f"failed: {e}"
+    result['wall_time'] = time.time() - start
+    return result
+
+
+def run_selenium_group(firms, db_config, incremental=False, workers=3):
+    """
+    Run the Selenium firms on threads of this process
+
+    They share this process's driver pool, so browsers started for one firm
+    (or one Khaitan section) are reused by the next instead of cold-starting.
+    """
+    from driver_pool import shutdown_all
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(timed_run, firm, SELENIUM_FIRMS[firm], db_config, incremental)
+                       for firm in firms]
+            return [future.result() for future in futures]
+    finally:
+        shutdown_all()
+
+
+def rows_per_second(rows, seconds):
+    return rows / seconds if seconds > 0 else 0.0
+
+
+def print_summary(results, total_time):
+    """Print the per-firm wall time / pages / requests / rows table"""
+    def requests_cell(value):
+        return f"{value:>8}" if value is not None else f"{'-':>8}"
+
+    print("\n" + "=" * 80)
+    print("RUN SUMMARY")
+    print("=" * 80)
+    print(f"{'Firm':<10} {'Wall time':>12} {'Pages':>8} {'Requests':>8} {'Rows':>8} {'Rows/s':>8}  Status")
+    print("-" * 80)
+    for result in sorted(results, key=lambda r: r['firm']):
+        print(f"{result['firm']:<10} {result['wall_time']:>11.1f}s {result['pages']:>8} "
+              f"{requests_cell(result.get('requests'))} {result['rows']:>8} "
+              f"{rows_per_second(result['rows'], result['wall_time']):>8.1f}  {result['status']}")
+    print("-" * 80)
+    total_rows = sum(r['rows'] for r in results)
+    counted = [r['requests'] for r in results if r.get('requests') is not None]
+    print(f"{'Total':<10} {total_time:>11.1f}s {sum(r['pages'] for r in results):>8} "
+          f"{requests_cell(sum(counted) if counted else None)} {total_rows:>8} "
+          f"{rows_per_second(total_rows, total_time):>8.1f}")
+    print("=" * 80)
+
+
+def run_all(firms=None, selenium_workers=3, http_workers=5, incremental=False, base_url=None):
+    """
+    Run the selected firms concurrently
+
+    Args:
+        firms (list, optional): Firm keys to run (default: all eight)
+        selenium_workers (int): Threads running Selenium firms (browsers come
+            from the DRIVER_POOL, sized in config)
+        http_workers (int): Size of the thread pool for requests-based firms
+        incremental (bool): Stop each listing at the last-seen article
+        base_url (str, optional): Crawl this replay server instead of the live sites
+
+    Returns:
+        list: One summary dict per firm
+    """
+    firms = firms or sorted(list(SELENIUM_FIRMS) + list(HTTP_FIRMS))
+    db_config = build_db_config()
+    if base_url:
+        # Inherited by the Selenium process and read by every fetch()
+        os.environ['SCRAPER_BASE_URL'] = base_url
+
+    base_url = replay_base_url()
+
+    print(f"Starting concurrent scrape at {datetime.now()}")
+    print(f"Firms: {', '.join(firms)}")
+    if base_url:
+        print(f"Replaying from {base_url}")
+    print("=" * 80)
+
+    stats_before = fetch_stats(base_url) if base_url else {}
+    start = time.time()
+
+    if get_setting('SEEN_INDEX')['enabled']:
+        # Fresh index before the workers start, so none of them rebuilds it
+        try:
+            build_seen_index(db_config)
+        except Exception as e:
+            logger.warning(f"Could not rebuild the seen-URL index: {e}")
+    results = []
+
+    selenium_firms = [firm for firm in firms if firm in SELENIUM_FIRMS]
+    # Spawned, not forked: the HTTP threads may hold rate limiter, cache or
+    # seen-index locks, which a forked child would inherit locked
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as process_pool, \
+            ThreadPoolExecutor(max_workers=http_workers) as thread_pool:
+        futures = {}
+        for firm in firms:
+            if firm in HTTP_FIRMS:
+                futures[thread_pool.submit(timed_run, firm, HTTP_FIRMS[firm], db_config, incremental)] = firm
+            elif firm not in SELENIUM_FIRMS:
+                logger.warning(f"Unknown firm '{firm}', skipping")
+        if selenium_firms:
+            group = process_pool.submit(run_selenium_group, selenium_firms, db_config,
+                                        incremental, selenium_workers)
+            futures[group] = 'selenium'
+
+        for future in as_completed(futures):
+            try:
+                group_results = future.result()
+            except Exception as e:
+                # Only the Selenium process can fail here, e.g. BrokenProcessPool
+                # after Chrome took it down; keep the other firms' results
+                group_results = [{'firm': firm, 'pages': 0, 'rows': 0, 'status': f"failed: {e}",
+                                  'wall_time': time.time() - start}
+                                 for firm in selenium_firms]
+            if isinstance(group_results, dict):
+                group_results = [group_results]
+            for result in group_results:
+                logger.info(f"{result['firm']} finished in {result['wall_time']:.1f}s ({result['status']})")
+                results.append(result)
+
+    total_time = time.time() - start
+    if base_url:
+        # Firms overlap, so counts are taken for the whole run and split by host
+        counts = requests_by_firm(stats_before, fetch_stats(base_url))
+        for result in results:
+            result['requests'] = counts.get(result['firm'], 0)
+
+    print_summary(results, total_time)
+    return results
+
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all law firm scrapers concurrently")
+    parser.add_argument('--firms', nargs='+', help="Firms to run, e.g. firm_1 firm_6 (default: all)")
+    parser.add_argument('--selenium-workers', type=int, default=3,
+                        help="Threads for Selenium-based firms sharing the driver pool (default: 3)")
+    parser.add_argument('--http-workers', type=int, default=5,
+                        help="Threads for requests-based firms (default: 5)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Stop each listing at the first page of already-seen articles")
+    parser.add_argument('--base-url',
+                        help="Crawl a local replay server, e.g. http://127.0.0.1:8765 (see replay_server.py)")
+    args = parser.parse_args()
+
+    run_all(args.firms, args.selenium_workers, args.http_workers, args.incremental, args.base_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Adaptive infinite-scroll loader for the Selenium scrapers
+
+Instead of a fixed number of scrolls with a fixed sleep after each one,
+scroll_until_stable() scrolls to the bottom and polls the DOM until the
+number of loaded items grows. It stops as soon as:
+- nothing new appears within idle_timeout seconds, or
+- the caller's should_stop(driver) says enough is loaded (e.g. the oldest
+  loaded item is already before the date cutoff), or
+- max_scrolls / max_time is reached
+
+Usage:
+    from scrolling import scroll_until_stable, count_selector
+
+    scroll_until_stable(
+        driver,
+        count_script=count_selector('figcaption'),
+        should_stop=lambda d: oldest_loaded_date(d) < cutoff
+    )
+"""
+
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fallback growth signal when the caller has no better item count
+SCROLL_HEIGHT_SCRIPT = "return document.body.scrollHeight;"
+
+
+def count_selector(css_selector):
+    """JS snippet returning how many elements match a CSS selector"""
+    return f"return document.querySelectorAll({json.dumps(css_selector)}).length;"
+
+
+def last_match_text(css_selector, closest=None):
+    """
+    JS snippet returning the text of the last element matching css_selector
+    (or of its closest ancestor matching `closest`), or null if none match
+    """
+    target = f"el.closest({json.dumps(closest)}) || el" if closest else "el"
+    return (
+        f"const all = document.querySelectorAll({json.dumps(css_selector)});"
+        f"if (!all.length) return null;"
+        f"const el = all[all.length - 1];"
+        f"return ({target}).innerText;"
+    )
+
+
+def scroll_until_stable(driver, count_script=SCROLL_HEIGHT_SCRIPT, should_stop=None,
+                        poll_interval=0.25, idle_timeout=4.0, max_scrolls=200, max_time=300):
+    """
+    Scroll until the page stops loading new content
+
+    Args:
+        driver: Selenium WebDriver
+        count_script (str): JS returning a number that grows as content loads
+            (item count, or scrollHeight by default)
+        should_stop (callable, optional): Called with the driver after each
+            growth; return True to stop early
+        poll_interval (float): Seconds between DOM checks
+        idle_timeout (float): Seconds without growth before giving up
+        max_scrolls (int): Hard cap on scroll actions
+        max_time (float): Hard cap on total seconds spent scrolling
+
+    Returns:
+        dict: scrolls performed, final count, seconds spent and stop reason
+    """
+    start = time.monotonic()
+    count = driver.execute_script(count_script) or 0
+    scrolls = 0
+    reason = 'max_scrolls'
+
+    while scrolls < max_scrolls:
+        if time.monotonic() - start > max_time:
+            reason = 'max_time'
+            break
+
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        scrolls += 1
+
+        # Poll for growth instead of sleeping a fixed delay
+        deadline = time.monotonic() + idle_timeout
+        new_count = count
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            new_count = driver.execute_script(count_script) or 0
+            if new_count > count:
+                break
+
+        if new_count <= count:
+            reason = 'idle'
+            break
+
+        logger.debug(f"Scroll {scrolls}: {count} -> {new_count}")
+        count = new_count
+
+        if should_stop and should_stop(driver):
+            reason = 'cutoff'
+            break
+
+    elapsed = time.monotonic() - start
+    logger.info(f"Scrolling stopped ({reason}) after {scrolls} scrolls in {elapsed:.1f}s, count {count}")
+    return {'scrolls': scrolls, 'count': count, 'seconds': elapsed, 'reason': reason}
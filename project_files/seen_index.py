@@ -0,0 +1,155 @@
+"""
+Shared index of article URLs already stored in the publications table
+
+Loaded once per run so scrapers can recognise known articles without a
+database round trip or a detail-page fetch:
+
+    index = get_seen_index(db_config)
+    if index and index.contains(url):
+        ...   # already stored, skip it
+
+The index file (SEEN_INDEX['path'], see config_template.py) is a sorted
+array of 64-bit hashes, the first 8 bytes of each row's url_hash (see
+url_key.py), behind a 16-byte header. It is memory-mapped read-only, so
+every worker process of a run shares the same pages and a lookup is a binary
+search with no parsing or loading step. run_all_scrapers.py rebuilds it
+before starting its workers, and a scraper run on its own rebuilds it when
+it is older than SEEN_INDEX['max_age_minutes'].
+
+URLs saved during the run are added to a small in-process set, so for
+example Khaitan's later sections see what its earlier sections stored.
+
+The index only saves work. A URL missing from it (stored after the last
+rebuild) is written again and deduplicated by the table's unique key. With
+64-bit hashes, a false "seen" needs two of the stored URLs' keys to share
+their first 8 bytes, which is negligible at this corpus size.
+"""
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+import mysql.connector
+
+from db_pool import connect
+from settings import get_setting
+from url_key import url_key
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SEENIDX1'
+HEADER = struct.Struct('=8sQ')  # magic, number of hashes
+
+
+class SeenIndex:
+    """Read-only view of an index file plus the URLs added during this run"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a seen-URL index")
+        self.hashes = memoryview(self.map)[HEADER.size:HEADER.size + count * 8].cast('Q')
+        self.added = set()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.hashes) + len(self.added)
+
+    def contains(self, url):
+        """True if url (in any normalize_url() variant) is already stored"""
+        return self.contains_key(url_key(url))
+
+    def contains_key(self, key):
+        """Same as contains() for a precomputed url_key()"""
+        value = int.from_bytes(key[:8], 'big')
+        if value in self.added:
+            return True
+        position = bisect.bisect_left(self.hashes, value)
+        return position < len(self.hashes) and self.hashes[position] == value
+
+    def add(self, url):
+        """Record a URL stored during this run"""
+        self.add_key(url_key(url))
+
+    def add_key(self, key):
+        with self.lock:
+            self.added.add(int.from_bytes(key[:8], 'big'))
+
+    def close(self):
+        if getattr(self, 'hashes', None) is not None:
+            self.hashes.release()
+            self.hashes = None
+        self.map.close()
+        self.file.close()
+
+
+def build_seen_index(db_config, path=None):
+    """
+    Write the index file from every url_hash in the publications table
+
+    The file is replaced atomically, so processes that already mapped the
+    old one keep a consistent view.
+
+    Returns:
+        int: Number of hashes written
+    """
+    path = path or get_setting('SEEN_INDEX')['path']
+    conn = connect(db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT LEFT(url_hash, 8) FROM publications")
+        values = array('Q', sorted({int.from_bytes(row[0], 'big') for row in cursor}))
+    finally:
+        cursor.close()
+        conn.close()
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(values)))
+        values.tofile(f)
+    os.replace(temp_path, path)
+    logger.info(f"Seen-URL index: {len(values)} URLs written to {path}")
+    return len(values)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _is_fresh(path, max_age_minutes):
+    try:
+        return time.time() - os.path.getmtime(path) < max_age_minutes * 60
+    except OSError:
+        return False
+
+
+def get_seen_index(db_config):
+    """
+    This process's seen-URL index, building the file first if it is stale
+
+    Returns:
+        SeenIndex, or None when disabled or the index can't be built
+    """
+    global _index
+    settings = get_setting('SEEN_INDEX')
+    if not settings['enabled']:
+        return None
+    with _index_lock:
+        if _index is None:
+            try:
+                if not _is_fresh(settings['path'], settings['max_age_minutes']):
+                    build_seen_index(db_config, settings['path'])
+                _index = SeenIndex(settings['path'])
+            except (mysql.connector.Error, OSError, ValueError) as e:
+                logger.warning(f"Seen-URL index unavailable, checking duplicates in the database: {e}")
+                return None
+        return _index
@@ -0,0 +1,30 @@
+"""
+Shared scraper settings
+
+Settings are read from config.py when it exists (see config_template.py for
+setup instructions) and fall back to the defaults in config_template.py, so
+an older config.py that predates a setting keeps working.
+"""
+
+import config_template
+
+try:
+    import config
+except ImportError:
+    config = config_template
+
+
+def get_setting(name):
+    """
+    Return a top-level setting such as RATE_LIMIT or SELENIUM_CONFIG
+
+    Dict settings are merged over the template defaults, so a config.py that
+    only overrides a few keys still gets every key.
+    """
+    default = getattr(config_template, name)
+    value = getattr(config, name, default)
+    if isinstance(default, dict) and isinstance(value, dict):
+        merged = dict(default)
+        merged.update(value)
+        return merged
+    return value
@@ -0,0 +1,70 @@
+"""
+Canonical article URLs and the fixed-width keys derived from them
+
+The same article is often linked in slightly different ways: with or without
+a trailing slash, "www." casing, tracking parameters, a #fragment, or http
+instead of https. normalize_url() maps all of those to one canonical form,
+and url_key() hashes that form into the 16-byte url_hash used as the unique
+key of the publications table (see publications.py):
+
+    url_key('https://WWW.Example.com/insights/a-b/?utm_source=x#top')
+    == url_key('http://www.example.com/insights/a-b')
+
+Stored article_link values keep the URL exactly as scraped. Only the key is
+normalised, so links of any length dedupe with one compact B-tree lookup
+instead of a 500-character prefix index.
+"""
+
+import hashlib
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change which article a link points to
+TRACKING_PARAMS = {'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga'}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Characters left unescaped in a canonical path (RFC 3986 unreserved + sub-delims)
+PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url):
+    """
+    Canonical form of an article URL, used only for keys and comparisons
+
+    - surrounding whitespace trimmed, scheme and host lower-cased
+    - http treated as https, default ports dropped
+    - percent-encoding made consistent, repeated and trailing slashes removed
+    - tracking parameters (utm_*, fbclid, ...) dropped, the rest sorted
+    - fragment dropped
+    """
+    url = (url or '').strip()
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme == 'http':
+        scheme = 'https'
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = quote(unquote(parts.path), safe=PATH_SAFE)
+    while '//' in path:
+        path = path.replace('//', '/')
+    path = path.rstrip('/')
+
+    query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking(name)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def url_key(url):
+    """16-byte key of the canonical URL (the url_hash column)"""
+    return hashlib.md5(normalize_url(url).encode('utf-8')).digest()
@@ -0,0 +1,142 @@
+"""
+Per-source high-water marks for incremental crawls
+
+A source is one paginated listing (e.g. a blog category or an LKS newsletter
+series). After a clean crawl its watermark stores the newest publication
+date seen and the set of links on the listing's first page. In incremental
+mode the next crawl:
+- skips saving links it already knows
+- stops paginating at the first page made up only of known links
+
+Links are compared in their normalize_url() form (see url_key.py).
+
+Usage:
+    watermark = load_watermark(db_config, source_url) if incremental else None
+    ...
+    for each page:
+        links = [...]
+        if watermark:
+            watermark.observe_page(page_num, links, dates)
+            if watermark.page_is_known(links):
+                break
+    ...
+    if watermark:
+        save_watermark(db_config, watermark)   # only after a clean crawl
+"""
+
+import json
+import logging
+from datetime import datetime
+
+import mysql.connector
+
+from db_pool import connection
+from url_key import normalize_url
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS scrape_watermarks (
+    source VARCHAR(255) PRIMARY KEY,
+    newest_date DATE,
+    top_links MEDIUMTEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+class Watermark:
+    """What a previous crawl of one source already saw"""
+
+    def __init__(self, source, newest_date=None, top_links=None):
+        self.source = source
+        self.newest_date = newest_date
+        self.known_links = {normalize_url(link) for link in top_links or []}
+        # State observed during the current crawl, saved at the end
+        self.seen_newest_date = newest_date
+        self.seen_top_links = None
+
+    def is_known(self, link, date=None):
+        """
+        True if the previous crawl already saw this article
+
+        An article counts as known if it was on the previous top page or is
+        strictly older than the newest article the previous crawl saw.
+        """
+        if normalize_url(link) in self.known_links:
+            return True
+        return bool(date and self.newest_date and _as_date(date) < self.newest_date)
+
+    def page_is_known(self, links, dates=None):
+        """True if every link on a (non-empty) page is already known"""
+        if not links or not (self.known_links or self.newest_date):
+            return False
+        dates = dates or [None] * len(links)
+        return all(self.is_known(link, date) for link, date in zip(links, dates))
+
+    def observe_page(self, page_num, links, dates=()):
+        """Record this crawl's first-page links and newest date"""
+        if page_num == 1:
+            self.seen_top_links = list(links)
+        for date in dates:
+            if date and (self.seen_newest_date is None or _as_date(date) > self.seen_newest_date):
+                self.seen_newest_date = _as_date(date)
+
+
+def _as_date(value):
+    """Accept date, datetime or 'YYYY-MM-DD' strings"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    if hasattr(value, 'date'):
+        return value.date()
+    return value
+
+
+def load_watermark(db_config, source):
+    """Load the watermark for a source; an empty one if none is stored yet"""
+    try:
+        with connection(db_config) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(CREATE_TABLE_QUERY)
+                cursor.execute(
+                    "SELECT newest_date, top_links FROM scrape_watermarks WHERE source = %s", (source,)
+                )
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        logger.error(f"Could not load watermark for {source}: {err}")
+        return Watermark(source)
+
+    if not row:
+        logger.info(f"No watermark yet for {source}, crawling full history")
+        return Watermark(source)
+
+    newest_date, top_links = row
+    logger.info(f"Watermark for {source}: newest {newest_date}")
+    return Watermark(source, newest_date, json.loads(top_links) if top_links else [])
+
+
+def save_watermark(db_config, watermark):
+    """Persist what the current crawl saw; call only after a clean crawl"""
+    if watermark.seen_top_links is None:
+        # Nothing was crawled (e.g. page 1 unchanged), keep the old watermark
+        return
+    try:
+        with connection(db_config) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(CREATE_TABLE_QUERY)
+                cursor.execute("""
+                    INSERT INTO scrape_watermarks (source, newest_date, top_links)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        newest_date = VALUES(newest_date),
+                        top_links = VALUES(top_links)
+                """, (watermark.source, watermark.seen_newest_date, json.dumps(watermark.seen_top_links)))
+                conn.commit()
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        logger.error(f"Could not save watermark for {watermark.source}: {err}")